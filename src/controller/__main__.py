@@ -0,0 +1,67 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Command line entry point of the controller package.
+
+## Syntax
+```
+python -m controller headless [options]   # Render-free monitoring daemon
+python -m controller analyze [options]    # Offline analysis of recordings
+python -m controller serve [options]      # Many streams on a process pool
+python -m controller landmarks [options]  # Landmark-only central judging
+python -m controller tune [options]       # Margin search on recorded sessions
+```
+Run from the project root with `src` on `PYTHONPATH`. Command modules are
+imported only when selected, so every command starts as fast as it can.
+"""
+
+import importlib
+import sys
+
+__purpose__: str = "Dispatch controller subcommands."
+
+COMMANDS: dict[str, str] = {
+    "headless": "controller.headless",
+    "analyze": "controller.offline_analysis",
+    "serve": "controller.server",
+    "landmarks": "controller.landmark_service",
+    "tune": "controller.threshold_search",
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Run the selected subcommand.
+
+    Args:
+        argv (list[str] | None): Arguments, defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: Process exit code.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        sys.stderr.write(
+            f"usage: python -m controller {{{','.join(COMMANDS)}}} [options]\n"
+        )
+        return 2
+    return importlib.import_module(COMMANDS[argv[0]]).main(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
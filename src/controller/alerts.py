@@ -0,0 +1,307 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Non-blocking posture alerts.
+
+The capture and inference loop posts alerts with `AlertDispatcher.post`,
+which never blocks. A background worker coalesces repeated alerts,
+rate-limits each alert kind and hands the survivors to pluggable backends:
+`winsound` beeps, `plyer` desktop notifications, or logging and no-op
+backends for Linux and tests. Backend modules are imported only when a
+backend is first used.
+
+## Syntax
+```
+alerts = AlertDispatcher(default_backends()).start()
+alerts.post(BEEP)
+alerts.post(NOTIFICATION, "Wrong Posture Alert!", "Sit up straight.")
+alerts.stop()
+```
+"""
+
+import queue
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from logging import error, warning
+
+__purpose__: str = "Posture alerts that never stall the frame loop."
+
+# Alert kinds
+BEEP: str = "beep"
+NOTIFICATION: str = "notification"
+
+# Shortest time in seconds between two delivered alerts of a kind.
+DEFAULT_MIN_INTERVALS: dict[str, float] = {BEEP: 1.0, NOTIFICATION: 60.0}
+
+APP_NAME: str = "Sitfix-ai"
+APP_ICON: str = "imgs/sitfixlogo.ico"
+
+
+@dataclass(frozen=True)
+class Alert:
+    """
+    A single alert.
+
+    Attributes:
+        kind (str): `BEEP` or `NOTIFICATION`.
+        title (str): Notification title.
+        message (str): Notification text.
+        count (int): Number of posted alerts coalesced into this one.
+    """
+
+    kind: str
+    title: str = ""
+    message: str = ""
+    count: int = 1
+
+
+class AlertBackend(ABC):
+    """Base class of alert backends, delivers alerts of `kinds`."""
+
+    kinds: tuple[str, ...] = (BEEP, NOTIFICATION)
+
+    @abstractmethod
+    def send(self, alert: Alert) -> None:
+        """Deliver `alert`, called on the dispatcher thread."""
+
+
+class WinsoundBackend(AlertBackend):
+    """Short beeps through `winsound`, Windows only."""
+
+    kinds = (BEEP,)
+
+    def __init__(self, frequency: int = 800, duration: int = 10) -> None:
+        self.frequency: int = frequency
+        self.duration: int = duration
+
+    def send(self, alert: Alert) -> None:
+        import winsound
+
+        winsound.Beep(self.frequency, self.duration)
+
+
+class PlyerBackend(AlertBackend):
+    """Desktop notifications through `plyer`."""
+
+    kinds = (NOTIFICATION,)
+
+    def send(self, alert: Alert) -> None:
+        from plyer import notification
+
+        notification.notify(
+            title=alert.title,
+            message=alert.message,
+            app_name=APP_NAME,
+            app_icon=APP_ICON,
+        )
+
+
+class LogBackend(AlertBackend):
+    """Writes alerts to the log, for headless machines and Linux."""
+
+    def __init__(self, kinds: tuple[str, ...] | None = None) -> None:
+        if kinds is not None:
+            self.kinds = kinds
+
+    def send(self, alert: Alert) -> None:
+        warning(f"Posture alert ({alert.kind} x{alert.count}): {alert.message}")
+
+
+class NullBackend(AlertBackend):
+    """Swallows alerts, keeping the delivered alerts for inspection."""
+
+    def __init__(self) -> None:
+        self.delivered: list[Alert] = []
+
+    def send(self, alert: Alert) -> None:
+        self.delivered.append(alert)
+
+
+def default_backends() -> list[AlertBackend]:
+    """
+    Pick the alert backends available on this machine.
+
+    Returns:
+        list[AlertBackend]: `winsound` on Windows, `plyer` when installed,
+        and the log backend for the kinds neither delivers, e.g. beeps on
+        Linux.
+    """
+    backends: list[AlertBackend] = []
+    if sys.platform == "win32":
+        backends.append(WinsoundBackend())
+    try:
+        import importlib.util
+
+        if importlib.util.find_spec("plyer") is not None:
+            backends.append(PlyerBackend())
+    except (ImportError, ValueError):
+        pass
+    missing: tuple[str, ...] = tuple(
+        kind
+        for kind in (BEEP, NOTIFICATION)
+        if not any(kind in backend.kinds for backend in backends)
+    )
+    if missing:
+        backends.append(LogBackend(missing))
+    return backends
+
+
+class AlertDispatcher:
+    """
+    Deliver alerts from a bounded queue on a background worker.
+
+    `post` only enqueues, so the caller never waits on audio or the
+    desktop. While an alert of a kind is still queued, further alerts of
+    that kind are coalesced into it. Alerts arriving within the minimum
+    interval of their kind are suppressed.
+
+    Purpose: Keep alert side effects out of the capture and inference loop.
+    Time Complexity: O(1) per posted alert.
+    Space Complexity: O(queue_size)
+    """
+
+    def __init__(
+        self,
+        backends: list[AlertBackend] | None = None,
+        min_intervals: dict[str, float] | None = None,
+        queue_size: int = 16,
+    ) -> None:
+        """
+        Args:
+            backends (list[AlertBackend] | None): Delivery backends, defaults
+                to `default_backends()`.
+            min_intervals (dict[str, float] | None): Seconds between two
+                delivered alerts per kind, merged into the defaults.
+            queue_size (int): Capacity of the alert queue.
+        """
+        self.backends: list[AlertBackend] = (
+            backends if backends is not None else default_backends()
+        )
+        self.min_intervals: dict[str, float] = {
+            **DEFAULT_MIN_INTERVALS,
+            **(min_intervals or {}),
+        }
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock: threading.Lock = threading.Lock()
+        self._pending: dict[str, int] = {}  # Kind -> coalesced count
+        self._last_sent: dict[str, float] = {}
+        self._thread: threading.Thread = threading.Thread(
+            target=self._run, name="sitfix-alerts", daemon=True
+        )
+        self.posted: int = 0
+        self.coalesced: int = 0
+        self.suppressed: int = 0
+        self.delivered: int = 0
+
+    def start(self) -> "AlertDispatcher":
+        """Start the worker thread and return self."""
+        self._thread.start()
+        return self
+
+    def post(self, kind: str, title: str = "", message: str = "") -> bool:
+        """
+        Queue an alert without blocking.
+
+        Args:
+            kind (str): `BEEP` or `NOTIFICATION`.
+            title (str): Notification title.
+            message (str): Notification text.
+
+        Returns:
+            bool: True when the alert was queued, False when it was merged
+            into a queued alert of the same kind or the queue was full.
+        """
+        with self._lock:
+            self.posted += 1
+            if kind in self._pending:
+                self._pending[kind] += 1
+                self.coalesced += 1
+                return False
+            try:
+                self._queue.put_nowait(Alert(kind, title, message))
+            except queue.Full:
+                self.suppressed += 1
+                return False
+            self._pending[kind] = 1
+            return True
+
+    def _run(self) -> None:
+        """Worker loop, delivers queued alerts until stopped."""
+        while True:
+            alert: Alert | None = self._queue.get()
+            if alert is None:
+                break
+            with self._lock:
+                count: int = self._pending.pop(alert.kind, 1)
+            now: float = time.monotonic()
+            last: float | None = self._last_sent.get(alert.kind)
+            if last is not None and now - last < self.min_intervals.get(
+                alert.kind, 0.0
+            ):
+                self.suppressed += count
+                continue
+            self._last_sent[alert.kind] = now
+            alert = Alert(alert.kind, alert.title, alert.message, count)
+            for backend in self.backends:
+                if alert.kind not in backend.kinds:
+                    continue
+                try:
+                    backend.send(alert)
+                except Exception as e:
+                    error(f"Error in {type(backend).__name__}: {e}")
+            self.delivered += 1
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """
+        Deliver what is queued, then stop the worker thread.
+
+        Never waits for room in the queue: when it is full, the oldest
+        alert is dropped for the stop marker.
+
+        Args:
+            timeout (float): Seconds to wait for the worker to finish.
+        """
+        if not self._thread.is_alive():
+            return
+        while True:
+            try:
+                self._queue.put_nowait(None)
+                break
+            except queue.Full:
+                try:
+                    dropped: Alert | None = self._queue.get_nowait()
+                except queue.Empty:
+                    continue
+                if dropped is not None:
+                    with self._lock:
+                        self.suppressed += self._pending.pop(dropped.kind, 1)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            warning(f"Alert worker did not stop within {timeout} s")
+
+    def stats(self) -> dict[str, int]:
+        """Return the posted, coalesced, suppressed and delivered counters."""
+        return {
+            "posted": self.posted,
+            "coalesced": self.coalesced,
+            "suppressed": self.suppressed,
+            "delivered": self.delivered,
+        }
@@ -0,0 +1,535 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Headless posture monitoring daemon.
+
+Runs capture, pose detection and posture judging without any window,
+overlay drawing, GUI or audio modules, and writes one JSON line per judged
+frame to stdout or a file. Heavy modules are imported only when the daemon
+starts, and the camera is opened on a background thread while MediaPipe is
+imported and warmed up, so the cold start is measured and reported.
+
+## Syntax
+```
+python -m controller headless --source 0 --output posture.jsonl
+```
+Run from the project root with `src` on `PYTHONPATH`.
+"""
+
+# Imported first, it takes the process start time for the startup report.
+from controller.startup import (
+    DEFAULT_STARTUP_BUDGET,
+    PROCESS_START as _PROCESS_START,
+    open_source,
+    report_startup,
+)
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from logging import error, warning
+from typing import IO
+
+__purpose__: str = "Render-free posture monitoring with JSONL output."
+
+
+def _open_source(source: int | str, opened: dict[str, object]) -> None:
+    """Open the capture source, runs on a background thread."""
+    # OpenCV only, MediaPipe is imported on the main thread meanwhile.
+    opened["capture"] = open_source(source)
+    opened["elapsed"] = time.perf_counter() - _PROCESS_START
+
+
+def _parse_source(source: str) -> int | str:
+    """Camera indices are given as digits, anything else is a file path."""
+    return int(source) if source.isdigit() else source
+
+
+def _parse_size(size: str) -> tuple[int, int]:
+    """Parse a WIDTHxHEIGHT command line value."""
+    width, _, height = size.lower().partition("x")
+    return int(width), int(height)
+
+
+def run_headless(
+    source: int | str,
+    *,
+    output: IO[str],
+    max_frames: int = 0,
+    startup_budget: float = DEFAULT_STARTUP_BUDGET,
+    inference_size: tuple[int, int] | None = None,
+    use_roi: bool = False,
+    scheduler_options: dict[str, object] | None = None,
+    use_alerts: bool = False,
+    record_dir: str | None = None,
+    user_id: str | None = None,
+    metrics_file: str | None = None,
+    metrics_port: int | None = None,
+    model_complexity: int | None = None,
+    target_fps: float | None = None,
+    analytics: str | None = None,
+    rules: str | None = None,
+) -> dict[str, float]:
+    """
+    Monitor posture without rendering and stream JSONL records.
+
+    Args:
+        source (int | str): Camera index or video file path.
+        output (IO[str]): Text stream receiving one JSON record per frame.
+        max_frames (int): Stop after this many judged frames, 0 runs until
+            the source ends or the process is interrupted.
+        startup_budget (float): Seconds allowed from process start to the
+            first judged frame before a warning is logged.
+        inference_size (tuple[int, int] | None): Resolution the pose model
+            runs at, None for the controller default.
+        use_roi (bool): Infer on a crop around the detected upper body.
+        scheduler_options (dict[str, object] | None): Keyword arguments of
+            an `InferenceScheduler` that skips inference on static frames,
+            None runs inference on every frame.
+        use_alerts (bool): Post beeps and notifications on poor posture
+            through the default alert backends.
+        record_dir (str | None): Record every judged frame into a new
+            session under this directory.
+        user_id (str | None): User whose calibrated thresholds judge the
+            posture, None for the default user.
+        metrics_file (str | None): Append per-stage latency and FPS
+            snapshots to this JSONL file every few seconds.
+        metrics_port (int | None): Serve the same counters as Prometheus
+            text on this localhost port.
+        model_complexity (int | None): Pose model complexity (0, 1 or 2),
+            None for the default profile.
+        target_fps (float | None): Auto-tune the pose model on the first
+            frames of the source for this frame rate, overrides
+            `model_complexity`.
+        analytics (str | None): Count judged frames into the per-minute and
+            per-hour statistics kept in this SQLite database.
+        rules (str | None): Judge the posture with this rule set file and
+            add each rule's result to the records, None judges with the
+            built-in conditions only.
+
+    Returns:
+        dict[str, float]: Startup timings in seconds.
+
+    Purpose: Posture monitoring for machines where nobody watches a window.
+    Time Complexity: O(F) - F is the number of frames processed.
+    Space Complexity: O(1)
+    """
+    timings: dict[str, float] = {}
+    opened: dict[str, object] = {}
+    opener: threading.Thread = threading.Thread(
+        target=_open_source, args=(source, opened), name="sitfix-open", daemon=True
+    )
+    opener.start()
+
+    # Keep matplotlib, which MediaPipe imports, away from GUI backends.
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    from controller import posture_controller
+    from model import posture_judger as judge
+
+    timings["imports"] = time.perf_counter() - _PROCESS_START
+
+    def release_source() -> dict[str, float]:
+        """Wait for the source opener and release its capture, on early exit."""
+        opener.join()
+        if opened.get("capture") is not None:
+            opened["capture"].release()
+        return timings
+
+    try:
+        judge.profile_path(user_id)
+    except ValueError as e:
+        error(str(e))
+        return release_source()
+    pose = None
+    if target_fps is None:
+        pose = posture_controller.initialize_pose_model(
+            posture_controller.PoseProfile(model_complexity=model_complexity)
+            if model_complexity is not None
+            else posture_controller.DEFAULT_POSE_PROFILE
+        )
+        if pose is None:
+            return release_source()
+        timings["model_ready"] = time.perf_counter() - _PROCESS_START
+
+    opener.join()
+    timings["source_open"] = opened["elapsed"]
+    capture = opened.get("capture")
+    if capture is None or not capture.isOpened():
+        error(f"Could not open source {source}")
+        return release_source()
+    # Live cameras keep only fresh frames, recorded files are read in full.
+    grabber = posture_controller.FrameGrabber(
+        capture, drop_stale=not isinstance(source, str)
+    ).start()
+
+    if target_fps is not None:
+        profile, pose, report = posture_controller.autotune_pose_model(
+            _tuning_frames(source, grabber),
+            target_fps,
+            inference_size=inference_size or posture_controller.INFERENCE_SIZE,
+        )
+        if pose is None:
+            grabber.stop()
+            capture.release()
+            return timings
+        timings["model_ready"] = time.perf_counter() - _PROCESS_START
+        sys.stderr.write(
+            json.dumps(
+                {
+                    "event": "autotune",
+                    "model_complexity": profile.model_complexity,
+                    "candidates": report,
+                }
+            )
+            + "\n"
+        )
+    roi = posture_controller.PersonROI() if use_roi else None
+    buffers = posture_controller.FrameBufferPool()
+    inference_size = inference_size or posture_controller.INFERENCE_SIZE
+    scheduler = (
+        posture_controller.InferenceScheduler(**scheduler_options)
+        if scheduler_options is not None
+        else None
+    )
+
+    alerts = None
+    if use_alerts:
+        from controller.alerts import AlertDispatcher, BEEP
+
+        alerts = AlertDispatcher().start()
+
+    recorder = None
+    if record_dir is not None:
+        from model.session_recorder import SessionRecorder
+
+        recorder = SessionRecorder(record_dir)
+
+    rollups = None
+    if analytics is not None:
+        from model.analytics import PostureRollups
+
+        rollups = PostureRollups(analytics)
+
+    rule_set = None
+    if rules is not None:
+        from model.posture_rules import load_rules
+
+        try:
+            rule_set = load_rules(rules)
+        except (OSError, ValueError) as e:
+            error(f"Could not load rule set {rules}: {e}")
+            grabber.stop()
+            capture.release()
+            return timings
+
+    from controller import instrumentation
+
+    spans = instrumentation.NULL_METRICS
+    exporters: list = []
+    if metrics_file is not None or metrics_port is not None:
+        spans = instrumentation.PipelineMetrics()
+        if metrics_file is not None:
+            exporters.append(
+                instrumentation.MetricsFileWriter(spans, metrics_file).start()
+            )
+        if metrics_port is not None:
+            exporters.append(
+                instrumentation.MetricsServer(spans, port=metrics_port).start()
+            )
+
+    judged: int = 0
+    try:
+        while grabber.running and (max_frames <= 0 or judged < max_frames):
+            with spans.span(instrumentation.CAPTURE):
+                frame = grabber.read()
+            if frame is None:
+                continue
+            now: float = time.perf_counter()
+            inferred: bool = scheduler is None or scheduler.should_infer(frame, now)
+            if inferred:
+                # Inference only, no display image is created.
+                _, results = posture_controller.process_frame(
+                    frame,
+                    pose,
+                    None,
+                    inference_size,
+                    roi,
+                    buffers,
+                    spans if spans.enabled else None,
+                )
+                landmarks = (
+                    posture_controller.landmarks_to_array(results.pose_landmarks)
+                    if results is not None and results.pose_landmarks
+                    else None
+                )
+                if roi is not None:
+                    roi.update(landmarks, frame.shape)
+                if scheduler is not None:
+                    scheduler.record_inference(
+                        now, time.perf_counter() - now, landmarks
+                    )
+            else:
+                landmarks = scheduler.predict(now)
+
+            timestamp: float = time.time()
+            record: dict[str, object] = {
+                "time": round(timestamp, 3),
+                "frame": judged,
+                "inferred": inferred,
+                "detected": False,
+                "good": False,
+            }
+            if landmarks is not None:
+                profile = judge.profiles.get(user_id or judge.DEFAULT_USER)
+                with spans.span(instrumentation.JUDGING):
+                    good, *cases = judge.isPosture_good_landmarks(landmarks, profile)
+                    if rule_set is not None:
+                        verdict = rule_set.evaluate(landmarks, profile)
+                        good = verdict.good[0]
+                metrics: tuple[float, ...] = tuple(float(case[0]) for case in cases)
+                record["detected"] = True
+                record["good"] = bool(good)
+                if rule_set is not None:
+                    record["rules"] = dict(
+                        zip(rule_set.rule_names, verdict.passed[0].tolist())
+                    )
+                if alerts is not None and not record["good"]:
+                    alerts.post(BEEP, message="Poor posture")
+                (
+                    record["shoulder_distance"],
+                    record["shoulder_tilt"],
+                    record["shoulder_to_nose_distance"],
+                ) = metrics
+            if rollups is not None and landmarks is not None:
+                rollups.add(timestamp, record["good"], metrics)
+            if recorder is not None:
+                recorder.append(
+                    timestamp,
+                    landmarks,
+                    metrics if landmarks is not None else None,
+                    (
+                        (True, record["good"], *(bool(case[1]) for case in cases))
+                        if landmarks is not None
+                        else (False,) * 5
+                    ),
+                )
+            with spans.span("output"):
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+            spans.frame()
+
+            judged += 1
+            if judged == 1:
+                timings["first_judged_frame"] = time.perf_counter() - _PROCESS_START
+                report_startup(timings, startup_budget)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        grabber.stop()
+        capture.release()
+        if alerts is not None:
+            alerts.stop()
+        if recorder is not None:
+            recorder.close()
+        if rollups is not None:
+            rollups.close()
+        for exporter in exporters:
+            exporter.stop()
+        stats: dict[str, int] = grabber.stats()
+        warning(
+            f"Headless run judged {judged} frames, capture dropped "
+            f"{stats['frames_dropped']} of {stats['frames_captured']}"
+        )
+        if scheduler is not None:
+            scheduler_stats: dict[str, float] = scheduler.stats()
+            warning(
+                f"Inference ran on {scheduler_stats['inference_ratio']:.1%} of "
+                f"frames using {scheduler_stats['inference_cpu_share']:.1%} of "
+                f"one core"
+            )
+    return timings
+
+
+def _tuning_frames(source: int | str, grabber: object, count: int = 30) -> list:
+    """
+    Consecutive frames of the source to tune the pose model on.
+
+    Files are read through a second capture so no frame is lost to the
+    monitoring; cameras give up their first frames.
+    """
+    import cv2
+
+    frames: list = []
+    if isinstance(source, str):
+        capture = cv2.VideoCapture(source)
+        while len(frames) < count:
+            success, frame = capture.read()
+            if not success:
+                break
+            frames.append(frame)
+        capture.release()
+    else:
+        while len(frames) < count and grabber.running:
+            frame = grabber.read()
+            if frame is not None:
+                frames.append(frame)
+    return frames
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point of the headless daemon.
+
+    Args:
+        argv (list[str] | None): Arguments, defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="controller headless",
+        description="Monitor posture without rendering, writing JSONL records.",
+    )
+    parser.add_argument("--source", default="0", help="camera index or video file")
+    parser.add_argument("--output", default="-", help="JSONL file, - for stdout")
+    parser.add_argument(
+        "--max-frames", type=int, default=0, help="stop after N judged frames"
+    )
+    parser.add_argument(
+        "--startup-budget",
+        type=float,
+        default=DEFAULT_STARTUP_BUDGET,
+        help="seconds allowed until the first judged frame",
+    )
+    parser.add_argument(
+        "--inference-size",
+        type=_parse_size,
+        default=None,
+        help="WIDTHxHEIGHT the pose model runs at",
+    )
+    parser.add_argument(
+        "--roi", action="store_true", help="infer on a crop around the person"
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="skip inference on frames without motion",
+    )
+    parser.add_argument(
+        "--motion-threshold",
+        type=float,
+        default=4.0,
+        help="mean gray level change that counts as motion",
+    )
+    parser.add_argument(
+        "--max-inference-rate", type=float, help="most inferences per second"
+    )
+    parser.add_argument(
+        "--cpu-budget", type=float, help="share of one core for inference, e.g. 0.15"
+    )
+    parser.add_argument(
+        "--extrapolate",
+        action="store_true",
+        help="extrapolate landmarks between inferences",
+    )
+    parser.add_argument(
+        "--alerts", action="store_true", help="beep or notify on poor posture"
+    )
+    parser.add_argument(
+        "--record",
+        nargs="?",
+        const="user_data/sessions",
+        help="record judged frames as a session under this directory",
+    )
+    parser.add_argument(
+        "--analytics",
+        nargs="?",
+        const="user_data/analytics.sqlite3",
+        help="count judged frames into the statistics database",
+    )
+    parser.add_argument(
+        "--rules",
+        nargs="?",
+        const="src/model/config/posture_rules.json",
+        help="judge with this posture rule set and report every rule",
+    )
+    parser.add_argument(
+        "--user", default=None, help="user whose calibrated profile is used"
+    )
+    parser.add_argument(
+        "--model-complexity",
+        type=int,
+        choices=(0, 1, 2),
+        help="pose model complexity, heavier is more accurate",
+    )
+    parser.add_argument(
+        "--target-fps",
+        type=float,
+        help="pick the most accurate pose model that sustains this frame rate",
+    )
+    parser.add_argument(
+        "--metrics-file", help="append stage latency snapshots to this JSONL file"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="serve Prometheus metrics on this localhost port",
+    )
+    args = parser.parse_args(argv)
+    scheduler_options: dict[str, object] | None = None
+    if args.adaptive or args.max_inference_rate or args.cpu_budget:
+        scheduler_options = {
+            "motion_threshold": args.motion_threshold,
+            "max_rate": args.max_inference_rate,
+            "cpu_budget": args.cpu_budget,
+            "extrapolate": args.extrapolate,
+        }
+
+    output: IO[str] = (
+        sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    )
+    try:
+        timings: dict[str, float] = run_headless(
+            _parse_source(args.source),
+            output=output,
+            max_frames=args.max_frames,
+            startup_budget=args.startup_budget,
+            inference_size=args.inference_size,
+            use_roi=args.roi,
+            scheduler_options=scheduler_options,
+            use_alerts=args.alerts,
+            record_dir=args.record,
+            user_id=args.user,
+            metrics_file=args.metrics_file,
+            metrics_port=args.metrics_port,
+            model_complexity=args.model_complexity,
+            target_fps=args.target_fps,
+            analytics=args.analytics,
+            rules=args.rules,
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0 if "first_judged_frame" in timings else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
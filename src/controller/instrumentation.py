@@ -0,0 +1,429 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Per-stage timing of the posture pipeline.
+
+The frame loop wraps each stage in a span, which records the stage's
+latency into a fixed-size ring buffer. Rolling p50/p95/p99 latencies and
+the frame rate are computed only when somebody asks: the on-screen
+overlay, a `MetricsFileWriter` appending JSON lines every few seconds, or
+a `MetricsServer` serving Prometheus text on localhost.
+
+`NULL_METRICS` has the same interface and does nothing, so a disabled
+pipeline pays one attribute lookup and an empty `with` per stage.
+
+## Syntax
+```
+metrics = PipelineMetrics()
+with metrics.span(INFERENCE):
+    results = pose.process(image)
+metrics.frame()
+MetricsServer(metrics, port=9464).start()
+```
+"""
+
+import http.server
+import json
+import threading
+import time
+from logging import error
+
+import cv2
+import numpy as np
+
+__purpose__: str = "Find out where the time of a frame goes."
+
+# Pipeline stages, in the order a frame passes them
+CAPTURE: str = "capture"
+PREPROCESSING: str = "preprocessing"
+INFERENCE: str = "inference"
+JUDGING: str = "judging"
+RENDERING: str = "rendering"
+DISPLAY: str = "display"
+STAGES: tuple[str, ...] = (
+    CAPTURE,
+    PREPROCESSING,
+    INFERENCE,
+    JUDGING,
+    RENDERING,
+    DISPLAY,
+)
+
+PERCENTILES: tuple[int, ...] = (50, 95, 99)
+DEFAULT_WINDOW: int = 300
+DEFAULT_PORT: int = 9464
+
+
+class _Span:
+    """Reusable context manager timing one stage, not reentrant."""
+
+    __slots__ = ("_metrics", "_stage", "_started")
+
+    def __init__(self, metrics: "PipelineMetrics", stage: str) -> None:
+        self._metrics: PipelineMetrics = metrics
+        self._stage: str = stage
+        self._started: float = 0.0
+
+    def __enter__(self) -> "_Span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self._metrics.record(self._stage, time.perf_counter() - self._started)
+
+
+class _NullSpan:
+    """Context manager that does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+
+class PipelineMetrics:
+    """
+    Rolling latency and frame rate counters of the pipeline stages.
+
+    Every stage keeps its last `window` latencies in a ring buffer, the
+    frame counter its last `window` timestamps. Recording is O(1) and
+    allocation free; percentiles are computed from a copy on demand, so
+    readers on other threads get a consistent enough snapshot without a
+    lock on the frame loop.
+
+    Purpose: Visibility into where the time of a frame goes.
+    Time Complexity: O(1) per span, O(S * W log W) per snapshot.
+    Space Complexity: O(S * W) - S stages of W samples.
+    """
+
+    enabled: bool = True
+
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        """
+        Args:
+            window (int): Samples kept per stage and frames the FPS is
+                averaged over.
+        """
+        self.window: int = max(2, window)
+        self._latencies: dict[str, np.ndarray] = {}
+        self._counts: dict[str, int] = {}
+        self._spans: dict[str, _Span] = {}
+        self._frame_times: np.ndarray = np.zeros(self.window)
+        self.frames: int = 0
+        for stage in STAGES:
+            self._add_stage(stage)
+
+    def _add_stage(self, stage: str) -> None:
+        """Allocate the ring buffer of a stage."""
+        self._latencies[stage] = np.zeros(self.window)
+        self._counts[stage] = 0
+        self._spans[stage] = _Span(self, stage)
+
+    def span(self, stage: str) -> _Span:
+        """
+        Context manager recording the time spent inside it.
+
+        Args:
+            stage (str): One of `STAGES`, or a custom stage name.
+
+        Returns:
+            _Span: The stage's span, reused on every call.
+        """
+        span: _Span | None = self._spans.get(stage)
+        if span is None:
+            self._add_stage(stage)
+            span = self._spans[stage]
+        return span
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Record one latency sample.
+
+        Args:
+            stage (str): Stage name.
+            seconds (float): Time the stage took.
+        """
+        if stage not in self._latencies:
+            self._add_stage(stage)
+        count: int = self._counts[stage]
+        self._latencies[stage][count % self.window] = seconds
+        self._counts[stage] = count + 1
+
+    def frame(self, now: float | None = None) -> None:
+        """
+        Count a finished frame for the FPS counter.
+
+        Args:
+            now (float | None): `time.perf_counter()` timestamp, taken when
+                omitted.
+        """
+        self._frame_times[self.frames % self.window] = (
+            time.perf_counter() if now is None else now
+        )
+        self.frames += 1
+
+    def fps(self) -> float:
+        """Frames per second over the last `window` frames."""
+        frames: int = min(self.frames, self.window)
+        if frames < 2:
+            return 0.0
+        newest: float = self._frame_times[(self.frames - 1) % self.window]
+        oldest: float = self._frame_times[(self.frames - frames) % self.window]
+        return (frames - 1) / max(newest - oldest, 1e-9)
+
+    def snapshot(self) -> dict[str, object]:
+        """
+        Current rolling statistics.
+
+        Returns:
+            dict[str, object]: `fps`, `frames` and per stage the sample
+            count and mean and percentile latencies in milliseconds.
+            Stages without samples are left out.
+        """
+        stages: dict[str, dict[str, float]] = {}
+        for stage, latencies in list(self._latencies.items()):
+            count: int = self._counts[stage]
+            if not count:
+                continue
+            samples: np.ndarray = latencies[: min(count, self.window)] * 1e3
+            stats: dict[str, float] = {
+                "count": count,
+                "mean_ms": float(samples.mean()),
+            }
+            for percentile, value in zip(
+                PERCENTILES, np.percentile(samples, PERCENTILES)
+            ):
+                stats[f"p{percentile}_ms"] = float(value)
+            stages[stage] = stats
+        return {"fps": self.fps(), "frames": self.frames, "stages": stages}
+
+
+class NullMetrics:
+    """`PipelineMetrics` interface for disabled instrumentation."""
+
+    enabled: bool = False
+    frames: int = 0
+    _span: _NullSpan = _NullSpan()
+
+    def span(self, stage: str) -> _NullSpan:
+        return self._span
+
+    def record(self, stage: str, seconds: float) -> None:
+        return None
+
+    def frame(self, now: float | None = None) -> None:
+        return None
+
+    def fps(self) -> float:
+        return 0.0
+
+    def snapshot(self) -> dict[str, object]:
+        return {"fps": 0.0, "frames": 0, "stages": {}}
+
+
+# Shared instance for callers without instrumentation
+NULL_METRICS: NullMetrics = NullMetrics()
+
+
+def prometheus_text(snapshot: dict[str, object], prefix: str = "sitfix") -> str:
+    """
+    Render a snapshot in the Prometheus text exposition format.
+
+    Args:
+        snapshot (dict[str, object]): Result of `PipelineMetrics.snapshot`.
+        prefix (str): Metric name prefix.
+
+    Returns:
+        str: Exposition text, one gauge family per statistic.
+    """
+    lines: list[str] = [
+        f"# TYPE {prefix}_fps gauge",
+        f"{prefix}_fps {snapshot['fps']:.3f}",
+        f"# TYPE {prefix}_frames_total counter",
+        f"{prefix}_frames_total {snapshot['frames']}",
+        f"# TYPE {prefix}_stage_latency_ms gauge",
+    ]
+    for stage, stats in snapshot["stages"].items():
+        for percentile in PERCENTILES:
+            lines.append(
+                f'{prefix}_stage_latency_ms{{stage="{stage}",'
+                f'quantile="{percentile / 100}"}} {stats[f"p{percentile}_ms"]:.4f}'
+            )
+    lines.append(f"# TYPE {prefix}_stage_samples_total counter")
+    for stage, stats in snapshot["stages"].items():
+        lines.append(
+            f'{prefix}_stage_samples_total{{stage="{stage}"}} {stats["count"]}'
+        )
+    return "\n".join(lines) + "\n"
+
+
+class MetricsOverlay:
+    """
+    Draws FPS and stage latencies in the corner of the display image.
+
+    The text is recomputed at most every `refresh` seconds, drawing reuses
+    the cached lines.
+    """
+
+    def __init__(self, metrics: PipelineMetrics, refresh: float = 0.5) -> None:
+        """
+        Args:
+            metrics (PipelineMetrics): Counters to show.
+            refresh (float): Seconds between text updates.
+        """
+        self.metrics: PipelineMetrics = metrics
+        self.refresh: float = refresh
+        self._next_refresh: float = 0.0
+        self._lines: list[str] = []
+
+    def draw(self, image: cv2.typing.MatLike) -> None:
+        """
+        Draw the overlay onto the image in place.
+
+        Args:
+            image (cv2.typing.MatLike): BGR display image.
+        """
+        now: float = time.perf_counter()
+        if now >= self._next_refresh:
+            self._next_refresh = now + self.refresh
+            snapshot: dict[str, object] = self.metrics.snapshot()
+            self._lines = [f"{snapshot['fps']:.1f} fps"] + [
+                f"{stage}: {stats['p50_ms']:.1f} / {stats['p95_ms']:.1f} / "
+                f"{stats['p99_ms']:.1f} ms"
+                for stage, stats in snapshot["stages"].items()
+            ]
+        bottom: int = image.shape[0] - 20
+        for index, line in enumerate(reversed(self._lines)):
+            cv2.putText(
+                image,
+                line,
+                (20, bottom - 25 * index),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.6,
+                (0, 255, 255),
+                1,
+            )
+
+
+class MetricsFileWriter:
+    """Appends a JSON snapshot line to a file every `interval` seconds."""
+
+    def __init__(
+        self, metrics: PipelineMetrics, path: str, interval: float = 5.0
+    ) -> None:
+        """
+        Args:
+            metrics (PipelineMetrics): Counters to write.
+            path (str): JSONL file, appended to.
+            interval (float): Seconds between two snapshots.
+        """
+        self.metrics: PipelineMetrics = metrics
+        self.path: str = path
+        self.interval: float = interval
+        self._stop: threading.Event = threading.Event()
+        self._thread: threading.Thread = threading.Thread(
+            target=self._run, name="metrics-file", daemon=True
+        )
+
+    def start(self) -> "MetricsFileWriter":
+        self._thread.start()
+        return self
+
+    def write(self) -> None:
+        """Append one snapshot now."""
+        snapshot: dict[str, object] = self.metrics.snapshot()
+        snapshot["time"] = round(time.time(), 3)
+        try:
+            with open(self.path, "a", encoding="utf-8") as metrics_file:
+                metrics_file.write(json.dumps(snapshot) + "\n")
+        except OSError as e:
+            error(f"Error writing metrics to {self.path}: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def stop(self) -> None:
+        """Stop the writer and append a last snapshot."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.write()
+
+
+class MetricsServer:
+    """
+    Serves the counters as Prometheus text on `http://host:port/metrics`.
+
+    The server runs on a daemon thread and binds to localhost by default.
+    """
+
+    def __init__(
+        self,
+        metrics: PipelineMetrics,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+    ) -> None:
+        """
+        Args:
+            metrics (PipelineMetrics): Counters to serve.
+            host (str): Interface to bind.
+            port (int): TCP port, 0 picks a free one.
+        """
+        self.metrics: PipelineMetrics = metrics
+        metrics_source: PipelineMetrics = metrics
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body: bytes = prometheus_text(metrics_source.snapshot()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_: object) -> None:
+                return None
+
+        self._server: http.server.ThreadingHTTPServer = http.server.ThreadingHTTPServer(
+            (host, port), Handler
+        )
+        self._server.daemon_threads = True
+        self._thread: threading.Thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-server", daemon=True
+        )
+
+    @property
+    def port(self) -> int:
+        """Port the server is bound to."""
+        return self._server.server_address[1]
+
+    def start(self) -> "MetricsServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Shut the server down and close its socket."""
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,550 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+# Landmark service
+
+Judges posture centrally without sending video off the workstation. The
+client runs pose detection itself and streams one compact packet per frame
+to the service over TCP (asyncio): a 5 byte header and the 33 x 4 landmarks
+as float16, 269 bytes in total. The service queues the packets of all
+clients for a couple of milliseconds, judges them with one
+`isPosture_good_batch` call per user profile and answers every packet with
+a 12 byte verdict.
+
+## Packets (little endian)
+```
+client -> service  HELLO      B kind=0, I length <= 64, user ID (UTF-8)
+client -> service  LANDMARKS  B kind=1, I sequence, 33 x 4 float16
+client -> service  NO_PERSON  B kind=2, I sequence
+service -> client  VERDICT    B kind=3, I sequence, B flags, 3 float16 metrics
+```
+Verdict flags: bit 0 detected, bit 1 good, bits 2-4 the three conditions.
+User IDs follow `judge.USER_ID_PATTERN`; the service closes connections
+that send a longer or invalid one. A client that does not read its
+verdicts stops being read from once its send buffer is full.
+
+## Syntax
+```
+python -m controller landmarks serve --port 8765
+python -m controller landmarks client --source 0 --host 10.0.0.2 --user alice
+python -m controller landmarks load --clients 300 --rate 30 --seconds 10
+```
+Run from the project root with `src` on `PYTHONPATH`.
+"""
+
+import argparse
+import asyncio
+import json
+import struct
+import sys
+import time
+from logging import error, warning
+
+import numpy as np
+
+from model import posture_judger as judge
+
+__purpose__: str = "Central posture judging from landmark-only packets."
+
+DEFAULT_HOST: str = "127.0.0.1"
+DEFAULT_PORT: int = 8765
+
+# Packet kinds
+HELLO: int = 0
+LANDMARKS: int = 1
+NO_PERSON: int = 2
+VERDICT: int = 3
+
+HEADER: struct.Struct = struct.Struct("<BI")
+VERDICT_PACKET: struct.Struct = struct.Struct("<BIB3e")
+LANDMARK_BYTES: int = judge.LANDMARK_COUNT * 4 * 2
+PACKET_BYTES: int = HEADER.size + LANDMARK_BYTES
+# Longest user ID a HELLO may carry, longer ones close the connection.
+MAX_HELLO_BYTES: int = 64
+
+# Verdict flags
+DETECTED: int = 1
+GOOD: int = 2
+CONDITION_SHIFT: int = 2
+
+
+def encode_landmarks(sequence: int, landmarks: np.ndarray | None) -> bytes:
+    """
+    Pack one frame for the service.
+
+    Args:
+        sequence (int): Frame sequence number, echoed in the verdict.
+        landmarks (np.ndarray | None): (33, 4) landmarks, None when no
+            person was detected.
+
+    Returns:
+        bytes: LANDMARKS or NO_PERSON packet.
+    """
+    if landmarks is None:
+        return HEADER.pack(NO_PERSON, sequence)
+    return (
+        HEADER.pack(LANDMARKS, sequence) + landmarks.astype("<f2", copy=False).tobytes()
+    )
+
+
+def decode_verdict(packet: bytes) -> dict[str, object]:
+    """
+    Unpack a verdict.
+
+    Args:
+        packet (bytes): VERDICT packet.
+
+    Returns:
+        dict[str, object]: `sequence`, `detected`, `good`, `conditions` and
+        the three metrics.
+    """
+    _, sequence, flags, distance, tilt, nose = VERDICT_PACKET.unpack(packet)
+    return {
+        "sequence": sequence,
+        "detected": bool(flags & DETECTED),
+        "good": bool(flags & GOOD),
+        "conditions": [bool(flags >> (CONDITION_SHIFT + i) & 1) for i in range(3)],
+        "shoulder_distance": distance,
+        "shoulder_tilt": tilt,
+        "shoulder_to_nose_distance": nose,
+    }
+
+
+class LandmarkService:
+    """
+    asyncio TCP service judging the landmark packets of many clients.
+
+    Packets are queued per user profile and flushed `max_delay` seconds
+    after the first one arrived, or as soon as `max_batch` are waiting;
+    each flush judges a queue with one vectorized call.
+
+    Purpose: Judge posture for many workstations from landmarks alone.
+    Time Complexity: O(P) per flush - P queued packets.
+    Space Complexity: O(P)
+    """
+
+    def __init__(self, max_batch: int = 1024, max_delay: float = 0.002) -> None:
+        """
+        Args:
+            max_batch (int): Packets that trigger an immediate flush.
+            max_delay (float): Seconds a packet waits for others to join
+                its batch.
+        """
+        self.max_batch: int = max_batch
+        self.max_delay: float = max_delay
+        # User ID -> (writers, sequences, payloads) waiting to be judged
+        self._pending: dict[str, tuple[list, list[int], list[bytes]]] = {}
+        self._queued: int = 0
+        self._wakeup: asyncio.Event | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._flusher: asyncio.Task | None = None
+        self.packets: int = 0
+        self.batches: int = 0
+        self.clients: int = 0
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> int:
+        """
+        Start listening and return the bound port (useful with port 0).
+        """
+        self._wakeup = asyncio.Event()
+        self._flusher = asyncio.create_task(self._flush_loop())
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Close the listening socket and stop flushing."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._flusher is not None:
+            self._flusher.cancel()
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Read the packets of one connection until it closes."""
+        self.clients += 1
+        user_id: str = judge.DEFAULT_USER
+        try:
+            while True:
+                kind, value = HEADER.unpack(await reader.readexactly(HEADER.size))
+                if kind == LANDMARKS:
+                    payload: bytes = await reader.readexactly(LANDMARK_BYTES)
+                    self._enqueue(user_id, writer, value, payload)
+                elif kind == NO_PERSON:
+                    writer.write(VERDICT_PACKET.pack(VERDICT, value, 0, 0, 0, 0))
+                elif kind == HELLO:
+                    if value > MAX_HELLO_BYTES:
+                        warning(f"HELLO of {value} bytes, closing connection")
+                        break
+                    hello: str = (await reader.readexactly(value)).decode(
+                        errors="replace"
+                    )
+                    if not judge.USER_ID_PATTERN.fullmatch(hello):
+                        warning(f"Invalid user ID {hello!r}, closing connection")
+                        break
+                    user_id = hello
+                else:
+                    warning(f"Unknown packet kind {kind}, closing connection")
+                    break
+                # Verdicts of batches are written by the flush loop, which
+                # must not wait on one client; waiting here stops reading
+                # from a client that does not read its verdicts, so its
+                # send buffer stays bounded.
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    def _enqueue(
+        self, user_id: str, writer: asyncio.StreamWriter, sequence: int, payload: bytes
+    ) -> None:
+        """Queue one packet for the next batch."""
+        pending: tuple[list, list[int], list[bytes]] | None = self._pending.get(user_id)
+        if pending is None:
+            pending = self._pending[user_id] = ([], [], [])
+        pending[0].append(writer)
+        pending[1].append(sequence)
+        pending[2].append(payload)
+        self._queued += 1
+        self._wakeup.set()
+
+    async def _flush_loop(self) -> None:
+        """Judge queued packets in batches, forever."""
+        while True:
+            await self._wakeup.wait()
+            # Give packets of other clients a moment to join the batch
+            if self._queued < self.max_batch:
+                await asyncio.sleep(self.max_delay)
+            self._wakeup.clear()
+            pending, self._pending, self._queued = self._pending, {}, 0
+            # One user's failure must not drop the batches of the others
+            for user_id, batch in pending.items():
+                try:
+                    self._judge(user_id, *batch)
+                except Exception as e:
+                    error(f"Error judging landmark batch of {user_id}: {e}")
+
+    def _judge(
+        self,
+        user_id: str,
+        writers: list[asyncio.StreamWriter],
+        sequences: list[int],
+        payloads: list[bytes],
+    ) -> None:
+        """Judge one user's packets and write the verdicts."""
+        landmarks: np.ndarray = np.frombuffer(b"".join(payloads), "<f2").reshape(
+            len(payloads), judge.LANDMARK_COUNT, 4
+        )
+        is_good, metrics, conditions = judge.isPosture_good_batch(
+            landmarks, judge.profiles.get(user_id)
+        )
+        flags: np.ndarray = (
+            DETECTED
+            | is_good.astype(np.uint8) << 1
+            | (conditions.astype(np.uint8) << np.arange(CONDITION_SHIFT, 5)).sum(
+                axis=1, dtype=np.uint8
+            )
+        )
+        pack = VERDICT_PACKET.pack
+        for writer, sequence, flag, (distance, tilt, nose) in zip(
+            writers, sequences, flags.tolist(), metrics.tolist()
+        ):
+            if not writer.is_closing():
+                writer.write(pack(VERDICT, sequence, flag, distance, tilt, nose))
+        self.packets += len(payloads)
+        self.batches += 1
+
+
+class LandmarkClient:
+    """
+    Connection of one workstation to the landmark service.
+
+    `send` never waits for the verdict; verdicts are read with `verdict`
+    and carry the sequence number of their packet. NO_PERSON packets are
+    answered at once, so their verdicts can overtake queued ones.
+    """
+
+    def __init__(self, user_id: str | None = None) -> None:
+        """
+        Args:
+            user_id (str | None): Profile the service judges with, None for
+                the default user.
+
+        Raises:
+            ValueError: The user ID does not follow `judge.USER_ID_PATTERN`.
+        """
+        if user_id and not judge.USER_ID_PATTERN.fullmatch(user_id):
+            raise ValueError(f"Invalid user ID {user_id!r}")
+        self.user_id: str | None = user_id
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def connect(
+        self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+    ) -> "LandmarkClient":
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        if self.user_id:
+            user: bytes = self.user_id.encode()
+            self._writer.write(HEADER.pack(HELLO, len(user)) + user)
+        return self
+
+    def send(self, sequence: int, landmarks: np.ndarray | None) -> None:
+        """Queue one frame for sending."""
+        self._writer.write(encode_landmarks(sequence, landmarks))
+
+    def send_payload(self, sequence: int, payload: bytes) -> None:
+        """Queue already encoded float16 landmarks for sending."""
+        self._writer.write(HEADER.pack(LANDMARKS, sequence) + payload)
+
+    async def verdict(self) -> dict[str, object]:
+        """Wait for the next verdict."""
+        return decode_verdict(await self._reader.readexactly(VERDICT_PACKET.size))
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def run_client(
+    source: int | str, host: str, port: int, user_id: str | None = None
+) -> None:
+    """
+    Detect poses locally and print the service's verdicts as JSONL.
+
+    Pose detection runs on a worker thread, so sending and receiving keep
+    going while a frame is being processed.
+
+    Args:
+        source (int | str): Camera index or video file.
+        host (str): Service host.
+        port (int): Service port.
+        user_id (str | None): Profile to be judged with.
+    """
+    from controller import posture_controller
+
+    pose = posture_controller.initialize_pose_model()
+    capture = posture_controller.capture_video(source)
+    grabber = posture_controller.FrameGrabber(
+        capture, drop_stale=not isinstance(source, str)
+    ).start()
+    buffers = posture_controller.FrameBufferPool()
+    client: LandmarkClient = await LandmarkClient(user_id).connect(host, port)
+
+    async def print_verdicts() -> None:
+        while True:
+            sys.stdout.write(json.dumps(await client.verdict()) + "\n")
+            sys.stdout.flush()
+
+    printer: asyncio.Task = asyncio.create_task(print_verdicts())
+    sequence: int = 0
+
+    def detect() -> np.ndarray | None | bool:
+        frame = grabber.read()
+        if frame is None:
+            return False if not grabber.running else None
+        _, results = posture_controller.process_frame(
+            frame, pose, display_size=None, buffers=buffers
+        )
+        if results is None or not results.pose_landmarks:
+            return None
+        return posture_controller.landmarks_to_array(results.pose_landmarks)
+
+    try:
+        while True:
+            landmarks = await asyncio.to_thread(detect)
+            if landmarks is False:
+                break
+            client.send(sequence, landmarks)
+            sequence += 1
+        # Let the last verdicts arrive
+        await asyncio.sleep(0.5)
+    finally:
+        printer.cancel()
+        grabber.stop()
+        capture.release()
+        await client.close()
+
+
+def synthetic_landmarks(rng: np.random.Generator) -> np.ndarray:
+    """Landmarks of a roughly upright person with some noise, for load tests."""
+    landmarks: np.ndarray = rng.normal(0.5, 0.01, (judge.LANDMARK_COUNT, 4))
+    landmarks[judge.NOSE_INDEX, :2] = (0.5, 0.18)
+    landmarks[judge.LEFT_SHOULDER_INDEX, :2] = (0.70, 0.52)
+    landmarks[judge.RIGHT_SHOULDER_INDEX, :2] = (0.30, 0.52)
+    landmarks[:, :2] += rng.normal(0.0, 0.02, (judge.LANDMARK_COUNT, 2))
+    landmarks[:, 3] = 0.95
+    return landmarks.astype(np.float16)
+
+
+async def load_test(
+    clients: int = 200,
+    rate: float = 30.0,
+    seconds: float = 10.0,
+    host: str | None = None,
+    port: int = DEFAULT_PORT,
+) -> dict[str, float]:
+    """
+    Simulate many clients streaming landmarks and measure the service.
+
+    Without `host` an in-process service is started on a free localhost
+    port. Every client sends `rate` packets per second, paced on its own
+    clock, and times each verdict's round trip.
+
+    Args:
+        clients (int): Simulated clients.
+        rate (float): Packets per second and client.
+        seconds (float): Duration of the test.
+        host (str | None): Host of a running service, None for in-process.
+        port (int): Port of a running service.
+
+    Returns:
+        dict[str, float]: Verdict throughput, round trip percentiles in
+        milliseconds and, in-process, the mean batch size.
+
+    Purpose: Load generator for the landmark service on localhost.
+    Time Complexity: O(clients * rate * seconds)
+    Space Complexity: O(clients * rate * seconds) round trip samples.
+    """
+    service: LandmarkService | None = None
+    if host is None:
+        service = LandmarkService()
+        port = await service.start(DEFAULT_HOST, 0)
+        host = DEFAULT_HOST
+
+    round_trips: list[float] = []
+    verdicts: list[int] = [0]
+
+    async def simulate(index: int) -> None:
+        rng: np.random.Generator = np.random.default_rng(index)
+        packets: list[bytes] = [
+            encode_landmarks(0, synthetic_landmarks(rng))[HEADER.size :]
+            for _ in range(8)
+        ]
+        client: LandmarkClient = await LandmarkClient().connect(host, port)
+        sent: dict[int, float] = {}
+
+        async def receive() -> None:
+            while True:
+                verdict: dict[str, object] = await client.verdict()
+                round_trips.append(time.perf_counter() - sent.pop(verdict["sequence"]))
+                verdicts[0] += 1
+
+        receiver: asyncio.Task = asyncio.create_task(receive())
+        # Spread the clients' send times over one frame interval
+        await asyncio.sleep(index % max(int(rate), 1) / rate / max(int(rate), 1))
+        started: float = time.perf_counter()
+        sequence: int = 0
+        while time.perf_counter() - started < seconds:
+            sent[sequence] = time.perf_counter()
+            client.send_payload(sequence, packets[sequence % len(packets)])
+            sequence += 1
+            await asyncio.sleep(max(started + sequence / rate - time.perf_counter(), 0))
+        await asyncio.sleep(0.5)
+        receiver.cancel()
+        await client.close()
+
+    started: float = time.perf_counter()
+    await asyncio.gather(*(simulate(index) for index in range(clients)))
+    elapsed: float = time.perf_counter() - started - 0.5
+    milliseconds: np.ndarray = np.asarray(round_trips) * 1e3
+    stats: dict[str, float] = {
+        "clients": clients,
+        "verdicts": verdicts[0],
+        "verdicts_per_second": verdicts[0] / max(elapsed, 1e-9),
+    }
+    if milliseconds.size:
+        for percentile in (50, 95, 99):
+            stats[f"p{percentile}_ms"] = float(np.percentile(milliseconds, percentile))
+    if service is not None:
+        stats["mean_batch"] = service.packets / max(service.batches, 1)
+        await service.stop()
+    return stats
+
+
+async def _serve_forever(host: str, port: int) -> None:
+    service: LandmarkService = LandmarkService()
+    bound: int = await service.start(host, port)
+    sys.stderr.write(f"Landmark service listening on {host}:{bound}\n")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await service.stop()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point of the landmark service, client and load test.
+
+    Args:
+        argv (list[str] | None): Arguments, defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="controller landmarks",
+        description="Judge posture centrally from landmark packets.",
+    )
+    parser.add_argument("mode", choices=("serve", "client", "load"))
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--source", default="0", help="client: camera or video")
+    parser.add_argument("--user", help="client: profile to be judged with")
+    parser.add_argument("--clients", type=int, default=200, help="load: clients")
+    parser.add_argument("--rate", type=float, default=30.0, help="load: fps/client")
+    parser.add_argument("--seconds", type=float, default=10.0, help="load: duration")
+    parser.add_argument(
+        "--external",
+        action="store_true",
+        help="load: test a running service instead of an in-process one",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        if args.mode == "serve":
+            asyncio.run(_serve_forever(args.host, args.port))
+        elif args.mode == "client":
+            source: int | str = (
+                int(args.source) if args.source.isdigit() else args.source
+            )
+            asyncio.run(run_client(source, args.host, args.port, args.user))
+        else:
+            stats: dict[str, float] = asyncio.run(
+                load_test(
+                    args.clients,
+                    args.rate,
+                    args.seconds,
+                    args.host if args.external else None,
+                    args.port,
+                )
+            )
+            print(json.dumps(stats))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        error(f"Landmark service connection failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Background monitoring for the GUI.
+
+`Monitor` runs `posture_controller.process_video` on a worker thread and
+publishes every annotated frame, converted to RGB and scaled to the view
+size, together with its posture verdict through a small bounded queue.
+When the GUI falls behind, the oldest frame is dropped, so the view always
+shows the latest frame and the pipeline never blocks on Tk. Monitoring can
+be started and stopped any number of times; the pose model is kept warm
+between runs.
+
+## Syntax
+```
+monitor = Monitor(source=0).start()
+frame = monitor.latest()  # From the Tk thread, via after()
+monitor.stop()
+```
+"""
+
+import functools
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from logging import error
+
+import cv2
+import numpy as np
+
+from controller import posture_controller
+from controller.alerts import AlertDispatcher
+from model import posture_judger as judge
+from model.analytics import ANALYTICS_DB, PostureRollups
+
+__purpose__: str = "Run the posture pipeline off the GUI thread."
+
+VIEW_SIZE: tuple[int, int] = (640, 480)
+QUEUE_SIZE: int = 2  # Frames in flight, older ones are dropped
+STOP_TIMEOUT: float = 3.0  # Seconds a restart waits for the previous run
+
+
+@dataclass(frozen=True, slots=True)
+class MonitorFrame:
+    """
+    One annotated frame published to the GUI.
+
+    Attributes:
+        image (np.ndarray): RGB image of at most `VIEW_SIZE`, owned by the
+            receiver.
+        status (tuple | None): Posture verdict and metrics drawn onto the
+            frame, None when nobody was detected.
+        timestamp (float): `time.perf_counter()` when it was published.
+    """
+
+    image: np.ndarray
+    status: tuple | None
+    timestamp: float
+
+
+class Monitor:
+    """
+    Runs the posture pipeline on a worker thread, feeding a bounded queue.
+
+    Purpose: Keep the GUI responsive while the pipeline runs.
+    Time Complexity: O(W * H) per frame.
+    Space Complexity: O(queue_size * W * H)
+    """
+
+    def __init__(
+        self,
+        source: int | str = 0,
+        warmup: object = None,
+        view_size: tuple[int, int] = VIEW_SIZE,
+        queue_size: int = QUEUE_SIZE,
+        user_id: str = judge.DEFAULT_USER,
+        alerts: bool = True,
+        analytics: str | None = ANALYTICS_DB,
+    ) -> None:
+        """
+        Args:
+            source (int | str): Camera index or video file path.
+            warmup (PipelineWarmup | None): Started warm-up whose capture
+                and pose model the first run takes over.
+            view_size (tuple[int, int]): Largest (width, height) published.
+            queue_size (int): Frames buffered for the GUI.
+            user_id (str): User whose thresholds judge the posture.
+            alerts (bool): Beep and notify on poor posture.
+            analytics (str | None): Database the judged frames are counted
+                into for the stats window, None disables it.
+        """
+        self.source: int | str = source
+        self.warmup: object = warmup
+        self.view_size: tuple[int, int] = view_size
+        self.user_id: str = user_id
+        self.alerts: bool = alerts
+        self.analytics: str | None = analytics
+        self.frames: queue.Queue[MonitorFrame] = queue.Queue(maxsize=queue_size)
+        self.published: int = 0
+        self.dropped: int = 0
+        self._pose: object = None
+        # Every run has its own stop event, so a new run never revives an
+        # old one that is still shutting down.
+        self._stop: threading.Event = threading.Event()
+        self._thread: threading.Thread | None = None
+        # Last run that got past waiting for its predecessor
+        self._owner: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        """True while the worker thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "Monitor":
+        """
+        Start monitoring unless it is already running, returns self.
+
+        Never blocks: a run restarted right after a stop waits on its own
+        thread for the old run to release the camera and the pose model.
+        """
+        if self.running and not self._stop.is_set():
+            return self
+        previous: tuple[threading.Thread, ...] = tuple(
+            thread
+            for thread in {self._thread, self._owner}
+            if thread is not None and thread.is_alive()
+        )
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(self._stop, previous),
+            name="sitfix-monitor",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        """
+        Ask the worker to stop.
+
+        Args:
+            timeout (float | None): Seconds to wait for it to finish, None
+                returns immediately so the GUI never blocks.
+        """
+        self._stop.set()
+        if timeout is not None and self._thread is not None:
+            self._thread.join(timeout)
+
+    def latest(self) -> MonitorFrame | None:
+        """
+        Drain the queue without blocking.
+
+        Returns:
+            MonitorFrame | None: Newest published frame, None when there is
+            none since the last call.
+        """
+        frame: MonitorFrame | None = None
+        try:
+            while True:
+                frame = self.frames.get_nowait()
+        except queue.Empty:
+            return frame
+
+    def _publish(
+        self, image: np.ndarray, status: tuple | None, stop: threading.Event
+    ) -> bool:
+        """`process_video` sink of the run stopped by `stop`, queues a copy."""
+        if stop.is_set():
+            return False
+        view: np.ndarray = cv2.cvtColor(
+            posture_controller.fit_to_size(image, self.view_size), cv2.COLOR_BGR2RGB
+        )
+        frame: MonitorFrame = MonitorFrame(view, status, time.perf_counter())
+        while True:
+            try:
+                self.frames.put_nowait(frame)
+                break
+            except queue.Full:
+                # Make room by discarding the oldest frame
+                try:
+                    self.frames.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        self.published += 1
+        return True
+
+    def _run(
+        self, stop: threading.Event, previous: tuple[threading.Thread, ...]
+    ) -> None:
+        deadline: float = time.monotonic() + STOP_TIMEOUT
+        for thread in previous:
+            thread.join(max(deadline - time.monotonic(), 0.0))
+            if thread.is_alive():
+                error(
+                    f"Monitoring did not restart, the previous run did not stop "
+                    f"within {STOP_TIMEOUT} s"
+                )
+                return
+        if stop.is_set():
+            return
+        self._owner = threading.current_thread()
+        capture: object = None
+        if self.warmup is not None:
+            capture, pose = self.warmup.take()
+            self._pose = self._pose or pose
+            self.warmup = None
+        if self._pose is None:
+            self._pose = posture_controller.initialize_pose_model()
+        if self._pose is None:
+            error("Monitoring could not start without a pose model")
+            return
+        dispatcher: AlertDispatcher | None = (
+            AlertDispatcher().start() if self.alerts else None
+        )
+        rollups: PostureRollups | None = (
+            PostureRollups(self.analytics) if self.analytics is not None else None
+        )
+        try:
+            posture_controller.process_video(
+                self._pose,
+                capture if capture is not None else self.source,
+                alerts=dispatcher,
+                user_id=self.user_id,
+                sink=functools.partial(self._publish, stop=stop),
+                stop=stop,
+                rollups=rollups,
+            )
+        except Exception as e:
+            error(f"Error in monitoring thread: {e}")
+        finally:
+            if dispatcher is not None:
+                dispatcher.stop()
+            if rollups is not None:
+                rollups.close()
@@ -0,0 +1,349 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Offline posture analysis of recorded video files.
+
+Runs the same pose detection and posture judging pipeline as the live
+controller, but headless and over video files or directories of clips.
+Files, or frame ranges of one long file, are spread across a process pool
+in which every worker owns one MediaPipe `Pose` instance.
+
+## Syntax
+```
+python -m controller.offline_analysis recordings/ --workers 4 --stride 5
+```
+Run from the project root with `src` on `PYTHONPATH`.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from dataclasses import dataclass
+from logging import error
+from typing import Iterable, Iterator
+
+import cv2
+import numpy as np
+
+from controller import posture_controller
+from model import posture_judger as judge
+
+__purpose__: str = "Headless batch analysis of recorded posture sessions."
+
+VIDEO_EXTENSIONS: tuple[str, ...] = (".avi", ".mkv", ".mov", ".mp4", ".webm")
+
+# Pose model owned by the current worker process.
+_worker_pose: object = None
+
+
+@dataclass(frozen=True)
+class AnalysisJob:
+    """
+    A contiguous frame range of one video file.
+
+    Attributes:
+        path (str): Path of the video file.
+        start_frame (int): First frame of the range.
+        end_frame (int): One past the last frame, or -1 for end of file.
+        stride (int): Analyse every `stride`-th frame of the file, skip
+            the rest. The grid starts at frame 0 of the file, not at
+            `start_frame`, so chunked and whole-file jobs analyse the same
+            frames.
+    """
+
+    path: str
+    start_frame: int = 0
+    end_frame: int = -1
+    stride: int = 1
+
+
+def collect_video_files(paths: Iterable[str]) -> list[str]:
+    """
+    Expand files and directories into a sorted list of video files.
+
+    Args:
+        paths (Iterable[str]): Video files and directories of clips.
+
+    Returns:
+        list[str]: Video files, directories searched recursively.
+
+    Time Complexity: O(F) - F is the number of files visited.
+    Space Complexity: O(F)
+    """
+    files: list[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                files.extend(
+                    os.path.join(directory, name)
+                    for name in names
+                    if name.lower().endswith(VIDEO_EXTENSIONS)
+                )
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def plan_jobs(
+    files: Iterable[str], stride: int = 1, chunk_frames: int = 0
+) -> list[AnalysisJob]:
+    """
+    Split video files into analysis jobs.
+
+    Args:
+        files (Iterable[str]): Video files to analyse.
+        stride (int): Analyse every `stride`-th frame.
+        chunk_frames (int): Split files longer than this many frames into
+            ranges of this length. 0 keeps every file in one job.
+
+    Returns:
+        list[AnalysisJob]: Jobs ready to be mapped over a process pool.
+
+    Time Complexity: O(J) - J is the number of jobs.
+    Space Complexity: O(J)
+    """
+    jobs: list[AnalysisJob] = []
+    for path in files:
+        frame_count: int = 0
+        if chunk_frames > 0:
+            capture: cv2.VideoCapture = cv2.VideoCapture(path)
+            frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            capture.release()
+        if frame_count <= chunk_frames:
+            jobs.append(AnalysisJob(path, stride=stride))
+            continue
+        for start in range(0, frame_count, chunk_frames):
+            end: int = min(start + chunk_frames, frame_count)
+            jobs.append(AnalysisJob(path, start, end, stride))
+    return jobs
+
+
+def _initialize_worker() -> None:
+    """Create the pose model of a pool worker, once per process."""
+    global _worker_pose
+    _worker_pose = posture_controller.initialize_pose_model()
+
+
+def analyse_job(job: AnalysisJob, pose: object = None) -> dict[str, object]:
+    """
+    Run pose detection and posture judging over one frame range.
+
+    The pose model is reset first, so every job starts cold and its result
+    does not depend on the jobs its worker ran before. Skipped frames are
+    only grabbed, never decoded. Landmarks of the
+    analysed frames are collected into one array and judged in a single
+    call to `isPosture_good_batch`.
+
+    Args:
+        job (AnalysisJob): Frame range to analyse.
+        pose (mp.solutions.pose.Pose): Pose model, defaults to the model of
+            the current worker process.
+
+    Returns:
+        dict[str, object]: `path`, `fps`, `frames` (frame indices),
+        `detected`, `is_good`, `metrics` and `elapsed` (seconds).
+
+    Time Complexity: O(F) - F is the number of frames in the range.
+    Space Complexity: O(F / stride)
+    """
+    pose = pose if pose is not None else _worker_pose
+    # Workers reuse their model across jobs, the tracking state of whichever
+    # job ran before must not leak into this one
+    pose.reset()
+    started: float = time.perf_counter()
+    capture: cv2.VideoCapture = posture_controller.capture_video(job.path)
+    fps: float = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    if job.start_frame:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, job.start_frame)
+
+    frames: list[int] = []
+    landmarks: list[np.ndarray] = []
+    missing: np.ndarray = np.full((judge.LANDMARK_COUNT, 4), np.nan, dtype=np.float32)
+    buffers: posture_controller.FrameBufferPool = posture_controller.FrameBufferPool(
+        depth=1
+    )
+    frame_index: int = job.start_frame
+    try:
+        while job.end_frame < 0 or frame_index < job.end_frame:
+            if not capture.grab():
+                break
+            # Stride grid of the whole file, the first analysed frame of a
+            # chunk is start_frame + (-start_frame) % stride
+            if frame_index % job.stride == 0:
+                success: bool
+                frame: cv2.typing.MatLike
+                success, frame = capture.retrieve()
+                if success:
+                    _, results = posture_controller.process_frame(
+                        frame, pose, display_size=None, buffers=buffers
+                    )
+                    frames.append(frame_index)
+                    if results is not None and results.pose_landmarks:
+                        landmarks.append(
+                            posture_controller.landmarks_to_array(
+                                results.pose_landmarks
+                            )
+                        )
+                    else:
+                        landmarks.append(missing)
+            frame_index += 1
+    finally:
+        capture.release()
+
+    stacked: np.ndarray = (
+        np.stack(landmarks)
+        if landmarks
+        else np.empty((0, judge.LANDMARK_COUNT, 4), dtype=np.float32)
+    )
+    is_good: np.ndarray
+    metrics: np.ndarray
+    is_good, metrics, _ = judge.isPosture_good_batch(stacked)
+    return {
+        "path": job.path,
+        "fps": fps,
+        "frames": np.asarray(frames, dtype=np.int64),
+        "detected": ~np.isnan(stacked[:, 0, 0]),
+        "is_good": is_good,
+        "metrics": metrics,
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def analyse_videos(
+    jobs: list[AnalysisJob], workers: int = 0
+) -> Iterator[dict[str, object]]:
+    """
+    Analyse jobs on a process pool, yielding results as they finish.
+
+    Args:
+        jobs (list[AnalysisJob]): Jobs created by `plan_jobs`.
+        workers (int): Number of worker processes, 0 for one per core.
+
+    Yields:
+        dict[str, object]: Result of `analyse_job` for every job.
+
+    Time Complexity: O(F / W) wall time - F frames over W workers.
+    Space Complexity: O(W) pose models.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Spawned workers behave the same on Windows and Linux and never
+    # inherit a half-initialised MediaPipe graph from the parent.
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(
+        processes=min(workers, max(1, len(jobs))),
+        initializer=_initialize_worker,
+    ) as pool:
+        yield from pool.imap_unordered(analyse_job, jobs)
+
+
+def frame_records(result: dict[str, object]) -> Iterator[dict[str, object]]:
+    """
+    Turn an analysis result into one JSON-serialisable record per frame.
+
+    Args:
+        result (dict[str, object]): Result of `analyse_job`.
+
+    Yields:
+        dict[str, object]: Frame index, timestamp, detection flag, verdict
+        and the three posture metrics of every analysed frame.
+    """
+    fps: float = result["fps"]
+    for frame, detected, good, metrics in zip(
+        result["frames"].tolist(),
+        result["detected"].tolist(),
+        result["is_good"].tolist(),
+        result["metrics"].tolist(),
+    ):
+        yield {
+            "source": result["path"],
+            "frame": frame,
+            "time": round(frame / fps, 3),
+            "detected": detected,
+            "good": good and detected,
+            "shoulder_distance": metrics[0] if detected else None,
+            "shoulder_tilt": metrics[1] if detected else None,
+            "shoulder_to_nose_distance": metrics[2] if detected else None,
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point of the offline analysis.
+
+    Args:
+        argv (list[str] | None): Arguments, defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="controller.offline_analysis",
+        description="Analyse recorded video files headless.",
+    )
+    parser.add_argument("paths", nargs="+", help="video files or directories")
+    parser.add_argument("--workers", type=int, default=0, help="0 = one per core")
+    parser.add_argument("--stride", type=int, default=1, help="analyse every Nth frame")
+    parser.add_argument(
+        "--chunk-frames",
+        type=int,
+        default=0,
+        help="split long files into frame ranges of this length",
+    )
+    parser.add_argument("--output", help="write per-frame JSONL records here")
+    args = parser.parse_args(argv)
+
+    files: list[str] = collect_video_files(args.paths)
+    if not files:
+        error("No video files found")
+        return 1
+    jobs: list[AnalysisJob] = plan_jobs(files, max(1, args.stride), args.chunk_frames)
+
+    started: float = time.perf_counter()
+    analysed: int = 0
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        for result in analyse_videos(jobs, args.workers):
+            frame_count: int = len(result["frames"])
+            analysed += frame_count
+            detected: int = int(result["detected"].sum())
+            good: int = int((result["is_good"] & result["detected"]).sum())
+            print(
+                f"{result['path']}: {frame_count} frames, {detected} detected, "
+                f"{good} good, "
+                f"{frame_count / max(result['elapsed'], 1e-9):.1f} fps"
+            )
+            if output is not None:
+                output.writelines(
+                    json.dumps(record) + "\n" for record in frame_records(result)
+                )
+    finally:
+        if output is not None:
+            output.close()
+    elapsed: float = time.perf_counter() - started
+    print(
+        f"Analysed {analysed} frames from {len(files)} files in {elapsed:.1f} s "
+        f"({analysed / max(elapsed, 1e-9):.1f} fps)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Cached text overlay of the visual output.
+
+The labels ("Stats", "Head:", "Shoulder:", "Body:") and the posture banner
+never change, yet `cv2.putText` rasterizes their Hershey strokes again on
+every frame. `OverlayRenderer` rasterizes them once per resolution and
+theme into the list of pixels they cover, and writes those pixels into
+each frame with a single NumPy scatter. The per-frame numbers are rendered once per
+distinct value and color and kept in a small LRU cache.
+
+The result is pixel identical to the `putText` drawing of
+`display_posture_status` and `draw_overlay`, provided the layers are drawn
+in the same order: `draw_status`, then the skeleton, then `draw_labels`.
+"""
+
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+__purpose__: str = "Draw the stats overlay without re-rasterizing text."
+
+GLYPH_CACHE_SIZE: int = 128
+
+
+@dataclass(frozen=True)
+class OverlayTheme:
+    """
+    Colors (BGR) and fonts of the overlay, hashable to key the caches.
+
+    Attributes:
+        label_color (tuple[int, int, int]): Static labels.
+        good_color (tuple[int, int, int]): "Good posture" banner and values
+            within their threshold.
+        poor_color (tuple[int, int, int]): "Poor Posture" banner and values
+            outside their threshold.
+        label_font (int): Font of the labels, values and good banner.
+        poor_font (int): Font of the poor banner.
+    """
+
+    label_color: tuple[int, int, int] = (255, 0, 0)
+    good_color: tuple[int, int, int] = (255, 0, 0)
+    poor_color: tuple[int, int, int] = (0, 0, 255)
+    label_font: int = cv2.FONT_HERSHEY_COMPLEX
+    poor_font: int = cv2.FONT_HERSHEY_SIMPLEX
+
+
+DEFAULT_THEME: OverlayTheme = OverlayTheme()
+
+
+@dataclass(frozen=True)
+class TextTile:
+    """
+    Rasterized text as the frame pixels it covers.
+
+    Attributes:
+        rows (np.ndarray): Frame row of every covered pixel.
+        columns (np.ndarray): Frame column of every covered pixel.
+        color (np.ndarray): BGR color of the text, uint8.
+    """
+
+    rows: np.ndarray
+    columns: np.ndarray
+    color: np.ndarray
+
+    def clipped(self, width: int, height: int) -> "TextTile":
+        """The tile without the pixels outside a `width` x `height` frame."""
+        inside: np.ndarray = (self.rows < height) & (self.columns < width)
+        inside &= (self.rows >= 0) & (self.columns >= 0)
+        if inside.all():
+            return self
+        return TextTile(self.rows[inside], self.columns[inside], self.color)
+
+
+def render_text(
+    text: str,
+    origin: tuple[int, int],
+    font: int,
+    scale: float,
+    color: tuple[int, int, int],
+    thickness: int,
+) -> TextTile:
+    """
+    Rasterize text exactly as `cv2.putText` would draw it at `origin`.
+
+    Args:
+        text (str): Text to draw.
+        origin (tuple[int, int]): Bottom-left corner (x, y) in the frame.
+        font (int): Hershey font.
+        scale (float): Font scale.
+        color (tuple[int, int, int]): BGR color.
+        thickness (int): Stroke thickness.
+
+    Returns:
+        TextTile: The pixels the text covers.
+
+    Purpose: Rasterize a label once instead of on every frame.
+    Time Complexity: O(w * h) of the text's bounding box.
+    Space Complexity: O(w * h)
+    """
+    (width, height), baseline = cv2.getTextSize(text, font, scale, thickness)
+    # Strokes reach up to `thickness` pixels beyond the reported box.
+    pad: int = thickness + 1
+    mask: np.ndarray = np.zeros(
+        (height + baseline + 2 * pad, width + 2 * pad), np.uint8
+    )
+    cv2.putText(mask, text, (pad, pad + height), font, scale, 255, thickness)
+    rows, columns = np.nonzero(mask)
+    return TextTile(
+        rows=(rows + origin[1] - height - pad).astype(np.intp),
+        columns=(columns + origin[0] - pad).astype(np.intp),
+        color=np.array(color, np.uint8),
+    )
+
+
+@dataclass(frozen=True)
+class OverlayLayer:
+    """
+    Several tiles merged into one scatter over the flattened frame.
+
+    Attributes:
+        indices (np.ndarray): Flat pixel index (row * width + column).
+        colors (np.ndarray): (n, 3) BGR color of every pixel.
+    """
+
+    indices: np.ndarray
+    colors: np.ndarray
+
+    @classmethod
+    def merge(cls, tiles: list[TextTile], width: int, height: int) -> "OverlayLayer":
+        """Clip `tiles` to the frame and merge them, later tiles on top."""
+        tiles = [tile.clipped(width, height) for tile in tiles]
+        indices: np.ndarray = np.concatenate(
+            [tile.rows * width + tile.columns for tile in tiles]
+        )
+        colors: np.ndarray = np.concatenate(
+            [np.broadcast_to(tile.color, (tile.rows.size, 3)) for tile in tiles]
+        )
+        return cls(indices, colors)
+
+    def draw(self, image: np.ndarray) -> None:
+        """Write the layer's pixels into `image` in one vectorized pass."""
+        if image.flags.c_contiguous:
+            image.reshape(-1, 3)[self.indices] = self.colors
+        else:
+            width: int = image.shape[1]
+            image[self.indices // width, self.indices % width] = self.colors
+
+
+class OverlayRenderer:
+    """
+    Draws the stats overlay from cached text tiles.
+
+    Static layers (labels plus the banner of each posture state) are cached
+    per (width, height, theme), clipped to the frame. Value layers are cached
+    per text, row and color in an LRU of `glyph_cache_size` entries; values are whole numbers that
+    change slowly, so nearly every frame is served from the cache.
+
+    Purpose: Avoid rasterizing the same Hershey text on every frame.
+    Time Complexity: O(T) per frame - T is the pixels covered by text.
+    Space Complexity: O(T * (R + G)) - R resolutions, G cached values.
+    """
+
+    def __init__(
+        self,
+        theme: OverlayTheme = DEFAULT_THEME,
+        glyph_cache_size: int = GLYPH_CACHE_SIZE,
+    ) -> None:
+        """
+        Args:
+            theme (OverlayTheme): Colors and fonts.
+            glyph_cache_size (int): Distinct value tiles kept.
+        """
+        self.theme: OverlayTheme = theme
+        self.glyph_cache_size: int = glyph_cache_size
+        self._layers: dict[
+            tuple[int, int, OverlayTheme], dict[bool | str, OverlayLayer]
+        ] = {}
+        self._glyphs: OrderedDict[tuple[object, ...], OverlayLayer] = OrderedDict()
+
+    def _static_layers(self, width: int, height: int) -> dict[bool | str, OverlayLayer]:
+        """
+        Labels and banners for one resolution, rendered on first use.
+
+        Keyed by `"labels"` and by the posture status of each banner.
+        """
+        key: tuple[int, int, OverlayTheme] = (width, height, self.theme)
+        layers: dict[bool | str, OverlayLayer] | None = self._layers.get(key)
+        if layers is None:
+            theme: OverlayTheme = self.theme
+            labels: list[TextTile] = [
+                render_text(
+                    "Stats", (1100, 50), theme.label_font, 2, theme.label_color, 2
+                ),
+            ] + [
+                render_text(text, (950, y), theme.label_font, 1, theme.label_color, 2)
+                for text, y in (("Head:", 130), ("Shoulder:", 180), ("Body:", 230))
+            ]
+            poor: TextTile = render_text(
+                "Poor Posture", (80, 80), theme.poor_font, 3, theme.poor_color, 2
+            )
+            good: TextTile = render_text(
+                "Good posture", (80, 80), theme.label_font, 3, theme.good_color, 2
+            )
+            layers = {
+                "labels": OverlayLayer.merge(labels, width, height),
+                False: OverlayLayer.merge([poor], width, height),
+                True: OverlayLayer.merge([good], width, height),
+            }
+            self._layers[key] = layers
+        return layers
+
+    def _value_layer(
+        self, text: str, row: int, is_good: bool, width: int, height: int
+    ) -> OverlayLayer:
+        """Layer of one value, from the LRU cache when seen before."""
+        key: tuple[object, ...] = (text, row, is_good, width, height, self.theme)
+        layer: OverlayLayer | None = self._glyphs.get(key)
+        if layer is not None:
+            self._glyphs.move_to_end(key)
+            return layer
+        tile: TextTile = render_text(
+            text,
+            (1200, 80 + 50 * row),
+            self.theme.label_font,
+            1,
+            self.theme.good_color if is_good else self.theme.poor_color,
+            2,
+        )
+        layer = OverlayLayer.merge([tile], width, height)
+        self._glyphs[key] = layer
+        if len(self._glyphs) > self.glyph_cache_size:
+            self._glyphs.popitem(last=False)
+        return layer
+
+    def draw_status(
+        self,
+        image: np.ndarray,
+        posture_status: bool | None = None,
+        *cases: tuple[float, bool],
+    ) -> None:
+        """
+        Draw the banner and values onto the image in place, as
+        `display_posture_status` does.
+
+        Args:
+            image (np.ndarray): BGR display image.
+            posture_status (bool | None): Banner to show, None for no
+                detected person (no banner).
+            *cases (tuple[float, bool]): Value and threshold verdict of
+                head, shoulder and body, as for `display_posture_status`.
+        """
+        height, width = image.shape[:2]
+        if posture_status is not None:
+            self._static_layers(width, height)[bool(posture_status)].draw(image)
+        for row, (value, is_good) in enumerate(cases, start=1):
+            self._value_layer(
+                str(math.floor(value)), row, bool(is_good), width, height
+            ).draw(image)
+
+    def draw_labels(self, image: np.ndarray) -> None:
+        """Draw the static labels onto the image in place."""
+        height, width = image.shape[:2]
+        self._static_layers(width, height)["labels"].draw(image)
+
+    def draw(
+        self,
+        image: np.ndarray,
+        posture_status: bool | None = None,
+        *cases: tuple[float, bool],
+    ) -> None:
+        """
+        Draw banner, values and labels onto the image in place.
+
+        Args:
+            image (np.ndarray): BGR display image.
+            posture_status (bool | None): Banner to show, None for no
+                detected person (labels only).
+            *cases (tuple[float, bool]): Value and threshold verdict of
+                head, shoulder and body, as for `display_posture_status`.
+        """
+        self.draw_status(image, posture_status, *cases)
+        self.draw_labels(image)
@@ -65,22 +65,99 @@ __metadata__: tuple[str | tuple, ...] = (
 )
 
 # Importing dependencies
+import itertools
 import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
 import cv2
 import mediapipe as mp
+import numpy as np
 from typing import Final
-from logging import basicConfig, error, ERROR
-import judge
-import winsound
+from logging import basicConfig, error, warning, ERROR
+from model import posture_judger as judge
+from model.analytics import PostureRollups
+from model.session_recorder import SessionRecorder
+from controller.alerts import AlertDispatcher, BEEP, NOTIFICATION
+from controller.instrumentation import (
+    CAPTURE,
+    DISPLAY,
+    INFERENCE,
+    JUDGING,
+    NULL_METRICS,
+    PREPROCESSING,
+    RENDERING,
+    MetricsOverlay,
+    PipelineMetrics,
+)
+from controller.overlay import OverlayRenderer
 
 # Configure logging to show only errors
 basicConfig(level=ERROR)
 
+# Seconds of continuous poor posture before a desktop notification.
+NOTIFY_AFTER: Final[float] = 10.0
+
+# Frame sizes as (width, height). Alterable.
+DISPLAY_SIZE: Final[tuple[int, int]] = (1280, 960)
+INFERENCE_SIZE: Final[tuple[int, int]] = (640, 480)
+
 
-def initialize_pose_model() -> mp.solutions.pose.Pose | None:
+@dataclass(frozen=True)
+class PoseProfile:
+    """
+    Settings of the MediaPipe pose model.
+
+    Attributes:
+        model_complexity (int): 0 (lite), 1 (full) or 2 (heavy); heavier
+            models are more accurate and slower.
+        min_detection_confidence (float): Person detection threshold.
+        min_tracking_confidence (float): Below this the landmarks of the
+            previous frame are not trusted and the person is re-detected,
+            the expensive path.
+        smooth_landmarks (bool): Filter landmarks across frames to reduce
+            jitter.
+        enable_segmentation (bool): Also compute a segmentation mask, which
+            nothing here uses.
+    """
+
+    model_complexity: int = 1
+    min_detection_confidence: float = 0.5
+    min_tracking_confidence: float = 0.5
+    smooth_landmarks: bool = True
+    enable_segmentation: bool = False
+
+    def create(self) -> mp.solutions.pose.Pose:
+        """Create a pose model with these settings."""
+        return mp.solutions.pose.Pose(
+            model_complexity=self.model_complexity,
+            min_detection_confidence=self.min_detection_confidence,
+            min_tracking_confidence=self.min_tracking_confidence,
+            smooth_landmarks=self.smooth_landmarks,
+            enable_segmentation=self.enable_segmentation,
+        )
+
+
+DEFAULT_POSE_PROFILE: Final[PoseProfile] = PoseProfile()
+# Candidates of the auto-tuner, most accurate first
+POSE_PROFILES: Final[tuple[PoseProfile, ...]] = (
+    PoseProfile(model_complexity=2),
+    PoseProfile(model_complexity=1),
+    PoseProfile(model_complexity=0),
+)
+
+
+def initialize_pose_model(
+    profile: PoseProfile = DEFAULT_POSE_PROFILE,
+) -> mp.solutions.pose.Pose | None:
     """
     Initialize and configure the MediaPipe pose model.
 
+    Args:
+        profile (PoseProfile): Model settings.
+
     Returns:
         mp.solutions.pose.Pose: Initialized pose model.
 
@@ -91,52 +168,563 @@ def initialize_pose_model() -> mp.solutions.pose.Pose | None:
     Space Complexity: O(1)
     """
     try:
-        # Define the MediaPipe pose model
-        MEDIAPIPE_POSE_MODEL: Final[mp.solutions.pose] = mp.solutions.pose
-        # Initialize the pose model with confidence thresholds
-        pose: Final[mp.solutions.pose.Pose] = MEDIAPIPE_POSE_MODEL.Pose(
-            min_detection_confidence=0.9, min_tracking_confidence=0.9
-        )
+        # Initialize the pose model with the profile's settings
+        pose: Final[mp.solutions.pose.Pose] = profile.create()
         return pose
     except Exception as e:
         error(f"Error initializing pose model: {e}")
         return None
 
 
-def capture_video(camera_index: int) -> cv2.VideoCapture | None:
+def autotune_pose_model(
+    frames: list[cv2.typing.MatLike],
+    target_fps: float,
+    candidates: tuple[PoseProfile, ...] = POSE_PROFILES,
+    inference_size: tuple[int, int] = INFERENCE_SIZE,
+    warmup: int = 3,
+) -> tuple[PoseProfile, mp.solutions.pose.Pose | None, list[dict[str, object]]]:
     """
-    Capture video from the camera.
+    Pick the most accurate pose model that keeps up with `target_fps`.
+
+    Candidates are tried in order on the same consecutive frames of the
+    real source, so tracking and re-detection happen as they would live.
+    The first candidate whose 90th percentile frame latency fits into one
+    frame interval wins; when none does, the fastest one is used.
+    Candidates whose model cannot be loaded (heavier models are downloaded
+    on first use) are skipped.
 
     Args:
-        camera_index (int): Index of the camera to capture video from.
+        frames (list[cv2.typing.MatLike]): Warm-up frames, in capture order.
+        target_fps (float): Frame rate inference has to sustain.
+        candidates (tuple[PoseProfile, ...]): Profiles, most accurate first.
+        inference_size (tuple[int, int]): Resolution inference runs at.
+        warmup (int): Leading frames left out of the latency statistics.
+
+    Returns:
+        tuple[PoseProfile, mp.solutions.pose.Pose | None, list[dict]]:
+        Chosen profile, its already warmed-up model and one report entry
+        per measured candidate.
+
+    Purpose: Fit the model to the machine instead of hard-coding it.
+    Time Complexity: O(C * F) - C candidates over F frames.
+    Space Complexity: O(F)
+    """
+    budget: float = 1.0 / target_fps
+    report: list[dict[str, object]] = []
+    fastest: tuple[float, PoseProfile, mp.solutions.pose.Pose] | None = None
+    buffers: FrameBufferPool = FrameBufferPool(depth=1)
+    for profile in candidates:
+        try:
+            pose: mp.solutions.pose.Pose = profile.create()
+        except Exception as e:
+            warning(f"Skipping pose model {profile}: {e}")
+            continue
+        latencies: list[float] = []
+        for frame in frames:
+            started: float = time.perf_counter()
+            process_frame(
+                frame,
+                pose,
+                display_size=None,
+                inference_size=inference_size,
+                buffers=buffers,
+            )
+            latencies.append(time.perf_counter() - started)
+        measured: np.ndarray = np.asarray(latencies[warmup:] or latencies)
+        p90: float = float(np.percentile(measured, 90))
+        report.append(
+            {
+                "model_complexity": profile.model_complexity,
+                "p50_ms": float(np.median(measured)) * 1e3,
+                "p90_ms": p90 * 1e3,
+                "meets_target": p90 <= budget,
+            }
+        )
+        if p90 <= budget:
+            if fastest is not None:
+                fastest[2].close()
+            return profile, pose, report
+        if fastest is None or p90 < fastest[0]:
+            if fastest is not None:
+                fastest[2].close()
+            fastest = (p90, profile, pose)
+        else:
+            pose.close()
+    if fastest is None:
+        return DEFAULT_POSE_PROFILE, initialize_pose_model(), report
+    warning(
+        f"No pose model reaches {target_fps:g} fps, using complexity "
+        f"{fastest[1].model_complexity} at {1 / fastest[0]:.1f} fps"
+    )
+    return fastest[1], fastest[2], report
+
+
+def capture_video(source: int | str) -> cv2.VideoCapture | None:
+    """
+    Capture video from a camera or a recorded video file.
+
+    Args:
+        source (int | str): Index of the camera to capture video from, or
+            the path of a video file to read.
 
     Returns:
         cv2.VideoCapture: Video capture object.
 
     Author: Aviraj Saha
     Date: September 28, 2023
-    Purpose: Initialize video capture from the specified camera.
+    Purpose: Initialize video capture from the specified camera or file.
     Time Complexity: O(1)
     Space Complexity: O(1)
     """
     try:
-        # Create a video capture object for the specified camera
-        CAPTURE: Final[cv2.VideoCapture] = cv2.VideoCapture(camera_index, cv2.CAP_DSHOW)
+        if isinstance(source, str):
+            # Recorded clips are decoded by whichever backend supports them
+            CAPTURE: Final[cv2.VideoCapture] = cv2.VideoCapture(source)
+        else:
+            # Create a video capture object for the specified camera
+            CAPTURE: Final[cv2.VideoCapture] = cv2.VideoCapture(source, cv2.CAP_DSHOW)
         return CAPTURE
     except Exception as e:
         error(f"Error capturing video: {e}")
         return None
 
 
+# Skeleton of `draw_skeleton`, as a (C, 2) array of landmark indices.
+POSE_CONNECTIONS: Final[np.ndarray] = np.array(
+    sorted(mp.solutions.pose.POSE_CONNECTIONS), dtype=np.intp
+)
+
+
+def landmarks_to_array(
+    pose_landmarks: object, out: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Convert MediaPipe pose landmarks into a NumPy array in a single pass.
+
+    Only the public message attributes are read, so the conversion does not
+    depend on the protobuf version. It runs once per pose result and every
+    consumer shares the array.
+
+    Args:
+        pose_landmarks (object): `results.pose_landmarks` of a pose result.
+        out (np.ndarray | None): (33, 4) float32 array to fill, a new one
+            is allocated when omitted.
+
+    Returns:
+        np.ndarray: Array of shape (33, 4) holding x, y, z and visibility
+        of every landmark.
+
+    Purpose: Convert each pose result once, shared by every consumer.
+    Time Complexity: O(1) - The landmark count is fixed.
+    Space Complexity: O(1)
+    """
+    values: np.ndarray = np.fromiter(
+        itertools.chain.from_iterable(
+            (landmark.x, landmark.y, landmark.z, landmark.visibility)
+            for landmark in pose_landmarks.landmark
+        ),
+        dtype=np.float32,
+        count=judge.LANDMARK_COUNT * 4,
+    )
+    if out is None:
+        return values.reshape(judge.LANDMARK_COUNT, 4)
+    out.reshape(-1)[:] = values
+    return out
+
+
+class FrameGrabber:
+    """
+    Capture stage that reads frames on a background thread.
+
+    The newest frames are kept in a small ring buffer. Readers always get
+    the most recent frame; every frame that is overwritten or skipped
+    before it is read is counted as dropped. With `drop_stale` disabled,
+    as suits recorded files, the capture thread waits for free space
+    instead and frames are read in order.
+
+    Purpose: Decouple camera I/O latency from inference latency.
+    Time Complexity: O(1) per frame.
+    Space Complexity: O(buffer_size) frames.
+    """
+
+    def __init__(
+        self,
+        capture: cv2.VideoCapture,
+        buffer_size: int = 2,
+        drop_stale: bool = True,
+    ) -> None:
+        """
+        Args:
+            capture (cv2.VideoCapture): Opened video capture object.
+            buffer_size (int): Number of frames held in the ring buffer.
+            drop_stale (bool): Keep only the newest frames. When False no
+                frame is dropped and frames are read oldest first.
+        """
+        self._capture: cv2.VideoCapture = capture
+        self._drop_stale: bool = drop_stale
+        self._buffer: deque = deque(maxlen=max(1, buffer_size))
+        self._condition: threading.Condition = threading.Condition()
+        self._stop_event: threading.Event = threading.Event()
+        self._ended: bool = False
+        self._thread: threading.Thread = threading.Thread(
+            target=self._run, name="sitfix-capture", daemon=True
+        )
+        self.frames_captured: int = 0
+        self.frames_dropped: int = 0
+
+    def start(self) -> "FrameGrabber":
+        """Start the capture thread and return self."""
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        """Capture loop, runs on the background thread."""
+        try:
+            while not self._stop_event.is_set() and self._capture.isOpened():
+                success: bool
+                frame: cv2.typing.MatLike
+                success, frame = self._capture.read()
+                if not success:
+                    break
+                with self._condition:
+                    if not self._drop_stale:
+                        self._condition.wait_for(
+                            lambda: len(self._buffer) < self._buffer.maxlen
+                            or self._stop_event.is_set()
+                        )
+                        if self._stop_event.is_set():
+                            break
+                    # A full ring buffer overwrites its oldest frame.
+                    if len(self._buffer) == self._buffer.maxlen:
+                        self.frames_dropped += 1
+                    self._buffer.append(frame)
+                    self.frames_captured += 1
+                    self._condition.notify()
+        except Exception as e:
+            error(f"Error in capture thread: {e}")
+        finally:
+            with self._condition:
+                self._ended = True
+                self._condition.notify_all()
+
+    @property
+    def running(self) -> bool:
+        """True while frames may still arrive or are waiting to be read."""
+        with self._condition:
+            return not self._ended or bool(self._buffer)
+
+    def read(self, timeout: float = 1.0) -> cv2.typing.MatLike | None:
+        """
+        Return the newest captured frame.
+
+        Args:
+            timeout (float): Seconds to wait for a frame to arrive.
+
+        Returns:
+            cv2.typing.MatLike | None: Newest frame, or None if no frame
+            arrived within `timeout` or the capture has ended.
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._buffer or self._ended, timeout
+            ):
+                return None
+            if not self._buffer:
+                return None
+            if not self._drop_stale:
+                self._condition.notify_all()
+                return self._buffer.popleft()
+            frame: cv2.typing.MatLike = self._buffer.pop()
+            # Older frames are stale once a newer one has been read.
+            self.frames_dropped += len(self._buffer)
+            self._buffer.clear()
+            return frame
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Stop the capture thread and wait for it to exit."""
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def stats(self) -> dict[str, int]:
+        """Return the captured and dropped frame counters."""
+        with self._condition:
+            return {
+                "frames_captured": self.frames_captured,
+                "frames_dropped": self.frames_dropped,
+            }
+
+
+class PersonROI:
+    """
+    Upper-body region of interest taken from the previous detection.
+
+    Posture is judged from the head and shoulders only, so after a person
+    has been found the next inference can run on a crop around them. The
+    crop stays put while the upper body remains inside its inner area,
+    which keeps MediaPipe's own tracking stable, and falls back to the full
+    frame whenever detection is lost.
+
+    Purpose: Cut per-frame inference cost by inferring on a small crop.
+    Time Complexity: O(1) per frame.
+    Space Complexity: O(1)
+    """
+
+    # Nose, eyes, ears, mouth and shoulders.
+    UPPER_BODY: slice = slice(0, 13)
+
+    def __init__(
+        self, margin: float = 0.5, min_size: float = 0.3, visibility: float = 0.5
+    ) -> None:
+        """
+        Args:
+            margin (float): Margin added on every side of the upper-body box,
+                as a fraction of the box size.
+            min_size (float): Smallest crop side as a fraction of the frame.
+            visibility (float): Landmarks below this visibility are ignored.
+        """
+        self.margin: float = margin
+        self.min_size: float = min_size
+        self.visibility: float = visibility
+        # (x0, y0, x1, y1) in frame pixels, None means the full frame.
+        self.box: tuple[int, int, int, int] | None = None
+
+    def crop(self, frame: cv2.typing.MatLike) -> cv2.typing.MatLike:
+        """Return a view of `frame` limited to the current box."""
+        if self.box is None:
+            return frame
+        x0, y0, x1, y1 = self.box
+        return frame[y0:y1, x0:x1]
+
+    def to_frame(self, pose_landmarks: object, frame_shape: tuple[int, ...]) -> None:
+        """Map landmarks detected on the crop back to full-frame coordinates."""
+        if self.box is None:
+            return
+        height, width = frame_shape[:2]
+        x0, y0, x1, y1 = self.box
+        scale_x: float = (x1 - x0) / width
+        scale_y: float = (y1 - y0) / height
+        offset_x: float = x0 / width
+        offset_y: float = y0 / height
+        for landmark in pose_landmarks.landmark:
+            landmark.x = offset_x + landmark.x * scale_x
+            landmark.y = offset_y + landmark.y * scale_y
+            landmark.z *= scale_x
+
+    def update(
+        self, landmarks: np.ndarray | None, frame_shape: tuple[int, ...]
+    ) -> None:
+        """
+        Move the box to the upper body of a full-frame detection.
+
+        Args:
+            landmarks (np.ndarray | None): (33, 4) landmarks of
+                `landmarks_to_array` in full-frame coordinates, or None when
+                nobody was detected.
+            frame_shape (tuple[int, ...]): Shape of the full frame.
+        """
+        if landmarks is None:
+            self.box = None
+            return
+        height, width = frame_shape[:2]
+        upper_body: np.ndarray = landmarks[self.UPPER_BODY]
+        points: np.ndarray = upper_body[upper_body[:, 3] >= self.visibility]
+        if len(points) < 3:
+            self.box = None
+            return
+        left: float = float(points[:, 0].min()) * width
+        right: float = float(points[:, 0].max()) * width
+        top: float = float(points[:, 1].min()) * height
+        bottom: float = float(points[:, 1].max()) * height
+        if self.box is not None:
+            # Keep the box while the upper body stays in its inner area.
+            x0, y0, x1, y1 = self.box
+            inset_x: float = (x1 - x0) * self.margin / (1 + 2 * self.margin)
+            inset_y: float = (y1 - y0) * self.margin / (1 + 2 * self.margin)
+            if (
+                left >= x0 + inset_x / 2
+                and right <= x1 - inset_x / 2
+                and top >= y0 + inset_y / 2
+                and bottom <= y1 - inset_y / 2
+            ):
+                return
+        box_width: float = max(
+            (right - left) * (1 + 2 * self.margin), width * self.min_size
+        )
+        box_height: float = max(
+            (bottom - top) * (1 + 2 * self.margin), height * self.min_size
+        )
+        center_x: float = (left + right) / 2
+        center_y: float = (top + bottom) / 2
+        self.box = (
+            max(0, int(center_x - box_width / 2)),
+            max(0, int(center_y - box_height / 2)),
+            min(width, int(center_x + box_width / 2)),
+            min(height, int(center_y + box_height / 2)),
+        )
+
+
+class FrameBufferPool:
+    """
+    Preallocated image buffers reused from frame to frame.
+
+    Every named buffer rotates through `depth` arrays, so an image handed
+    out for one frame stays intact while the next `depth - 1` frames are
+    prepared. Each array only grows, and smaller requests such as ROI crops
+    get a contiguous view of it, so allocations stop after the first few
+    frames.
+
+    Purpose: Remove per-frame allocations from frame preprocessing.
+    Time Complexity: O(1) per request.
+    Space Complexity: O(depth) images per buffer name.
+    """
+
+    def __init__(self, depth: int = 2) -> None:
+        """
+        Args:
+            depth (int): Number of arrays each named buffer rotates through.
+        """
+        self.depth: int = max(1, depth)
+        self._slots: dict[str, list[np.ndarray | None]] = {}
+        self._next: dict[str, int] = {}
+        self.allocations: int = 0
+
+    def take(self, name: str, shape: tuple[int, ...]) -> np.ndarray:
+        """
+        Return the next writable uint8 buffer of `shape` for `name`.
+
+        Args:
+            name (str): Buffer name, for example "display".
+            shape (tuple[int, ...]): Required array shape.
+
+        Returns:
+            np.ndarray: A buffer whose contents are about to be overwritten.
+        """
+        slots: list[np.ndarray | None] = self._slots.setdefault(
+            name, [None] * self.depth
+        )
+        index: int = self._next.get(name, 0)
+        self._next[name] = (index + 1) % self.depth
+        size: int = math.prod(shape)
+        storage: np.ndarray | None = slots[index]
+        if storage is None or storage.size < size:
+            storage = np.empty(size, dtype=np.uint8)
+            slots[index] = storage
+            self.allocations += 1
+        buffer: np.ndarray = storage[:size].reshape(shape)
+        # Buffers handed to the pose model were marked read-only.
+        buffer.flags.writeable = True
+        return buffer
+
+
+def fit_to_size(
+    image: cv2.typing.MatLike,
+    size: tuple[int, int],
+    buffers: FrameBufferPool | None = None,
+) -> cv2.typing.MatLike:
+    """
+    Downscale an image to fit inside `size`, keeping its aspect ratio.
+
+    Args:
+        image (object): Image to scale.
+        size (tuple[int, int]): Largest allowed (width, height).
+        buffers (FrameBufferPool | None): Pool providing the output buffer,
+            None allocates a new image.
+
+    Returns:
+        object: The scaled image, or `image` itself when it already fits.
+
+    Purpose: Bring frames and crops to the inference resolution.
+    Time Complexity: O(W * H) of the output image.
+    Space Complexity: O(W * H) of the output image, O(1) with `buffers`.
+    """
+    height, width = image.shape[:2]
+    scale: float = min(size[0] / width, size[1] / height)
+    if scale >= 1:
+        # Never upscale, it costs inference time and adds no detail.
+        return image
+    target: tuple[int, int] = (
+        max(1, round(width * scale)),
+        max(1, round(height * scale)),
+    )
+    return cv2.resize(
+        image,
+        target,
+        dst=(
+            buffers.take("inference_bgr", (target[1], target[0], 3))
+            if buffers is not None
+            else None
+        ),
+        interpolation=cv2.INTER_AREA,
+    )
+
+
+def resize_for_display(
+    frame: cv2.typing.MatLike,
+    display_size: tuple[int, int] = DISPLAY_SIZE,
+    buffers: FrameBufferPool | None = None,
+) -> cv2.typing.MatLike:
+    """
+    Resize a BGR frame to the display size.
+
+    Args:
+        frame (object): Video frame to resize.
+        display_size (tuple[int, int]): (width, height) of the result.
+        buffers (FrameBufferPool | None): Pool providing the output buffer,
+            None allocates a new image.
+
+    Returns:
+        object: The resized BGR image.
+
+    Purpose: Prepare the image overlays are drawn on.
+    Time Complexity: O(W * H) of the display size.
+    Space Complexity: O(W * H), O(1) with `buffers`.
+    """
+    return cv2.resize(
+        frame,
+        display_size,
+        dst=(
+            buffers.take("display", (display_size[1], display_size[0], 3))
+            if buffers is not None
+            else None
+        ),
+    )
+
+
 def process_frame(
-    frame: cv2.typing.MatLike, pose: mp.solutions.pose.Pose
+    frame: cv2.typing.MatLike,
+    pose: mp.solutions.pose.Pose,
+    display_size: tuple[int, int] | None = DISPLAY_SIZE,
+    inference_size: tuple[int, int] = INFERENCE_SIZE,
+    roi: PersonROI | None = None,
+    buffers: FrameBufferPool | None = None,
+    metrics: PipelineMetrics | None = None,
 ) -> tuple[cv2.typing.MatLike, object] | tuple[None, None]:
     """
     Process a video frame, detect and visualize human poses.
 
+    Inference runs at `inference_size`, independent of the display size.
+    With `roi` given, inference runs on a crop around the upper body of the
+    previous detection and the landmarks are mapped back to the full frame.
+    The caller then moves the ROI with `roi.update`, passing the landmark
+    array it converts the result into anyway.
+    With `buffers` given, the display image and the RGB inference input are
+    written into preallocated buffers instead of new arrays.
+
     Args:
         frame (object): Video frame to process.
         pose (mp.solutions.pose.Pose): Initialized pose model.
+        display_size (tuple[int, int] | None): (width, height) of the
+            returned image, None skips creating one for headless use.
+        inference_size (tuple[int, int]): Largest (width, height) the frame
+            or crop is given to the pose model at.
+        roi (PersonROI | None): Region of interest tracker, None infers on
+            the full frame.
+        buffers (FrameBufferPool | None): Buffer pool reused across frames.
+        metrics (PipelineMetrics | None): Receives the preprocessing and
+            inference latencies.
 
     Returns:
         Tuple[object, object]: Processed image and pose detection results.
@@ -147,22 +735,35 @@ def process_frame(
     Time Complexity: Depends on the image size and pose detection model.
     Space Complexity: Depends on the image size and pose detection model.
     """
+    spans: PipelineMetrics = metrics or NULL_METRICS
     try:
-        final_width: int = 1280  # Alterable
-        final_height: int = 960  # Alterable
+        with spans.span(PREPROCESSING):
+            # Resize the frame for display, it stays in BGR for drawing
+            image: cv2.typing.MatLike | None = None
+            if display_size is not None:
+                image = resize_for_display(frame, display_size, buffers)
 
-        # Resize the frame to a specific width and height
-        frame: cv2.typing.MatLike = cv2.resize(frame, (final_width, final_height))
-        # Convert frame colors from BGR to RGB
-        image: cv2.typing.MatLike = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image.flags.writeable = False
+            # Convert the (cropped) inference input from BGR to RGB
+            fitted: cv2.typing.MatLike = fit_to_size(
+                roi.crop(frame) if roi else frame, inference_size, buffers
+            )
+            inference: cv2.typing.MatLike = cv2.cvtColor(
+                fitted,
+                cv2.COLOR_BGR2RGB,
+                dst=(
+                    buffers.take("inference_rgb", fitted.shape)
+                    if buffers is not None
+                    else None
+                ),
+            )
+            inference.flags.writeable = False
 
         # Process the frame using the pose model
-        results: object = pose.process(image)
+        with spans.span(INFERENCE):
+            results: object = pose.process(inference)
 
-        # Convert image colors back from RGB to BGR
-        image.flags.writeable = True
-        image: cv2.typing.MatLike = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        if roi is not None and results.pose_landmarks:
+            roi.to_frame(results.pose_landmarks, frame.shape)
 
         return image, results
     except Exception as e:
@@ -170,6 +771,204 @@ def process_frame(
         return None, None
 
 
+class InferenceScheduler:
+    """
+    Decide per frame whether pose inference has to run again.
+
+    A person sitting at a desk barely moves between frames, so inference
+    is only rerun when a cheap frame-difference check on a tiny grayscale
+    thumbnail sees motion, or when the last result is getting old. Reruns
+    are further rate limited so that inference stays within a target rate
+    or a share of one CPU core. Between runs the last landmarks are reused,
+    or linearly extrapolated from the last two runs.
+
+    Purpose: Keep pose inference within a CPU budget on thin clients.
+    Time Complexity: O(1) per frame, the thumbnail has a fixed size.
+    Space Complexity: O(1)
+    """
+
+    def __init__(
+        self,
+        motion_threshold: float = 4.0,
+        max_rate: float | None = None,
+        cpu_budget: float | None = None,
+        max_interval: float = 2.0,
+        extrapolate: bool = False,
+        probe_size: tuple[int, int] = (32, 24),
+    ) -> None:
+        """
+        Args:
+            motion_threshold (float): Mean absolute difference of thumbnail
+                gray levels (0-255) that counts as motion.
+            max_rate (float | None): Most inferences per second.
+            cpu_budget (float | None): Share of one core inference may use,
+                for example 0.15.
+            max_interval (float): Seconds after which inference is rerun
+                even without motion.
+            extrapolate (bool): Extrapolate landmarks between runs instead of
+                reusing the last ones.
+            probe_size (tuple[int, int]): (width, height) of the thumbnail.
+        """
+        self.motion_threshold: float = motion_threshold
+        self.max_rate: float | None = max_rate
+        self.cpu_budget: float | None = cpu_budget
+        self.max_interval: float = max_interval
+        self.extrapolate: bool = extrapolate
+        self._probe_size: tuple[int, int] = probe_size
+        self._thumbnail: np.ndarray = np.empty(
+            (probe_size[1], probe_size[0], 3), dtype=np.uint8
+        )
+        self._probe: np.ndarray = np.empty(
+            (probe_size[1], probe_size[0]), dtype=np.uint8
+        )
+        self._reference: np.ndarray = np.empty_like(self._probe)
+        self._difference: np.ndarray = np.empty_like(self._probe)
+        self._last_inference: float | None = None
+        self._inference_time: float = 0.0  # Moving average, seconds
+        self._history: deque = deque(maxlen=2)  # (time, landmarks) pairs
+        self._started: float = time.perf_counter()
+        self.frames: int = 0
+        self.inferences: int = 0
+        self.inference_seconds: float = 0.0
+
+    def should_infer(self, frame: cv2.typing.MatLike, now: float) -> bool:
+        """
+        Args:
+            frame (object): Current BGR frame.
+            now (float): `time.perf_counter()` of the frame.
+
+        Returns:
+            bool: True when pose inference should run on this frame.
+        """
+        self.frames += 1
+        cv2.resize(
+            frame, self._probe_size, dst=self._thumbnail, interpolation=cv2.INTER_AREA
+        )
+        cv2.cvtColor(self._thumbnail, cv2.COLOR_BGR2GRAY, dst=self._probe)
+        if self._last_inference is None:
+            return True
+        elapsed: float = now - self._last_inference
+        if elapsed >= self.max_interval:
+            return True
+        if elapsed < self.min_interval():
+            return False
+        cv2.absdiff(self._probe, self._reference, dst=self._difference)
+        return cv2.mean(self._difference)[0] > self.motion_threshold
+
+    def min_interval(self) -> float:
+        """Shortest allowed time in seconds between two inferences."""
+        interval: float = 0.0
+        if self.max_rate:
+            interval = 1.0 / self.max_rate
+        if self.cpu_budget:
+            interval = max(interval, self._inference_time / self.cpu_budget)
+        return interval
+
+    def record_inference(
+        self, now: float, duration: float, landmarks: np.ndarray | None = None
+    ) -> None:
+        """
+        Register an inference run on the frame last passed to `should_infer`.
+
+        Args:
+            now (float): `time.perf_counter()` of the frame.
+            duration (float): Seconds the inference took.
+            landmarks (np.ndarray | None): (33, 4) landmarks found, None when
+                nobody was detected.
+        """
+        self.inferences += 1
+        self.inference_seconds += duration
+        self._inference_time = (
+            duration
+            if self.inferences == 1
+            else 0.8 * self._inference_time + 0.2 * duration
+        )
+        self._last_inference = now
+        self._probe, self._reference = self._reference, self._probe
+        if landmarks is None:
+            self._history.clear()
+        else:
+            self._history.append((now, landmarks.copy()))
+
+    def predict(self, now: float) -> np.ndarray | None:
+        """
+        Landmarks for a frame without inference.
+
+        Args:
+            now (float): `time.perf_counter()` of the frame.
+
+        Returns:
+            np.ndarray | None: (33, 4) landmarks, extrapolated when enabled
+            and two runs are known, otherwise the last ones. None when
+            nobody was detected in the last run.
+        """
+        if not self._history:
+            return None
+        last_time, last = self._history[-1]
+        if not self.extrapolate or len(self._history) < 2:
+            return last
+        first_time, first = self._history[0]
+        span: float = last_time - first_time
+        if span <= 0:
+            return last
+        # Never extrapolate further ahead than the two runs were apart.
+        step: float = min(now - last_time, span) / span
+        predicted: np.ndarray = last + (last - first) * step
+        predicted[:, 3] = last[:, 3]  # Visibility is not extrapolated
+        return predicted
+
+    def stats(self) -> dict[str, float]:
+        """Return frame and inference counters, the ratio and CPU share."""
+        elapsed: float = max(time.perf_counter() - self._started, 1e-9)
+        return {
+            "frames": self.frames,
+            "inferences": self.inferences,
+            "inference_ratio": self.inferences / max(self.frames, 1),
+            "inference_cpu_share": self.inference_seconds / elapsed,
+        }
+
+
+def draw_skeleton(
+    image: cv2.typing.MatLike, landmarks: np.ndarray, visibility: float = 0.5
+) -> None:
+    """
+    Draw the pose skeleton from a landmark array.
+
+    Pixel identical to `mp.solutions.drawing_utils.draw_landmarks` with the
+    pose connections and default styles, but the pixel coordinates and the
+    visible connections are computed with NumPy and all connections are
+    drawn with a single `cv2.polylines` call.
+
+    Args:
+        image (cv2.typing.MatLike): BGR image, drawn on in place.
+        landmarks (np.ndarray): (33, 4) landmarks in normalized coordinates.
+        visibility (float): Landmarks below this visibility are skipped.
+
+    Purpose: Draw from the shared landmark array, not the protobuf.
+    Time Complexity: O(P) - P is the number of pixels drawn.
+    Space Complexity: O(1)
+    """
+    height, width = image.shape[:2]
+    # Same rounding as MediaPipe, which works on Python floats
+    x: np.ndarray = landmarks[:, 0].astype(np.float64)
+    y: np.ndarray = landmarks[:, 1].astype(np.float64)
+    shown: np.ndarray = (
+        (landmarks[:, 3] >= visibility) & (x >= 0) & (x <= 1) & (y >= 0) & (y <= 1)
+    )
+    points: np.ndarray = np.empty((len(landmarks), 2), dtype=np.int32)
+    np.minimum(np.floor(x * width), width - 1, out=points[:, 0], casting="unsafe")
+    np.minimum(np.floor(y * height), height - 1, out=points[:, 1], casting="unsafe")
+    lines: np.ndarray = POSE_CONNECTIONS[
+        shown[POSE_CONNECTIONS[:, 0]] & shown[POSE_CONNECTIONS[:, 1]]
+    ]
+    if len(lines):
+        cv2.polylines(image, list(points[lines]), False, (224, 224, 224), 2)
+    # Points go on top of the lines, white border first
+    for point in points[shown].tolist():
+        cv2.circle(image, point, 3, (224, 224, 224), 2)
+        cv2.circle(image, point, 2, (0, 0, 255), 2)
+
+
 def display_posture_status(
     image: cv2.typing.MatLike, posture_status: bool, *cases: list[tuple[float, bool]]
 ) -> None:
@@ -191,7 +990,6 @@ def display_posture_status(
     try:
         # Display posture status as text on the image
         if not posture_status:
-            winsound.Beep(800, 10)
             cv2.putText(
                 image,
                 "Poor Posture",
@@ -232,13 +1030,133 @@ def display_posture_status(
         error(f"Error displaying posture status: {e}")
 
 
-def process_video(pose: mp.solutions.pose.Pose, camera_index: int) -> None:
+def draw_overlay(
+    image: cv2.typing.MatLike,
+    landmarks: np.ndarray | object,
+    status: tuple | None = None,
+    renderer: OverlayRenderer | None = None,
+) -> None:
+    """
+    Draw the pose skeleton, the posture status and the stats labels.
+
+    Args:
+        image (cv2.typing.MatLike): BGR display image, drawn on in place.
+        landmarks (np.ndarray | object): (33, 4) landmark array, or
+            MediaPipe pose landmarks, None draws only the labels.
+        status (tuple | None): Arguments of `display_posture_status`
+            after the image, None when no person was judged.
+        renderer (OverlayRenderer | None): Draws the text from cached
+            layers, None rasterizes it with `cv2.putText`.
+
+    Purpose: Keep the per-frame drawing in one place for the benchmarks.
+    Time Complexity: O(P) - P is the number of pixels drawn.
+    Space Complexity: O(1)
+    """
+    if landmarks is not None and not isinstance(landmarks, np.ndarray):
+        landmarks = landmarks_to_array(landmarks)
+
+    if renderer is not None:
+        # Same order as below, so the skeleton covers the same text pixels
+        if status is not None:
+            renderer.draw_status(image, *status)
+        if landmarks is not None:
+            draw_skeleton(image, landmarks)
+        renderer.draw_labels(image)
+        return
+
+    if status is not None:
+        display_posture_status(image, *status)
+
+    # Draw landmarks on the frame
+    if landmarks is not None:
+        draw_skeleton(image, landmarks)
+
+    cv2.putText(
+        image,
+        "Stats",
+        (1100, 50),
+        cv2.FONT_HERSHEY_COMPLEX,
+        2,
+        (255, 0, 0),
+        2,
+    )
+
+    cv2.putText(
+        image,
+        "Head:",
+        (950, 130),
+        cv2.FONT_HERSHEY_COMPLEX,
+        1,
+        (255, 0, 0),
+        2,
+    )
+
+    cv2.putText(
+        image,
+        "Shoulder:",
+        (950, 180),
+        cv2.FONT_HERSHEY_COMPLEX,
+        1,
+        (255, 0, 0),
+        2,
+    )
+
+    cv2.putText(
+        image,
+        "Body:",
+        (950, 230),
+        cv2.FONT_HERSHEY_COMPLEX,
+        1,
+        (255, 0, 0),
+        2,
+    )
+
+
+def process_video(
+    pose: mp.solutions.pose.Pose,
+    camera_index: int | str | cv2.VideoCapture,
+    inference_size: tuple[int, int] = INFERENCE_SIZE,
+    use_roi: bool = False,
+    scheduler: InferenceScheduler | None = None,
+    alerts: AlertDispatcher | None = None,
+    recorder: SessionRecorder | None = None,
+    user_id: str = judge.DEFAULT_USER,
+    metrics: PipelineMetrics | None = None,
+    metrics_overlay: bool = False,
+    sink: Callable[[cv2.typing.MatLike, tuple | None], bool] | None = None,
+    stop: threading.Event | None = None,
+    rollups: PostureRollups | None = None,
+) -> None:
     """
     Process video frames, detect posture, and visualize it.
 
     Args:
         pose (mp.solutions.pose.Pose): Initialized pose model.
-        camera_index (int): Index of the camera to capture video from.
+        camera_index (int | str | cv2.VideoCapture): Index of the camera to
+            capture video from, the path of a video file, or an already
+            open capture, which is released at the end as well.
+        inference_size (tuple[int, int]): Resolution the pose model runs at.
+        use_roi (bool): Infer on a crop around the previously detected
+            upper body instead of the full frame.
+        scheduler (InferenceScheduler | None): Skips inference on static
+            frames, None runs inference on every frame.
+        alerts (AlertDispatcher | None): Receives a beep for every frame
+            with poor posture and a notification once it lasts
+            `NOTIFY_AFTER` seconds.
+        recorder (SessionRecorder | None): Records landmarks, metrics and
+            verdicts of every judged frame.
+        user_id (str): User whose calibrated thresholds judge the posture,
+            picked up again whenever the user is recalibrated.
+        metrics (PipelineMetrics | None): Receives per-stage latencies and
+            the frame rate, None disables the instrumentation.
+        metrics_overlay (bool): Draw FPS and stage latencies onto the
+            frame, needs `metrics`.
+        sink (Callable | None): Receives every annotated BGR frame and its
+            status tuple instead of the OpenCV window, returns False to
+            stop. The frame buffer is reused, sinks keep a copy.
+        stop (threading.Event | None): Stops the loop once set.
+        rollups (PostureRollups | None): Counts every judged frame into the
+            per-minute and per-hour statistics.
 
     Author: Aviraj Saha
     Date: September 30, 2023
@@ -248,126 +1166,170 @@ def process_video(pose: mp.solutions.pose.Pose, camera_index: int) -> None:
     """
     try:
         # Create a video capture object
-        CAPTURE: Final[cv2.VideoCapture] = capture_video(camera_index)
+        capture: Final[cv2.VideoCapture] = (
+            camera_index
+            if isinstance(camera_index, cv2.VideoCapture)
+            else capture_video(camera_index)
+        )
+        # Read frames on a background thread so inference gets fresh frames
+        grabber: Final[FrameGrabber] = FrameGrabber(capture).start()
+        roi: Final[PersonROI | None] = PersonROI() if use_roi else None
+        buffers: Final[FrameBufferPool] = FrameBufferPool()
+        last_results: object = None
+        poor_since: float | None = None
+        renderer: Final[OverlayRenderer] = OverlayRenderer()
+        spans: PipelineMetrics = metrics or NULL_METRICS
+        overlay: MetricsOverlay | None = (
+            MetricsOverlay(metrics) if metrics is not None and metrics_overlay else None
+        )
 
-        while CAPTURE.isOpened():
+        while grabber.running and not (stop is not None and stop.is_set()):
             try:
-                _: bool
-                frame: cv2.typing.MatLike
-                _, frame = CAPTURE.read()
+                with spans.span(CAPTURE):
+                    frame: cv2.typing.MatLike | None = grabber.read()
+                if frame is None:
+                    continue
 
                 # Process the video frame and get results
+                status: tuple | None = None
                 image: cv2.typing.MatLike
                 results: object
-                image, results = process_frame(frame, pose)
-                if results:
-                    if results.pose_landmarks:
-                        left_shoulder: object = results.pose_landmarks.landmark[
-                            mp.solutions.pose.PoseLandmark.LEFT_SHOULDER
-                        ]
-                        right_shoulder: object = results.pose_landmarks.landmark[
-                            mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER
-                        ]
-                        right_hip: object = results.pose_landmarks.landmark[
-                            mp.solutions.pose.PoseLandmark.RIGHT_HIP
-                        ]
-                        left_hip: object = results.pose_landmarks.landmark[
-                            mp.solutions.pose.PoseLandmark.LEFT_HIP
-                        ]
-                        nose: object = results.pose_landmarks.landmark[
-                            mp.solutions.pose.PoseLandmark.NOSE
-                        ]
-                        posture_status: bool
+                # Converted once per frame, shared by the scheduler, judge,
+                # recorder, statistics and drawing
+                landmarks: np.ndarray | None
+                now: float = time.perf_counter()
+                if scheduler is None or scheduler.should_infer(frame, now):
+                    image, results = process_frame(
+                        frame,
+                        pose,
+                        inference_size=inference_size,
+                        roi=roi,
+                        buffers=buffers,
+                        metrics=metrics,
+                    )
+                    landmarks = (
+                        landmarks_to_array(results.pose_landmarks)
+                        if results and results.pose_landmarks
+                        else None
+                    )
+                    if roi is not None:
+                        roi.update(landmarks, frame.shape)
+                    if scheduler is not None:
+                        scheduler.record_inference(
+                            now, time.perf_counter() - now, landmarks
+                        )
+                        last_results = results
+                else:
+                    # Reuse, or extrapolate into, the last landmarks
+                    with spans.span(PREPROCESSING):
+                        image = resize_for_display(frame, buffers=buffers)
+                    results = last_results
+                    landmarks = scheduler.predict(now)
+                if landmarks is not None:
+                    posture_status: bool
+                    with spans.span(JUDGING):
                         (
                             posture_status,
                             shoulder_distance,
                             shoulder_tilt,
                             shoulder_to_nose_distance,
-                        ) = judge.isPosture_good(
-                            left_shoulder=(left_shoulder.x, left_shoulder.y),
-                            right_shoulder=(
-                                right_shoulder.x,
-                                right_shoulder.y,
+                        ) = judge.isPosture_good_landmarks(
+                            landmarks, profile=judge.profiles.get(user_id)
+                        )
+                    if recorder is not None:
+                        recorder.append(
+                            time.time(),
+                            landmarks,
+                            (
+                                shoulder_distance[0],
+                                shoulder_tilt[0],
+                                shoulder_to_nose_distance[0],
+                            ),
+                            (
+                                True,
+                                posture_status,
+                                shoulder_distance[1],
+                                shoulder_tilt[1],
+                                shoulder_to_nose_distance[1],
                             ),
-                            nose=(nose.x, nose.y),
                         )
-                        # Display the posture status on the image
-
-                        # shoulder_distance = str(float(shoulder_distance) * 100)
-                        # shoulder_tilt = str(180 - float(shoulder_tilt))
-                        # shoulder_to_nose_distance = str(
-                        #     float(shoulder_to_nose_distance) * 100
-                        # )
-                        shoulder_distance[0] *= 100
-                        shoulder_to_nose_distance[0] *= 100
-                        shoulder_tilt[0] = 180 - shoulder_tilt[0]
-                        display_posture_status(
-                            image,
+                    if rollups is not None:
+                        rollups.add(
+                            time.time(),
                             posture_status,
-                            shoulder_distance,
-                            shoulder_tilt,
-                            shoulder_to_nose_distance,
+                            (
+                                shoulder_distance[0],
+                                shoulder_tilt[0],
+                                shoulder_to_nose_distance[0],
+                            ),
                         )
+                    if alerts is not None:
+                        if posture_status:
+                            poor_since = None
+                        else:
+                            # Queued only, delivery happens off this thread
+                            alerts.post(BEEP)
+                            poor_since = poor_since or now
+                            if now - poor_since >= NOTIFY_AFTER:
+                                alerts.post(
+                                    NOTIFICATION,
+                                    "Wrong Posture Alert!",
+                                    "You are sitting with hunched shoulders.",
+                                )
+                    # Display the posture status on the image
 
-                else:
+                    # shoulder_distance = str(float(shoulder_distance) * 100)
+                    # shoulder_tilt = str(180 - float(shoulder_tilt))
+                    # shoulder_to_nose_distance = str(
+                    #     float(shoulder_to_nose_distance) * 100
+                    # )
+                    shoulder_distance[0] *= 100
+                    shoulder_to_nose_distance[0] *= 100
+                    shoulder_tilt[0] = 180 - shoulder_tilt[0]
+                    status = (
+                        posture_status,
+                        shoulder_distance,
+                        shoulder_tilt,
+                        shoulder_to_nose_distance,
+                    )
+                elif not results:
                     error("No human figure detected")
+                elif recorder is not None:
+                    recorder.append(time.time(), None, None, (False,) * 5)
 
-                # Draw landmarks on the frame
-                mp.solutions.drawing_utils.draw_landmarks(
-                    image, results.pose_landmarks, mp.solutions.pose.POSE_CONNECTIONS
-                )
-
-                cv2.putText(
-                    image,
-                    "Stats",
-                    (1100, 50),
-                    cv2.FONT_HERSHEY_COMPLEX,
-                    2,
-                    (255, 0, 0),
-                    2,
-                )
-
-                cv2.putText(
-                    image,
-                    "Head:",
-                    (950, 130),
-                    cv2.FONT_HERSHEY_COMPLEX,
-                    1,
-                    (255, 0, 0),
-                    2,
-                )
-
-                cv2.putText(
-                    image,
-                    "Shoulder:",
-                    (950, 180),
-                    cv2.FONT_HERSHEY_COMPLEX,
-                    1,
-                    (255, 0, 0),
-                    2,
-                )
-
-                cv2.putText(
-                    image,
-                    "Body:",
-                    (950, 230),
-                    cv2.FONT_HERSHEY_COMPLEX,
-                    1,
-                    (255, 0, 0),
-                    2,
-                )
+                with spans.span(RENDERING):
+                    draw_overlay(image, landmarks, status, renderer)
+                    if overlay is not None:
+                        overlay.draw(image)
 
                 # Show the final frame
-                cv2.imshow("sitfix-ai Visual Output", image)
-
-                if cv2.waitKey(10) & 0xFF == ord("q"):
+                with spans.span(DISPLAY):
+                    if sink is not None:
+                        running: bool = sink(image, status)
+                    else:
+                        cv2.imshow("sitfix-ai Visual Output", image)
+                        running = cv2.waitKey(1) & 0xFF != ord("q")
+                spans.frame()
+                if not running:
                     break
 
             except Exception as e:
                 error(f"Error in video processing loop: {e}")
 
-        CAPTURE.release()
-        cv2.destroyAllWindows()
+        grabber.stop()
+        capture.release()
+        if sink is None:
+            cv2.destroyAllWindows()
+        stats: dict[str, int] = grabber.stats()
+        warning(
+            f"Capture stage dropped {stats['frames_dropped']} of "
+            f"{stats['frames_captured']} frames"
+        )
+        if scheduler is not None:
+            warning(
+                f"Inference ran on {scheduler.stats()['inference_ratio']:.1%} "
+                f"of frames"
+            )
 
     except Exception as e:
         error(f"Error in process_video function: {e}")
@@ -392,8 +1354,13 @@ def main() -> None:
         # Initialize the pose model
         pose: mp.solutions.pose.Pose = initialize_pose_model()
         if pose is not None:
-            # Process video frames for posture detection
-            process_video(pose, camera_index=0)
+            # Alerts are delivered on their own thread
+            alerts: AlertDispatcher = AlertDispatcher().start()
+            try:
+                # Process video frames for posture detection
+                process_video(pose, camera_index=0, alerts=alerts)
+            finally:
+                alerts.stop()
     except Exception as e:
         error(f"Error in main function: {e}")
 
@@ -0,0 +1,460 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+# Multi-stream posture server
+
+Monitors many workstations from one machine. Sources (camera indices,
+video files, network stream URLs, or `replay:<file>` as a local stand-in
+for a network camera) are partitioned across a pool of worker processes.
+Every worker opens its streams, warms one MediaPipe `Pose` model per
+stream (pose tracking is stateful, so streams never share a model) and
+cycles through its streams, judging the landmarks of each round in one
+`isPosture_good_batch` call. Records of all workers are merged into one
+JSONL stream; per-stream FPS is reported on stderr.
+
+Workers run one OpenCV thread each, so throughput grows with the number of
+cores until there is one worker per stream.
+
+## Syntax
+```
+python -m controller serve 0 1 replay:desk3.avi rtsp://cam4/stream --workers 4
+```
+Run from the project root with `src` on `PYTHONPATH`.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from dataclasses import dataclass
+from logging import error, warning
+from typing import IO
+
+import cv2
+import numpy as np
+
+from controller import posture_controller
+from model import posture_judger as judge
+
+__purpose__: str = "Monitor posture on many streams from one machine."
+
+REPLAY_PREFIX: str = "replay:"
+DEFAULT_REPORT_INTERVAL: float = 5.0
+# Pause of a worker whose streams have no new frame, in seconds.
+IDLE_WAIT: float = 0.002
+
+# Messages from the workers to the merging parent
+READY: str = "ready"
+RECORDS: str = "records"
+ENDED: str = "ended"
+
+
+@dataclass(frozen=True)
+class StreamSpec:
+    """
+    A source monitored by the server.
+
+    Attributes:
+        stream_id (int): Position of the source on the command line.
+        source (int | str): Camera index, file path, stream URL or
+            `replay:<file>`.
+    """
+
+    stream_id: int
+    source: int | str
+
+
+class ReplayCapture:
+    """
+    Plays a video file in a loop at its own frame rate.
+
+    Stands in for a network camera on a test machine: frames arrive in real
+    time whether or not anybody reads them, and the stream never ends. Has
+    the subset of the `cv2.VideoCapture` interface `FrameGrabber` uses.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): Video file to replay.
+        """
+        self._capture: cv2.VideoCapture = cv2.VideoCapture(path)
+        self._interval: float = 1.0 / (self._capture.get(cv2.CAP_PROP_FPS) or 30.0)
+        self._next_frame: float = time.monotonic()
+
+    def isOpened(self) -> bool:
+        return self._capture.isOpened()
+
+    def get(self, property_id: int) -> float:
+        return self._capture.get(property_id)
+
+    def read(self) -> tuple[bool, cv2.typing.MatLike | None]:
+        """Return the next frame once it is due, rewinding at the end."""
+        delay: float = self._next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_frame = max(self._next_frame + self._interval, time.monotonic())
+        success, frame = self._capture.read()
+        if not success:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self._capture.read()
+        return success, frame
+
+    def release(self) -> None:
+        self._capture.release()
+
+
+def parse_source(text: str) -> int | str:
+    """Camera indices become ints, everything else stays a string."""
+    return int(text) if text.isdigit() else text
+
+
+def open_source(source: int | str) -> object:
+    """
+    Open a source for a `FrameGrabber`.
+
+    Args:
+        source (int | str): Camera index, file path, URL or `replay:<file>`.
+
+    Returns:
+        object: Opened capture, or None on failure.
+    """
+    if isinstance(source, str) and source.startswith(REPLAY_PREFIX):
+        return ReplayCapture(source[len(REPLAY_PREFIX) :])
+    return posture_controller.capture_video(source)
+
+
+def is_live(source: int | str) -> bool:
+    """Live sources drop stale frames, files are read frame by frame."""
+    return not isinstance(source, str) or not os.path.isfile(source)
+
+
+def _warm_up(pose: object) -> None:
+    """Run the model once so the first real frame is not slowed down."""
+    blank: np.ndarray = np.zeros(
+        (posture_controller.INFERENCE_SIZE[1], posture_controller.INFERENCE_SIZE[0], 3),
+        np.uint8,
+    )
+    pose.process(blank)
+
+
+def serve_streams(
+    worker_id: int,
+    specs: list[StreamSpec],
+    messages: multiprocessing.Queue,
+    stop: multiprocessing.Event,
+    max_frames: int = 0,
+) -> None:
+    """
+    Worker process: judge the frames of `specs` until they end or `stop`.
+
+    Args:
+        worker_id (int): Index of the worker.
+        specs (list[StreamSpec]): Streams assigned to this worker.
+        messages (multiprocessing.Queue): Receives `READY`, `RECORDS` and
+            `ENDED` messages for the parent.
+        stop (multiprocessing.Event): Set by the parent to shut down.
+        max_frames (int): Stop a stream after this many frames, 0 for no
+            limit.
+
+    Purpose: One pool worker of the multi-stream server.
+    Time Complexity: O(F) - F frames of the assigned streams.
+    Space Complexity: O(S) pose models and grabbers.
+    """
+    # One core per worker, the pool provides the parallelism.
+    cv2.setNumThreads(1)
+    started: float = time.perf_counter()
+    streams: dict[int, dict[str, object]] = {}
+    for spec in specs:
+        capture: object = open_source(spec.source)
+        if capture is None or not capture.isOpened():
+            error(f"Could not open stream {spec.stream_id}: {spec.source}")
+            messages.put((ENDED, spec.stream_id))
+            continue
+        pose: object = posture_controller.initialize_pose_model()
+        if pose is None:
+            error(f"Could not load the pose model for stream {spec.stream_id}")
+            capture.release()
+            messages.put((ENDED, spec.stream_id))
+            continue
+        _warm_up(pose)
+        streams[spec.stream_id] = {
+            "spec": spec,
+            "capture": capture,
+            "pose": pose,
+            "grabber": posture_controller.FrameGrabber(
+                capture, drop_stale=is_live(spec.source)
+            ).start(),
+            "buffers": posture_controller.FrameBufferPool(depth=1),
+            "frames": 0,
+        }
+    messages.put((READY, worker_id, time.perf_counter() - started))
+
+    missing: np.ndarray = np.full((judge.LANDMARK_COUNT, 4), np.nan, np.float32)
+    try:
+        while streams and not stop.is_set():
+            judged: list[int] = []
+            landmarks: list[np.ndarray] = []
+            for stream_id, stream in list(streams.items()):
+                grabber: posture_controller.FrameGrabber = stream["grabber"]
+                frame: cv2.typing.MatLike | None = grabber.read(timeout=0.0)
+                if frame is None:
+                    if not grabber.running:
+                        _close_stream(streams.pop(stream_id))
+                        messages.put((ENDED, stream_id))
+                    continue
+                _, results = posture_controller.process_frame(
+                    frame,
+                    stream["pose"],
+                    display_size=None,
+                    buffers=stream["buffers"],
+                )
+                judged.append(stream_id)
+                landmarks.append(
+                    posture_controller.landmarks_to_array(results.pose_landmarks)
+                    if results is not None and results.pose_landmarks
+                    else missing
+                )
+            if not judged:
+                time.sleep(IDLE_WAIT)
+                continue
+
+            # One vectorized judgement per round of streams
+            stacked: np.ndarray = np.stack(landmarks)
+            is_good, metrics, _ = judge.isPosture_good_batch(stacked)
+            detected: np.ndarray = ~np.isnan(stacked[:, 0, 0])
+            timestamp: float = round(time.time(), 3)
+            records: list[dict[str, object]] = []
+            for row, stream_id in enumerate(judged):
+                stream = streams[stream_id]
+                record: dict[str, object] = {
+                    "stream": stream_id,
+                    "time": timestamp,
+                    "frame": stream["frames"],
+                    "detected": bool(detected[row]),
+                    "good": bool(is_good[row]),
+                }
+                if detected[row]:
+                    (
+                        record["shoulder_distance"],
+                        record["shoulder_tilt"],
+                        record["shoulder_to_nose_distance"],
+                    ) = metrics[row].tolist()
+                records.append(record)
+                stream["frames"] += 1
+            messages.put((RECORDS, records))
+            # Announced after their last records, which the parent needs first
+            for stream_id in judged:
+                if max_frames and streams[stream_id]["frames"] >= max_frames:
+                    _close_stream(streams.pop(stream_id))
+                    messages.put((ENDED, stream_id))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for stream_id, stream in streams.items():
+            _close_stream(stream)
+            messages.put((ENDED, stream_id))
+
+
+def _close_stream(stream: dict[str, object]) -> None:
+    """Stop the grabber and release the capture and model of a stream."""
+    stream["grabber"].stop()
+    stream["capture"].release()
+    stream["pose"].close()
+
+
+def serve(
+    specs: list[StreamSpec],
+    output: IO[str],
+    workers: int = 0,
+    max_frames: int = 0,
+    report_interval: float = DEFAULT_REPORT_INTERVAL,
+) -> dict[int, dict[str, float]]:
+    """
+    Run the worker pool and merge its records into `output`.
+
+    Args:
+        specs (list[StreamSpec]): Streams to monitor.
+        output (IO[str]): Text stream receiving one JSON record per frame.
+        workers (int): Worker processes, 0 for one per core (at most one
+            per stream).
+        max_frames (int): Frames judged per stream, 0 until the sources end
+            or the server is interrupted.
+        report_interval (float): Seconds between two FPS reports on stderr.
+
+    Returns:
+        dict[int, dict[str, float]]: Frames and average FPS by stream ID.
+
+    Purpose: Monitor many workstations from one machine.
+    Time Complexity: O(F / W) wall time - F frames over W workers.
+    Space Complexity: O(S) - S streams.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(specs))
+    # Spawned workers never inherit a half-initialised MediaPipe graph.
+    context = multiprocessing.get_context("spawn")
+    messages: multiprocessing.Queue = context.Queue()
+    stop: multiprocessing.Event = context.Event()
+    processes: list[multiprocessing.Process] = [
+        context.Process(
+            target=serve_streams,
+            args=(worker_id, specs[worker_id::workers], messages, stop, max_frames),
+            name=f"sitfix-worker-{worker_id}",
+            daemon=True,
+        )
+        for worker_id in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    started: float = time.perf_counter()
+    frames: dict[int, int] = {spec.stream_id: 0 for spec in specs}
+    reported: dict[int, int] = dict(frames)
+    open_streams: set[int] = set(frames)
+    next_report: float = started + report_interval
+    last_report: float = started
+    try:
+        while open_streams:
+            try:
+                message: tuple = messages.get(timeout=0.5)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    warning("All workers exited before their streams ended")
+                    break
+                message = ()
+            if message and message[0] == RECORDS:
+                output.writelines(json.dumps(record) + "\n" for record in message[1])
+                output.flush()
+                for record in message[1]:
+                    frames[record["stream"]] += 1
+            elif message and message[0] == ENDED:
+                open_streams.discard(message[1])
+            elif message and message[0] == READY:
+                sys.stderr.write(
+                    json.dumps(
+                        {"event": READY, "worker": message[1], "seconds": message[2]}
+                    )
+                    + "\n"
+                )
+
+            now: float = time.perf_counter()
+            if now >= next_report:
+                elapsed: float = now - last_report
+                sys.stderr.write(
+                    json.dumps(
+                        {
+                            "event": "fps",
+                            "streams": {
+                                stream_id: round(
+                                    (count - reported[stream_id]) / elapsed, 2
+                                )
+                                for stream_id, count in frames.items()
+                            },
+                            "total": round(
+                                (sum(frames.values()) - sum(reported.values()))
+                                / elapsed,
+                                2,
+                            ),
+                        }
+                    )
+                    + "\n"
+                )
+                reported = dict(frames)
+                last_report = now
+                next_report = now + report_interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        # Drain so workers blocked on a full pipe can exit.
+        deadline: float = time.perf_counter() + 5.0
+        while any(p.is_alive() for p in processes) and time.perf_counter() < deadline:
+            try:
+                messages.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for process in processes:
+            process.join(0.1)
+            if process.is_alive():
+                process.terminate()
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    return {
+        stream_id: {"frames": count, "fps": count / elapsed}
+        for stream_id, count in frames.items()
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point of the server.
+
+    Args:
+        argv (list[str] | None): Arguments, defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="controller serve",
+        description="Monitor posture on many video streams at once.",
+    )
+    parser.add_argument(
+        "sources",
+        nargs="+",
+        help="camera indices, video files, stream URLs or replay:<file>",
+    )
+    parser.add_argument("--workers", type=int, default=0, help="0 = one per core")
+    parser.add_argument("--output", default="-", help="JSONL file, - for stdout")
+    parser.add_argument(
+        "--max-frames", type=int, default=0, help="stop each stream after N frames"
+    )
+    parser.add_argument(
+        "--report-interval",
+        type=float,
+        default=DEFAULT_REPORT_INTERVAL,
+        help="seconds between per-stream FPS reports",
+    )
+    args = parser.parse_args(argv)
+
+    specs: list[StreamSpec] = [
+        StreamSpec(stream_id, parse_source(source))
+        for stream_id, source in enumerate(args.sources)
+    ]
+    output: IO[str] = (
+        sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    )
+    try:
+        summary: dict[int, dict[str, float]] = serve(
+            specs, output, args.workers, args.max_frames, args.report_interval
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    for stream_id, stats in summary.items():
+        sys.stderr.write(
+            f"stream {stream_id} ({specs[stream_id].source}): "
+            f"{stats['frames']} frames, {stats['fps']:.1f} fps\n"
+        )
+    return 0 if any(stats["frames"] for stats in summary.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,474 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Replay of recorded sessions and parallel search of the posture margins.
+
+The judge's margins (`HEAD_MARGIN`, `TILT_MARGIN` and `NOSE_MARGIN` in
+`model.posture_judger`) are tuned offline against labelled segments of
+recorded sessions instead of in front of the camera.
+
+Every labelled session is replayed once: its landmarks are memory-mapped
+segment by segment and turned into posture metrics by
+`posture_metrics_batch`, far faster than real time. Since every threshold
+is a calibrated value moved by a margin, each frame reduces to three
+deviations from its user's biometrics, and a configuration of margins
+passes a frame when
+
+    |shoulder distance - head| < head_margin
+    shoulder tilt - shoulder >= -tilt_margin
+    shoulder to nose distance - body > -nose_margin
+
+The deviations of all frames are saved once, labelled good frames first,
+and memory-mapped by the workers of a process pool. Each task scores a
+chunk of configurations block by block, so a block of frames stays in
+cache while all configurations of the chunk are compared against it.
+
+## Labels
+```
+{
+    "sessions": [
+        {
+            "path": "user_data/sessions/20261018-091500-250",
+            "user": "alice",
+            "segments": [
+                {"start": 0, "end": 120, "label": "good"},
+                {"start": 120, "end": 185.5, "label": "bad"}
+            ]
+        }
+    ]
+}
+```
+Paths are relative to the labels file, segment times are seconds from the
+first recorded frame. The user's calibrated biometrics are used, or a
+`biometrics` object given in place of the user.
+
+## Syntax
+```
+python -m controller tune labels.json --grid 12 --workers 4
+python -m controller tune labels.json --random 5000 --output search.jsonl
+```
+Run from the project root with `src` on `PYTHONPATH`.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from logging import error
+from typing import Iterator
+
+import numpy as np
+
+from model import posture_judger as judge
+from model.session_recorder import FLAG_COLUMNS, SessionReader
+
+__purpose__: str = "Tune the posture margins on labelled recordings."
+
+# Searched margins and their default ranges.
+SEARCH_SPACE: dict[str, tuple[float, float]] = {
+    "head_margin": (0.02, 0.20),
+    "tilt_margin": (0.0, 8.0),
+    "nose_margin": (0.1, 0.9),
+}
+OBJECTIVES: tuple[str, ...] = ("balanced_accuracy", "accuracy", "bad_f1")
+# Frames compared against all configurations of a task at a time.
+BLOCK_FRAMES: int = 1 << 16
+# Configurations scored by one pool task.
+CHUNK_CONFIGS: int = 64
+DEVIATIONS_FILE: str = "deviations.npy"
+
+_DETECTED: int = FLAG_COLUMNS.index("detected")
+
+# Deviations memory-mapped by the current worker process, by directory.
+_worker_deviations: dict[str, np.ndarray] = {}
+
+
+@dataclass(frozen=True)
+class LabelledSession:
+    """
+    A recorded session with its labelled time ranges.
+
+    Attributes:
+        path (str): Session directory written by `SessionRecorder`.
+        biometrics (tuple[float, float, float]): Calibrated `head`,
+            `shoulder` and `body` values of the user.
+        segments (tuple[tuple[float, float, bool], ...]): Start and end in
+            seconds from the first frame, and whether the posture is good.
+    """
+
+    path: str
+    biometrics: tuple[float, float, float]
+    segments: tuple[tuple[float, float, bool], ...]
+
+
+def load_labels(path: str) -> list[LabelledSession]:
+    """
+    Read a labels file.
+
+    Args:
+        path (str): JSON labels file, see the module documentation.
+
+    Returns:
+        list[LabelledSession]: The labelled sessions.
+
+    Raises:
+        ValueError: A segment label is neither "good" nor "bad".
+    """
+    with open(path, encoding="utf-8") as labels_file:
+        labels: dict[str, object] = json.load(labels_file)
+    root: str = os.path.dirname(os.path.abspath(path))
+    sessions: list[LabelledSession] = []
+    for entry in labels.get("sessions", []):
+        biometrics: dict[str, object] = entry.get("biometrics") or (
+            judge.load_biometrics(judge.profile_path(entry.get("user")))
+            or judge.UNCALIBRATED_BIOMETRICS
+        )
+        segments: list[tuple[float, float, bool]] = []
+        for segment in entry.get("segments", []):
+            if segment["label"] not in ("good", "bad"):
+                raise ValueError(f"Unknown label {segment['label']!r} in {path}")
+            segments.append(
+                (
+                    float(segment["start"]),
+                    float(segment["end"]),
+                    segment["label"] == "good",
+                )
+            )
+        sessions.append(
+            LabelledSession(
+                os.path.join(root, entry["path"]),
+                tuple(float(biometrics[k]) for k in ("head", "shoulder", "body")),
+                tuple(segments),
+            )
+        )
+    return sessions
+
+
+def replay_session(session: LabelledSession) -> dict[str, object]:
+    """
+    Replay the labelled frames of a session through the posture metrics.
+
+    Args:
+        session (LabelledSession): Session to replay.
+
+    Returns:
+        dict[str, object]: `path`, `deviations` (3, N) float32 deviations
+        of the detected frames from the biometrics, their `labels` (N,)
+        bool, the labelled `duration` and the `elapsed` replay time in
+        seconds.
+
+    Time Complexity: O(N) - N labelled frames.
+    Space Complexity: O(N)
+    """
+    started: float = time.perf_counter()
+    reader: SessionReader = SessionReader(session.path)
+    segments: np.ndarray = np.array(session.segments, dtype=np.float64).reshape(-1, 3)
+    first: float = float(reader.index[:, 1].min()) if len(reader.index) else 0.0
+    # One memory-mapped read covering every segment, which are then
+    # located by binary search however many there are
+    rows: dict[str, np.ndarray] = reader.query(
+        first + segments[:, 0].min(initial=np.inf),
+        first + segments[:, 1].max(initial=-np.inf),
+    )
+    bounds: np.ndarray = np.searchsorted(
+        rows["timestamps"], first + segments[:, :2], side="left"
+    )
+    selected: np.ndarray = np.concatenate(
+        [np.empty(0, np.intp)] + [np.arange(low, high) for low, high in bounds]
+    )
+    labels: np.ndarray = np.repeat(segments[:, 2].astype(bool), np.diff(bounds).ravel())
+    detected: np.ndarray = rows["flags"][selected, _DETECTED].astype(bool)
+    selected, labels = selected[detected], labels[detected]
+
+    metrics: np.ndarray = judge.posture_metrics_batch(rows["landmarks"][selected]).T
+    head, shoulder, body = session.biometrics
+    deviations: np.ndarray = np.empty(metrics.shape, dtype=np.float32)
+    np.abs(metrics[0] - np.float64(head), out=deviations[0])
+    np.subtract(metrics[1], np.float64(shoulder), out=deviations[1])
+    np.subtract(metrics[2], np.float64(body), out=deviations[2])
+    return {
+        "path": session.path,
+        "deviations": deviations,
+        "labels": labels,
+        "duration": float((segments[:, 1] - segments[:, 0]).sum()),
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def grid_configs(
+    points: int, space: dict[str, tuple[float, float]] = SEARCH_SPACE
+) -> np.ndarray:
+    """(points ** 3, 3) margins on an evenly spaced grid over `space`."""
+    axes: list[np.ndarray] = [
+        np.linspace(low, high, points) for low, high in space.values()
+    ]
+    return np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, len(space))
+
+
+def random_configs(
+    count: int,
+    space: dict[str, tuple[float, float]] = SEARCH_SPACE,
+    seed: int | None = None,
+) -> np.ndarray:
+    """(count, 3) margins drawn uniformly from `space`."""
+    bounds: np.ndarray = np.array(list(space.values()))
+    return np.random.default_rng(seed).uniform(
+        bounds[:, 0], bounds[:, 1], size=(count, len(space))
+    )
+
+
+def score_configs(task: tuple[str, int, np.ndarray]) -> np.ndarray:
+    """
+    Count the frames each configuration judges good.
+
+    Args:
+        task (tuple[str, int, np.ndarray]): Directory of the saved
+            deviations, number of labelled good frames (stored first) and
+            (C, 3) margins.
+
+    Returns:
+        np.ndarray: (C, 2) int64, frames judged good among the labelled
+        good and among the labelled bad frames.
+
+    Time Complexity: O(C * N) - C configurations, N frames.
+    Space Complexity: O(BLOCK_FRAMES)
+    """
+    directory, good_frames, configs = task
+    deviations: np.ndarray | None = _worker_deviations.get(directory)
+    if deviations is None:
+        deviations = _worker_deviations[directory] = np.load(
+            os.path.join(directory, DEVIATIONS_FILE), mmap_mode="r"
+        )
+    counts: np.ndarray = np.zeros((len(configs), 2), dtype=np.int64)
+    passed: np.ndarray = np.empty(BLOCK_FRAMES, dtype=bool)
+    scratch: np.ndarray = np.empty(BLOCK_FRAMES, dtype=bool)
+    # Margins are compared in the precision of the deviations
+    head_margins, tilt_margins, nose_margins = configs.T.astype(np.float32)
+    for start in range(0, deviations.shape[1], BLOCK_FRAMES):
+        head, tilt, nose = np.array(deviations[:, start : start + BLOCK_FRAMES])
+        split: int = min(max(good_frames - start, 0), len(head))
+        block_passed: np.ndarray = passed[: len(head)]
+        block_scratch: np.ndarray = scratch[: len(head)]
+        for i in range(len(configs)):
+            np.less(head, head_margins[i], out=block_passed)
+            block_passed &= np.greater_equal(tilt, -tilt_margins[i], out=block_scratch)
+            block_passed &= np.greater(nose, -nose_margins[i], out=block_scratch)
+            counts[i, 0] += np.count_nonzero(block_passed[:split])
+            counts[i, 1] += np.count_nonzero(block_passed[split:])
+    return counts
+
+
+def scores(
+    counts: np.ndarray, good_frames: int, bad_frames: int
+) -> dict[str, np.ndarray]:
+    """
+    Classification scores of every configuration, bad posture is positive.
+
+    Args:
+        counts (np.ndarray): (C, 2) counts of `score_configs`.
+        good_frames (int): Labelled good frames.
+        bad_frames (int): Labelled bad frames.
+
+    Returns:
+        dict[str, np.ndarray]: (C,) `accuracy`, `balanced_accuracy`,
+        `bad_precision`, `bad_recall` and `bad_f1`.
+    """
+    true_good: np.ndarray = counts[:, 0].astype(np.float64)
+    true_bad: np.ndarray = bad_frames - counts[:, 1].astype(np.float64)
+    missed_good: np.ndarray = good_frames - true_good
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision: np.ndarray = np.nan_to_num(true_bad / (true_bad + missed_good))
+        recall: np.ndarray = true_bad / max(bad_frames, 1)
+        return {
+            "accuracy": (true_good + true_bad) / max(good_frames + bad_frames, 1),
+            "balanced_accuracy": (true_good / max(good_frames, 1) + recall) / 2,
+            "bad_precision": precision,
+            "bad_recall": recall,
+            "bad_f1": np.nan_to_num(2 * precision * recall / (precision + recall)),
+        }
+
+
+def search(
+    sessions: list[LabelledSession],
+    configs: np.ndarray,
+    workers: int = 0,
+) -> Iterator[dict[str, object]]:
+    """
+    Replay sessions and score configurations of margins on a process pool.
+
+    Args:
+        sessions (list[LabelledSession]): Labelled sessions to replay.
+        configs (np.ndarray): (C, 3) head, tilt and nose margins.
+        workers (int): Number of worker processes, 0 for one per core.
+
+    Yields:
+        dict[str, object]: One `replay` event per session, then a `result`
+        event with the `configs`, their `counts` and `scores`, the
+        labelled `good_frames` and `bad_frames` and timings.
+
+    Time Complexity: O(N + C * N / W) wall time - N frames, W workers.
+    Space Complexity: O(N + C)
+    """
+    workers = workers or os.cpu_count() or 1
+    # Spawned workers behave the same on Windows and Linux.
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=workers) as pool, tempfile.TemporaryDirectory(
+        prefix="sitfix-tune-"
+    ) as directory:
+        started: float = time.perf_counter()
+        replays: list[dict[str, object]] = []
+        for replay in pool.imap_unordered(replay_session, sessions):
+            replays.append(replay)
+            yield {"event": "replay", **replay}
+        deviations: np.ndarray = np.concatenate(
+            [np.empty((3, 0), np.float32)]
+            + [r["deviations"][:, r["labels"]] for r in replays]
+            + [r["deviations"][:, ~r["labels"]] for r in replays],
+            axis=1,
+        )
+        good_frames: int = sum(int(r["labels"].sum()) for r in replays)
+        np.save(os.path.join(directory, DEVIATIONS_FILE), deviations)
+        replayed: float = time.perf_counter() - started
+
+        started = time.perf_counter()
+        chunks: list[np.ndarray] = [
+            configs[i : i + CHUNK_CONFIGS]
+            for i in range(0, len(configs), CHUNK_CONFIGS)
+        ]
+        counts: np.ndarray = np.concatenate(
+            [np.zeros((0, 2), np.int64)]
+            + pool.map(
+                score_configs, [(directory, good_frames, chunk) for chunk in chunks]
+            )
+        )
+        yield {
+            "event": "result",
+            "configs": configs,
+            "counts": counts,
+            "scores": scores(counts, good_frames, deviations.shape[1] - good_frames),
+            "good_frames": good_frames,
+            "bad_frames": deviations.shape[1] - good_frames,
+            "replay_seconds": replayed,
+            "search_seconds": time.perf_counter() - started,
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point of the margin search.
+
+    Args:
+        argv (list[str] | None): Arguments, defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="controller tune",
+        description="Tune the posture margins on labelled recorded sessions.",
+    )
+    parser.add_argument("labels", help="JSON file of labelled session segments")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--grid", type=int, default=10, help="grid points per margin (default)"
+    )
+    mode.add_argument("--random", type=int, help="random configurations instead")
+    parser.add_argument("--seed", type=int, help="seed of the random search")
+    for name, (low, high) in SEARCH_SPACE.items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=float,
+            nargs=2,
+            default=(low, high),
+            metavar=("LOW", "HIGH"),
+            help=f"searched range, default {low} {high}",
+        )
+    parser.add_argument("--objective", choices=OBJECTIVES, default="balanced_accuracy")
+    parser.add_argument("--top", type=int, default=10, help="configurations shown")
+    parser.add_argument("--workers", type=int, default=0, help="0 = one per core")
+    parser.add_argument("--output", help="write every scored configuration as JSONL")
+    args = parser.parse_args(argv)
+
+    try:
+        sessions: list[LabelledSession] = load_labels(args.labels)
+    except (OSError, ValueError, KeyError) as e:
+        error(f"Could not read labels {args.labels}: {e}")
+        return 1
+    if not sessions:
+        error(f"No labelled sessions in {args.labels}")
+        return 1
+    space: dict[str, tuple[float, float]] = {
+        name: tuple(getattr(args, name)) for name in SEARCH_SPACE
+    }
+    configs: np.ndarray = (
+        random_configs(args.random, space, args.seed)
+        if args.random
+        else grid_configs(args.grid, space)
+    )
+    # The current margins are scored too, as the baseline
+    current: np.ndarray = np.array(
+        [[judge.HEAD_MARGIN, judge.TILT_MARGIN, judge.NOSE_MARGIN]]
+    )
+    configs = np.concatenate([current, configs])
+
+    for event in search(sessions, configs, args.workers):
+        if event["event"] == "replay":
+            frames: int = len(event["labels"])
+            print(
+                f"{event['path']}: {frames} labelled frames, replayed "
+                f"{event['duration'] / max(event['elapsed'], 1e-9):.0f}x real time"
+            )
+            continue
+        frame_count: int = event["good_frames"] + event["bad_frames"]
+        print(
+            f"Replayed {frame_count} frames ({event['good_frames']} good, "
+            f"{event['bad_frames']} bad) in {event['replay_seconds']:.2f} s, "
+            f"scored {len(configs) - 1} configurations in "
+            f"{event['search_seconds']:.2f} s "
+            f"({(len(configs) - 1) * frame_count / max(event['search_seconds'], 1e-9):.3g} "
+            f"frame evaluations/s)"
+        )
+        results: list[dict[str, float]] = [
+            {
+                **dict(zip(SEARCH_SPACE, map(float, margins))),
+                **{name: float(values[i]) for name, values in event["scores"].items()},
+            }
+            for i, margins in enumerate(event["configs"])
+        ]
+        baseline: dict[str, float] = results.pop(0)
+        results.sort(key=lambda result: result[args.objective], reverse=True)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as output:
+                output.writelines(json.dumps(result) + "\n" for result in results)
+        print(f"{'head':>7} {'tilt':>7} {'nose':>7} {args.objective:>18}")
+        for label, result in [("current", baseline)] + [
+            ("", result) for result in results[: args.top]
+        ]:
+            print(
+                f"{result['head_margin']:7.3f} {result['tilt_margin']:7.2f} "
+                f"{result['nose_margin']:7.3f} {result[args.objective]:18.4f} {label}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
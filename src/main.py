@@ -1,4 +1,11 @@
+# Imported first, it takes the process start time for the startup report.
+from controller.startup import STARTUP_LOG, PipelineWarmup, StartupTimer
 from view import gui
 
-a: gui.window = gui.get_root()
+timer: StartupTimer = StartupTimer(log_path=STARTUP_LOG)
+# Camera and pose model warm up behind the window, once it is showing.
+warmup: PipelineWarmup = PipelineWarmup(source=0, timer=timer)
+a: gui.window = gui.get_root(warmup)
+timer.mark_when_mapped(a, "first_window")
+a.after(0, warmup.start)
 a.mainloop()
@@ -0,0 +1,327 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Incrementally maintained posture statistics.
+
+Every judged frame is added to an in-memory bucket of its minute: good and
+bad frame counts and the sums of the three posture metrics. A background
+thread folds these deltas every few seconds into two SQLite tables, one
+row per minute and one per hour, with a single upsert transaction. Reading
+the good posture percentage of a day, week or month therefore sums at most
+a few hundred hourly rows, however much history has been recorded. Minute
+rows are kept for `MINUTE_RETENTION` seconds, hour rows forever.
+
+## Syntax
+```
+rollups = PostureRollups()
+rollups.add(time.time(), True, (0.41, 179.2, 0.88))
+rollups.summary()  # {"day": 87.5, "week": 81.2, "month": 79.9}
+rollups.close()
+RollupReader().summary()  # Read-only, e.g. in the stats window
+```
+"""
+
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from logging import error
+from model.config_store import PROJECT_ROOT
+
+__purpose__: str = "Keep per-minute and per-hour posture rollups."
+
+# Resolved from the project root like the profiles, not the working directory
+ANALYTICS_DB: str = os.path.join(PROJECT_ROOT, "user_data", "analytics.sqlite3")
+FLUSH_INTERVAL: float = 5.0  # Seconds between two writes to the database
+MINUTE_RETENTION: float = 8 * 86400.0
+DAY: float = 86400.0
+# Periods of `summary`, in days back from the local midnight of today.
+PERIODS: dict[str, int] = {"day": 1, "week": 7, "month": 30}
+
+# Columns of both rollup tables, after the bucket start time.
+COLUMNS: tuple[str, ...] = (
+    "good",
+    "bad",
+    "shoulder_distance",
+    "shoulder_tilt",
+    "shoulder_to_nose_distance",
+)
+
+SCHEMA: str = "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    start INTEGER PRIMARY KEY,
+    good INTEGER NOT NULL,
+    bad INTEGER NOT NULL,
+    shoulder_distance REAL NOT NULL,
+    shoulder_tilt REAL NOT NULL,
+    shoulder_to_nose_distance REAL NOT NULL
+);""" for table in ("minutes", "hours"))
+
+
+def _upsert(table: str) -> str:
+    """Statement adding one delta row to a rollup table."""
+    return (
+        f"INSERT INTO {table} (start, {', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?) "
+        f"ON CONFLICT(start) DO UPDATE SET "
+        + ", ".join(f"{c} = {c} + excluded.{c}" for c in COLUMNS)
+    )
+
+
+def day_start(timestamp: float | None = None) -> float:
+    """Epoch time of the local midnight starting the day of `timestamp`."""
+    local: time.struct_time = time.localtime(timestamp)
+    return time.mktime((local.tm_year, local.tm_mon, local.tm_mday, 0, 0, 0, 0, 0, -1))
+
+
+class RollupReader:
+    """
+    Reads the rollup database, e.g. for the stats window.
+
+    Purpose: Day, week and month statistics from a few hundred rows.
+    Time Complexity: O(B) per query - B is the number of buckets read.
+    Space Complexity: O(1)
+    """
+
+    def __init__(self, path: str = ANALYTICS_DB) -> None:
+        """
+        Args:
+            path (str): SQLite database file, created when missing.
+        """
+        self.path: str = path
+        directory: str = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The connection context only ends the transaction, closing() closes it
+        with contextlib.closing(sqlite3.connect(path)) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+
+    def _reading(self) -> contextlib.AbstractContextManager:
+        """Context held while the database is read."""
+        return contextlib.nullcontext()
+
+    def _unwritten(self, first_minute: int, last_minute: int) -> list[list[float]]:
+        """Buckets between two minutes that are not in the database yet."""
+        return []
+
+    def totals(self, start: float, end: float | None = None) -> dict[str, float]:
+        """
+        Sum the buckets between two times.
+
+        Whole hours are read from the hour table and partial hours at
+        either end from the minute table, so the result is exact to the
+        minute and reads at most a few hundred rows.
+
+        Args:
+            start (float): Epoch time, inclusive.
+            end (float | None): Epoch time, exclusive, None for now.
+
+        Returns:
+            dict[str, float]: Sums of every column of `COLUMNS` and `frames`.
+        """
+        end = time.time() if end is None else end
+        first_minute: int = -(-int(start) // 60) * 60
+        last_minute: int = -(-int(end) // 60) * 60
+        first_hour: int = -(-first_minute // 3600) * 3600
+        last_hour: int = last_minute // 3600 * 3600
+        sums: list[float] = [0.0] * len(COLUMNS)
+        columns: str = ", ".join(f"TOTAL({c})" for c in COLUMNS)
+        with self._reading(), contextlib.closing(
+            sqlite3.connect(self.path)
+        ) as connection:
+            rows: list[tuple] = []
+            if first_hour < last_hour:
+                rows.append(
+                    connection.execute(
+                        f"SELECT {columns} FROM hours WHERE start >= ? AND start < ?",
+                        (first_hour, last_hour),
+                    ).fetchone()
+                )
+                ranges = ((first_minute, first_hour), (last_hour, last_minute))
+            else:
+                ranges = ((first_minute, last_minute),)
+            for low, high in ranges:
+                if low < high:
+                    rows.append(
+                        connection.execute(
+                            f"SELECT {columns} FROM minutes "
+                            f"WHERE start >= ? AND start < ?",
+                            (low, high),
+                        ).fetchone()
+                    )
+            rows.extend(self._unwritten(first_minute, last_minute))
+        for row in rows:
+            for column, value in enumerate(row):
+                sums[column] += value
+        result: dict[str, float] = dict(zip(COLUMNS, sums))
+        result["frames"] = result["good"] + result["bad"]
+        return result
+
+    def summary(self, now: float | None = None) -> dict[str, float | None]:
+        """
+        Good posture percentage of today, the last 7 and the last 30 days.
+
+        Args:
+            now (float | None): Epoch time, None for now.
+
+        Returns:
+            dict[str, float | None]: Percentage per name of `PERIODS`, None
+            for periods without judged frames.
+        """
+        now = time.time() if now is None else now
+        midnight: float = day_start(now)
+        summary: dict[str, float | None] = {}
+        for name, days in PERIODS.items():
+            totals: dict[str, float] = self.totals(
+                day_start(midnight - (days - 1) * DAY + DAY / 2), now
+            )
+            summary[name] = (
+                100.0 * totals["good"] / totals["frames"] if totals["frames"] else None
+            )
+        return summary
+
+
+class PostureRollups(RollupReader):
+    """
+    Per-minute and per-hour posture aggregates in a small SQLite database.
+
+    Queries include the frames not written yet. `add` only touches a dict, the database is written by a background
+    thread, so the pipeline never waits on the disk.
+
+    Purpose: Instant day, week and month statistics for the stats window.
+    Time Complexity: O(1) per frame, O(B) per flush and query - B is the
+        number of buckets touched.
+    Space Complexity: O(M) in memory - M is the minutes since the last flush.
+    """
+
+    def __init__(
+        self, path: str = ANALYTICS_DB, flush_interval: float = FLUSH_INTERVAL
+    ) -> None:
+        """
+        Args:
+            path (str): SQLite database file, created when missing.
+            flush_interval (float): Seconds between two database writes.
+        """
+        super().__init__(path)
+        self.flush_interval: float = flush_interval
+        # Minute start -> [good, bad, metric sums...], not yet in the database
+        self._pending: dict[int, list[float]] = {}
+        self._lock: threading.Lock = threading.Lock()
+        # Held while buckets move from `_pending` to the database
+        self._flush_lock: threading.Lock = threading.Lock()
+        self._closed: threading.Event = threading.Event()
+        self._thread: threading.Thread = threading.Thread(
+            target=self._flush_loop, name="sitfix-rollups", daemon=True
+        )
+        self._thread.start()
+
+    def add(
+        self,
+        timestamp: float,
+        good: bool,
+        metrics: tuple[float, float, float] | None = None,
+    ) -> None:
+        """
+        Count one judged frame.
+
+        Args:
+            timestamp (float): Epoch time of the frame in seconds.
+            good (bool): Verdict of the frame.
+            metrics (tuple[float, float, float] | None): Shoulder distance,
+                shoulder tilt and shoulder to nose distance.
+        """
+        minute: int = int(timestamp // 60) * 60
+        with self._lock:
+            bucket: list[float] | None = self._pending.get(minute)
+            if bucket is None:
+                bucket = self._pending[minute] = [0, 0, 0.0, 0.0, 0.0]
+            bucket[0 if good else 1] += 1
+            if metrics is not None:
+                bucket[2] += float(metrics[0])
+                bucket[3] += float(metrics[1])
+                bucket[4] += float(metrics[2])
+
+    def flush(self) -> None:
+        """Write the pending buckets to the database now."""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        with self._lock:
+            pending: dict[int, list[float]] = self._pending
+            self._pending = {}
+        if not pending:
+            return
+        # Fold the minute deltas into hour deltas before writing.
+        hours: dict[int, list[float]] = {}
+        for minute, bucket in pending.items():
+            total: list[float] | None = hours.get(minute // 3600 * 3600)
+            if total is None:
+                hours[minute // 3600 * 3600] = list(bucket)
+            else:
+                for column, value in enumerate(bucket):
+                    total[column] += value
+        try:
+            with contextlib.closing(
+                sqlite3.connect(self.path)
+            ) as connection, connection:
+                connection.executemany(
+                    _upsert("minutes"), [(m, *b) for m, b in pending.items()]
+                )
+                connection.executemany(
+                    _upsert("hours"), [(h, *b) for h, b in hours.items()]
+                )
+                connection.execute(
+                    "DELETE FROM minutes WHERE start < ?",
+                    (int(time.time() - MINUTE_RETENTION),),
+                )
+        except sqlite3.Error as e:
+            error(f"Error writing posture rollups: {e}")
+            # The transaction was rolled back, the next flush retries the
+            # buckets together with those counted meanwhile.
+            with self._lock:
+                for minute, bucket in pending.items():
+                    total: list[float] | None = self._pending.get(minute)
+                    if total is None:
+                        self._pending[minute] = bucket
+                    else:
+                        for column, value in enumerate(bucket):
+                            total[column] += value
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the background thread and write the remaining buckets."""
+        self._closed.set()
+        self._thread.join()
+        self.flush()
+
+    def _reading(self) -> contextlib.AbstractContextManager:
+        # No buckets are between `_pending` and the database while reading
+        return self._flush_lock
+
+    def _unwritten(self, first_minute: int, last_minute: int) -> list[list[float]]:
+        with self._lock:
+            return [
+                list(bucket)
+                for minute, bucket in self._pending.items()
+                if first_minute <= minute < last_minute
+            ]
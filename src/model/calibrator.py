@@ -16,7 +16,20 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 """
-This is the main script of the project. Execute this for running the program.
+Calibration of a user's biometrics profile.
+
+Collects a couple of seconds of pose landmarks from a camera or a recorded
+clip into a NumPy buffer, computes robust baselines (median and MAD) of the
+three posture metrics in one vectorized pass, and atomically writes a
+versioned profile read by `model.posture_judger`.
+
+## Syntax
+```
+python -m model.calibrator --source 0 --seconds 2          # Default user
+python -m model.calibrator --source clip.mp4 --user alice  # From a clip
+python -m model.calibrator --batch onboarding/             # One user per clip
+```
+Run from the project root with `src` on `PYTHONPATH`.
 """
 
 # Metadata
@@ -64,207 +77,253 @@ __metadata__: tuple[str | tuple, ...] = (
     __keywords__,
 )
 
+
 # Importing dependencies
-import math
+import argparse
+import os
+import sys
+import time
 import cv2
 import mediapipe as mp
+import numpy as np
 from typing import Final
 from logging import basicConfig, error, ERROR
-import winsound
+from controller.posture_controller import (
+    capture_video,
+    initialize_pose_model,
+    landmarks_to_array,
+)
+from model import posture_judger as judge
+from model.config_store import config
 
 # Configure logging to show only errors
 basicConfig(level=ERROR)
 
+PROFILE_VERSION: Final[int] = 1
+DEFAULT_USER: Final[str] = judge.DEFAULT_USER
+VIDEO_EXTENSIONS: Final[tuple[str, ...]] = (".avi", ".mkv", ".mov", ".mp4", ".webm")
+# Scales the MAD to the standard deviation of normally distributed data.
+MAD_TO_SIGMA: Final[float] = 1.4826
+# Landmarks the metrics depend on must be at least this visible.
+MIN_VISIBILITY: Final[float] = 0.5
+# Calibrated margins are this many standard deviations of their metric.
+MARGIN_SIGMAS: Final[float] = 3.0
+# Smallest calibrated margin per field, so a very still calibration does not
+# flag every small movement.
+MIN_MARGINS: Final[dict[str, float]] = {"head": 0.02, "shoulder": 1.0, "body": 0.02}
+# Metric names in the column order of `posture_metrics_batch`, keyed by the
+# biometrics field each one calibrates.
+PROFILE_FIELDS: Final[tuple[tuple[str, str], ...]] = (
+    ("head", "shoulder_distance"),
+    ("shoulder", "shoulder_tilt"),
+    ("body", "shoulder_to_nose_distance"),
+)
 
-def initialize_pose_model() -> mp.solutions.pose.Pose | None:
+
+def collect_landmarks(
+    pose: mp.solutions.pose.Pose, source: int | str, seconds: float = 2.0
+) -> np.ndarray:
     """
-    Initialize and configure the MediaPipe pose model.
+    Collect pose landmarks of every detected frame for `seconds`.
+
+    For cameras `seconds` is wall time counted from the first processed
+    frame, so the model's warm-up does not eat into it. For clips it is
+    video time, and 0 reads the whole clip.
+
+    Args:
+        pose (mp.solutions.pose.Pose): Initialized pose model.
+        source (int | str): Camera index or video file path.
+        seconds (float): Capture duration.
 
     Returns:
-        mp.solutions.pose.Pose: Initialized pose model.
+        np.ndarray: (N, 33, 4) landmarks of the N frames with a detection.
 
-    Author: Aviraj Saha
-    Date: September 30, 2023
-    Purpose: Initialize the pose detection model for detecting human poses.
-    Time Complexity: O(1)
-    Space Complexity: O(1)
+    Purpose: Gather calibration samples into one NumPy buffer.
+    Time Complexity: O(F) - F is the number of frames captured.
+    Space Complexity: O(F)
     """
+    capture: cv2.VideoCapture = capture_video(source)
+    if capture is None or not capture.isOpened():
+        raise OSError(f"Cannot open video source {source!r}")
+    is_clip: bool = isinstance(source, str)
+    fps: float = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_limit: int = int(seconds * fps) if is_clip and seconds > 0 else -1
+    # Preallocated for 60 fps, grown by doubling for longer clips.
+    buffer: np.ndarray = np.empty(
+        (max(16, int(max(seconds, 1.0) * 60)), judge.LANDMARK_COUNT, 4),
+        dtype=np.float32,
+    )
+    count: int = 0
+    frames: int = 0
+    started: float | None = None
     try:
-        # Define the MediaPipe pose model
-        MEDIAPIPE_POSE_MODEL: Final[mp.solutions.pose] = mp.solutions.pose
-        # Initialize the pose model with confidence thresholds
-        pose: Final[mp.solutions.pose.Pose] = MEDIAPIPE_POSE_MODEL.Pose(
-            min_detection_confidence=0.9, min_tracking_confidence=0.9
-        )
-        return pose
-    except Exception as e:
-        error(f"Error initializing pose model: {e}")
-        return None
-
-
-def capture_video(camera_index: int) -> cv2.VideoCapture | None:
+        while frames != frame_limit:
+            if (
+                not is_clip
+                and started is not None
+                and time.perf_counter() - started >= seconds
+            ):
+                break
+            success: bool
+            frame: cv2.typing.MatLike
+            success, frame = capture.read()
+            if not success:
+                break
+            frames += 1
+            image: cv2.typing.MatLike = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            results: object = pose.process(image)
+            if started is None:
+                started = time.perf_counter()
+            if not results.pose_landmarks:
+                continue
+            if count == len(buffer):
+                buffer = np.concatenate([buffer, np.empty_like(buffer)])
+            landmarks_to_array(results.pose_landmarks, out=buffer[count])
+            count += 1
+    finally:
+        capture.release()
+    return buffer[:count]
+
+
+def compute_profile(landmarks: np.ndarray, min_frames: int = 15) -> dict[str, object]:
     """
-    Capture video from the camera.
+    Compute robust posture baselines from calibration landmarks.
+
+    Frames in which the nose or a shoulder is barely visible are discarded.
+    The baseline of every metric is its median, and its spread is the
+    median absolute deviation scaled to a standard deviation. The margin
+    the judge allows around a baseline is `MARGIN_SIGMAS` spreads, at least
+    `MIN_MARGINS`.
 
     Args:
-        camera_index (int): Index of the camera to capture video from.
+        landmarks (np.ndarray): (N, 33, 4) calibration landmarks.
+        min_frames (int): Fewest usable frames accepted.
 
     Returns:
-        cv2.VideoCapture: Video capture object.
+        dict[str, object]: Biometrics fields (`head`, `shoulder`, `body`),
+        their `margins` and a `statistics` entry with median, MAD and frame
+        count.
 
-    Author: Aviraj Saha
-    Date: September 28, 2023
-    Purpose: Initialize video capture from the specified camera.
-    Time Complexity: O(1)
-    Space Complexity: O(1)
+    Mathematics:
+    MAD = median(|x - median(x)|) * 1.4826
+    margin = max(MARGIN_SIGMAS * MAD, MIN_MARGINS[field])
+
+    Purpose: Turn calibration samples into a biometrics profile.
+    Time Complexity: O(N) - Vectorized, medians by selection.
+    Space Complexity: O(N)
     """
-    try:
-        # Create a video capture object for the specified camera
-        CAPTURE: Final[cv2.VideoCapture] = cv2.VideoCapture(camera_index, cv2.CAP_DSHOW)
-        return CAPTURE
-    except Exception as e:
-        error(f"Error capturing video: {e}")
-        return None
+    key_points: list[int] = [
+        judge.NOSE_INDEX,
+        judge.LEFT_SHOULDER_INDEX,
+        judge.RIGHT_SHOULDER_INDEX,
+    ]
+    usable: np.ndarray = (landmarks[:, key_points, 3] >= MIN_VISIBILITY).all(axis=1)
+    samples: np.ndarray = landmarks[usable]
+    if len(samples) < min_frames:
+        raise ValueError(
+            f"Only {len(samples)} usable frames, at least {min_frames} are needed. "
+            f"Sit in front of the camera with your head and shoulders visible."
+        )
+    metrics: np.ndarray = judge.posture_metrics_batch(samples).astype(np.float64)
+    median: np.ndarray = np.median(metrics, axis=0)
+    mad: np.ndarray = np.median(np.abs(metrics - median), axis=0) * MAD_TO_SIGMA
+
+    profile: dict[str, object] = {}
+    margins: dict[str, float] = {}
+    statistics: dict[str, object] = {"frames": int(len(samples))}
+    for column, (field, metric) in enumerate(PROFILE_FIELDS):
+        profile[field] = round(float(median[column]), 6)
+        margins[field] = round(
+            max(MARGIN_SIGMAS * float(mad[column]), MIN_MARGINS[field]), 6
+        )
+        statistics[metric] = {
+            "median": round(float(median[column]), 6),
+            "mad": round(float(mad[column]), 6),
+        }
+    profile["margins"] = margins
+    profile["statistics"] = statistics
+    return profile
 
 
-def process_frame(
-    frame: cv2.typing.MatLike, pose: mp.solutions.pose.Pose
-) -> tuple[cv2.typing.MatLike, object] | tuple[None, None]:
+def biometrics_path(user_id: str | None = None) -> str:
     """
-    Process a video frame, detect and visualize human poses.
+    Path of the biometrics profile of a user.
 
     Args:
-        frame (object): Video frame to process.
-        pose (mp.solutions.pose.Pose): Initialized pose model.
+        user_id (str | None): User ID, None or "default" for the profile
+            used by a single-user workstation.
 
     Returns:
-        Tuple[object, object]: Processed image and pose detection results.
-
-    Author: Aviraj Saha
-    Date: September 28, 2023
-    Purpose: Process a video frame for pose detection.
-    Time Complexity: Depends on the image size and pose detection model.
-    Space Complexity: Depends on the image size and pose detection model.
+        str: Absolute profile path, the one `judge.profiles` watches.
     """
-    try:
-        final_width: int = 1280  # Alterable
-        final_height: int = 960  # Alterable
+    return os.path.join(judge.PROJECT_ROOT, judge.profile_path(user_id))
 
-        # Resize the frame to a specific width and height
-        frame: cv2.typing.MatLike = cv2.resize(frame, (final_width, final_height))
-        # Convert frame colors from BGR to RGB
-        image: cv2.typing.MatLike = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image.flags.writeable = False
 
-        # Process the frame using the pose model
-        results: object = pose.process(image)
+def write_profile(profile: dict[str, object], path: str) -> None:
+    """
+    Atomically write a profile as JSON.
 
-        # Convert image colors back from RGB to BGR
-        image.flags.writeable = True
-        image: cv2.typing.MatLike = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    The profile is written to a temporary file in the target directory and
+    renamed over the target by the shared config store, so readers never
+    see a partial file and the judge's cached copy is updated at once.
 
-        return image, results
-    except Exception as e:
-        error(f"Error processing frame: {e}")
-        return None, None
+    Args:
+        profile (dict[str, object]): Profile to write.
+        path (str): Target path.
+    """
+    config.save(path, profile)
 
 
-def process_video(pose: mp.solutions.pose.Pose, camera_index: int) -> None:
+def calibrate(
+    source: int | str = 0,
+    seconds: float = 2.0,
+    user_id: str | None = None,
+    pose: mp.solutions.pose.Pose | None = None,
+) -> dict[str, object]:
     """
-    Process video frames, detect posture, and visualize it.
+    Calibrate a user and write the versioned biometrics profile.
 
     Args:
-        pose (mp.solutions.pose.Pose): Initialized pose model.
-        camera_index (int): Index of the camera to capture video from.
+        source (int | str): Camera index or video file path.
+        seconds (float): Capture duration, 0 reads a whole clip.
+        user_id (str | None): User ID the profile belongs to.
+        pose (mp.solutions.pose.Pose | None): Pose model to reuse.
 
-    Author: Aviraj Saha
-    Date: September 30, 2023
-    Purpose: Continuously process video frames for posture detection and visualization.
-    Time Complexity: Depends on the frame rate and image size.
-    Space Complexity: Depends on the frame rate and image size.
+    Returns:
+        dict[str, object]: The written profile.
+
+    Raises:
+        ValueError: The user ID is invalid, or too few frames were usable.
+
+    Purpose: Replace hand-written biometrics with measured baselines.
+    Time Complexity: O(F) - F is the number of frames captured.
+    Space Complexity: O(F)
     """
-    try:
-        # Create a video capture object
-        CAPTURE: Final[cv2.VideoCapture] = capture_video(camera_index)
-
-        while CAPTURE.isOpened():
-            try:
-                _: bool
-                frame: cv2.typing.MatLike
-                _, frame = CAPTURE.read()
-
-                # Process the video frame and get results
-                image: cv2.typing.MatLike
-                results: object
-                image, results = process_frame(frame, pose)
-                # Draw landmarks on the frame
-                mp.solutions.drawing_utils.draw_landmarks(
-                    image, results.pose_landmarks, mp.solutions.pose.POSE_CONNECTIONS
-                )
-
-                cv2.putText(
-                    image,
-                    "Stats",
-                    (1100, 50),
-                    cv2.FONT_HERSHEY_COMPLEX,
-                    2,
-                    (255, 0, 0),
-                    2,
-                )
-
-                cv2.putText(
-                    image,
-                    "Head:",
-                    (950, 130),
-                    cv2.FONT_HERSHEY_COMPLEX,
-                    1,
-                    (255, 0, 0),
-                    2,
-                )
-
-                cv2.putText(
-                    image,
-                    "Shoulder:",
-                    (950, 180),
-                    cv2.FONT_HERSHEY_COMPLEX,
-                    1,
-                    (255, 0, 0),
-                    2,
-                )
-
-                cv2.putText(
-                    image,
-                    "Body:",
-                    (950, 230),
-                    cv2.FONT_HERSHEY_COMPLEX,
-                    1,
-                    (255, 0, 0),
-                    2,
-                )
-
-                # Show the final frame
-                cv2.imshow("sitfix-ai Visual Output", image)
-
-                if cv2.waitKey(10) & 0xFF == ord("q"):
-                    break
-
-            except Exception as e:
-                error(f"Error in video processing loop: {e}")
-
-        CAPTURE.release()
-        cv2.destroyAllWindows()
-
-    except Exception as e:
-        error(f"Error in process_video function: {e}")
-
-
-def main() -> None:
+    # Invalid user IDs are rejected before anything is captured
+    path: str = biometrics_path(user_id)
+    pose = pose or initialize_pose_model()
+    landmarks: np.ndarray = collect_landmarks(pose, source, seconds)
+    profile: dict[str, object] = {
+        "version": PROFILE_VERSION,
+        "user": user_id or DEFAULT_USER,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "source": str(source),
+        **compute_profile(landmarks),
+    }
+    write_profile(profile, path)
+    return profile
+
+
+def main(argv: list[str] | None = None) -> int:
     """
     Execution starts from here.
 
     Args:
-        pose (mp.solutions.pose.Pose): Initialized pose model.
-        camera_index (int): Index of the camera to capture video from.
+        argv (list[str] | None): Arguments, defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: Process exit code.
 
     Author: Aviraj Saha
     Date: September 28, 2023
@@ -273,16 +332,51 @@ def main() -> None:
     Time Complexity: Depends on the other functions.
     Space Complexity: Depends on the other functions.
     """
-    try:
-        # Initialize the pose model
-        pose: mp.solutions.pose.Pose = initialize_pose_model()
-        if pose is not None:
-            # Process video frames for posture detection
-            process_video(pose, camera_index=0)
-    except Exception as e:
-        error(f"Error in main function: {e}")
+    parser = argparse.ArgumentParser(
+        prog="model.calibrator", description="Calibrate biometrics profiles."
+    )
+    parser.add_argument("--source", default="0", help="camera index or video file")
+    parser.add_argument("--seconds", type=float, default=2.0, help="0 = whole clip")
+    parser.add_argument("--user", help="user ID, default profile when omitted")
+    parser.add_argument(
+        "--batch",
+        help="directory of clips, each calibrates the user named after its file",
+    )
+    args = parser.parse_args(argv)
+
+    jobs: list[tuple[int | str, str | None]]
+    if args.batch:
+        jobs = [
+            (os.path.join(args.batch, name), os.path.splitext(name)[0])
+            for name in sorted(os.listdir(args.batch))
+            if name.lower().endswith(VIDEO_EXTENSIONS)
+        ]
+    else:
+        source: int | str = int(args.source) if args.source.isdigit() else args.source
+        jobs = [(source, args.user)]
+
+    pose: mp.solutions.pose.Pose | None = None
+    failures: int = 0
+    for source, user_id in jobs:
+        try:
+            # A fresh model per clip, tracking must not carry across users.
+            if pose is not None and args.batch:
+                pose.close()
+                pose = None
+            pose = pose or initialize_pose_model()
+            profile: dict[str, object] = calibrate(source, args.seconds, user_id, pose)
+            print(
+                f"{profile['user']}: head={profile['head']} "
+                f"shoulder={profile['shoulder']} body={profile['body']} "
+                f"({profile['statistics']['frames']} frames) -> "
+                f"{biometrics_path(user_id)}"
+            )
+        except (OSError, ValueError) as e:
+            failures += 1
+            error(f"Calibration of {user_id or DEFAULT_USER} failed: {e}")
+    return 1 if failures else 0
 
 
 if __name__ == "__main__":
     # print(__metadata__)  # Uncomment for printing metadata attached to this code.
-    main()
+    sys.exit(main())
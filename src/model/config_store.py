@@ -0,0 +1,340 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Shared JSON configuration store.
+
+Every configuration file (display settings, link URLs, biometrics profiles)
+is parsed once and served from memory, as a dict or as a typed, frozen
+view. Files are re-read only when their mtime changes. Updates take effect
+in memory immediately and notify subscribers, while the file itself is
+written later by a background thread: writes to the same file within
+`delay` seconds are coalesced, and each write goes to a temporary file that
+is then renamed over the target, so readers never see a partial file and
+UI threads never wait on the disk. Pending writes are flushed on exit.
+
+Relative paths are resolved against the project root.
+
+## Syntax
+```
+settings = config.typed(DISPLAY_SETTINGS, DisplaySettings)
+config.subscribe(DISPLAY_SETTINGS, on_change)
+config.update(DISPLAY_SETTINGS, theme="dark")  # Returns at once
+```
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, fields
+from logging import error
+
+__purpose__: str = "Parse configuration once, write it atomically off the UI thread."
+
+PROJECT_ROOT: str = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+DISPLAY_SETTINGS: str = "src/view/config/display_settings.json"
+URLS: str = "src/view/data/urls.json"
+WRITE_DELAY: float = 0.5  # Seconds of quiet before a file is written
+
+
+@dataclass(frozen=True, slots=True)
+class DisplaySettings:
+    """
+    Typed view of `display_settings.json`.
+
+    Attributes:
+        theme (str): "light" or "dark".
+    """
+
+    theme: str = "light"
+
+
+@dataclass(frozen=True, slots=True)
+class Urls:
+    """
+    Typed view of `urls.json`.
+
+    Attributes:
+        readme (str): Project README.
+        python_docs (str): Python documentation.
+        opencv_docs (str): OpenCV documentation.
+        mediapipe_readme (str): MediaPipe README.
+    """
+
+    readme: str = ""
+    python_docs: str = ""
+    opencv_docs: str = ""
+    mediapipe_readme: str = ""
+
+
+def write_json_atomic(data: dict[str, object], path: str) -> None:
+    """
+    Atomically write a dict as JSON.
+
+    The data is written to a temporary file in the target directory and
+    renamed over the target, so readers never see a partial file.
+
+    Args:
+        data (dict[str, object]): Data to write.
+        path (str): Target path.
+    """
+    directory: str = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    descriptor: int
+    temporary: str
+    descriptor, temporary = tempfile.mkstemp(
+        prefix=f".{os.path.splitext(os.path.basename(path))[0]}-",
+        suffix=".json",
+        dir=directory,
+    )
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as json_file:
+            json.dump(data, json_file, indent=4)
+            json_file.flush()
+            os.fsync(json_file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class ConfigStore:
+    """
+    Parsed JSON files by path, with debounced atomic write-back.
+
+    Purpose: One parse per file, no disk access on UI threads.
+    Time Complexity: O(1) per cached read, O(file size) per parse or write.
+    Space Complexity: O(F) - F is the total size of the files read.
+    """
+
+    def __init__(self, root: str = PROJECT_ROOT, delay: float = WRITE_DELAY) -> None:
+        """
+        Args:
+            root (str): Directory relative paths are resolved against.
+            delay (float): Seconds a write waits for further updates.
+        """
+        self.root: str = root
+        self.delay: float = delay
+        # Absolute path -> (mtime_ns, data), mtime -1 for missing files
+        self._files: dict[str, tuple[int, dict[str, object]]] = {}
+        self._typed: dict[tuple[str, type], tuple[dict[str, object], object]] = {}
+        self._subscribers: dict[str, list] = {}
+        # Absolute path -> (write time, data)
+        self._pending: dict[str, tuple[float, dict[str, object]]] = {}
+        self._lock: threading.RLock = threading.RLock()
+        self._wake: threading.Condition = threading.Condition(self._lock)
+        self._writer: threading.Thread | None = None
+        # Serializes file writes, so an older write never lands last
+        self._io_lock: threading.Lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _resolve(self, path: str) -> str:
+        return os.path.join(self.root, path)
+
+    def get(self, path: str, refresh: bool = False) -> dict[str, object]:
+        """
+        Return the parsed contents of a JSON file.
+
+        Args:
+            path (str): File path.
+            refresh (bool): Re-read the file if its mtime has changed since
+                it was parsed; otherwise it is parsed only once.
+
+        Returns:
+            dict[str, object]: The contents, empty when the file is missing
+            or empty. Shared, callers must not modify it.
+        """
+        full: str = self._resolve(path)
+        entry: tuple[int, dict[str, object]] | None = self._files.get(full)
+        if entry is not None and (not refresh or full in self._pending):
+            return entry[1]
+        try:
+            mtime: int = os.stat(full).st_mtime_ns
+        except FileNotFoundError:
+            mtime = -1
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+        data: dict[str, object] = self._read(full) if mtime >= 0 else {}
+        with self._lock:
+            self._files[full] = (mtime, data)
+        if entry is not None:
+            self._notify(full, data)
+        return data
+
+    @staticmethod
+    def _read(full: str) -> dict[str, object]:
+        with open(full, "r", encoding="utf-8") as json_file:
+            content: str = json_file.read()
+        return json.loads(content) if content.strip() else {}
+
+    def typed(self, path: str, cls: type, refresh: bool = False) -> object:
+        """
+        Return a file as a typed view, built once per change of the file.
+
+        Args:
+            path (str): File path.
+            cls (type): Dataclass whose fields name the keys used, missing
+                keys take the field defaults and unknown keys are ignored.
+            refresh (bool): As for `get`.
+
+        Returns:
+            object: Instance of `cls`.
+        """
+        data: dict[str, object] = self.get(path, refresh)
+        key: tuple[str, type] = (self._resolve(path), cls)
+        cached: tuple[dict[str, object], object] | None = self._typed.get(key)
+        if cached is not None and cached[0] is data:
+            return cached[1]
+        names: set[str] = {field.name for field in fields(cls)}
+        view: object = cls(**{k: v for k, v in data.items() if k in names})
+        self._typed[key] = (data, view)
+        return view
+
+    def subscribe(self, path: str, callback) -> None:
+        """
+        Call `callback(data)` whenever the contents of `path` change.
+
+        Callbacks run on the thread that made or detected the change.
+
+        Args:
+            path (str): File path.
+            callback (Callable[[dict[str, object]], None]): Receives the new
+                contents.
+        """
+        self._subscribers.setdefault(self._resolve(path), []).append(callback)
+
+    def _notify(self, full: str, data: dict[str, object]) -> None:
+        for callback in self._subscribers.get(full, ()):
+            try:
+                callback(data)
+            except Exception as e:
+                error(f"Error in config subscriber of {full}: {e}")
+
+    def set(self, path: str, data: dict[str, object]) -> None:
+        """
+        Replace the contents of a file, written in the background.
+
+        Args:
+            path (str): File path.
+            data (dict[str, object]): New contents.
+        """
+        full: str = self._resolve(path)
+        data = dict(data)
+        with self._lock:
+            previous: tuple[int, dict[str, object]] | None = self._files.get(full)
+            self._files[full] = (previous[0] if previous else -1, data)
+            self._pending[full] = (time.monotonic() + self.delay, data)
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_pending, name="sitfix-config", daemon=True
+                )
+                self._writer.start()
+            self._wake.notify()
+        self._notify(full, data)
+
+    def update(self, path: str, **changes: object) -> None:
+        """
+        Change some keys of a file, written in the background.
+
+        Args:
+            path (str): File path.
+            changes: Keys and their new values.
+        """
+        with self._lock:
+            self.set(path, {**self.get(path), **changes})
+
+    def save(self, path: str, data: dict[str, object]) -> None:
+        """
+        Replace the contents of a file and write it before returning.
+
+        Args:
+            path (str): File path.
+            data (dict[str, object]): New contents.
+        """
+        full: str = self._resolve(path)
+        data = dict(data)
+        with self._lock:
+            self._pending.pop(full, None)
+            previous: tuple[int, dict[str, object]] | None = self._files.get(full)
+            self._files[full] = (previous[0] if previous else -1, data)
+        self._write(full, data, raise_errors=True)
+        self._notify(full, data)
+
+    def flush(self) -> None:
+        """Write every pending update now."""
+        with self._lock:
+            pending: dict[str, tuple[float, dict[str, object]]] = self._pending
+            self._pending = {}
+        for full, (_, data) in pending.items():
+            self._write(full, data)
+
+    def _write(
+        self, full: str, data: dict[str, object], raise_errors: bool = False
+    ) -> None:
+        """
+        Write one file, without holding the store lock during the I/O.
+
+        Skipped when newer data was set since `data`: the writer thread and
+        `flush` take their batch before `_io_lock`, so a `save` may already
+        have written the newer data, which must stay the last write.
+        """
+        with self._io_lock:
+            with self._lock:
+                if self._files.get(full, (None, None))[1] is not data:
+                    return
+            try:
+                write_json_atomic(data, full)
+                mtime: int = os.stat(full).st_mtime_ns
+            except Exception as e:
+                if raise_errors:
+                    raise
+                error(f"Error writing {full}: {e}")
+                return
+        with self._lock:
+            # Our own write must not look like an external change
+            if self._files.get(full, (None, None))[1] is data:
+                self._files[full] = (mtime, data)
+
+    def _write_pending(self) -> None:
+        """Background writer, writes files once their delay has passed."""
+        while True:
+            with self._lock:
+                while True:
+                    now: float = time.monotonic()
+                    due: list[str] = [
+                        full for full, (t, _) in self._pending.items() if t <= now
+                    ]
+                    if due:
+                        break
+                    next_due: float | None = min(
+                        (t for t, _ in self._pending.values()), default=None
+                    )
+                    self._wake.wait(None if next_due is None else next_due - now)
+                batch: list[tuple[str, dict[str, object]]] = [
+                    (full, self._pending.pop(full)[1]) for full in due
+                ]
+            for full, data in batch:
+                self._write(full, data)
+
+
+# Shared by the view and the model
+config: ConfigStore = ConfigStore()
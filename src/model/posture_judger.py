@@ -18,23 +18,252 @@
 """
 This is an utility module for the main project which include functions to judge the posture of a person using coordinates of appropriate joints.
 """
+
 import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
 import numpy as np
 import logging
-import json
+from model.config_store import PROJECT_ROOT, config
+
 __author__: str = "Aviraj Saha"
 __date__: str = "2023-09-28"
 __purpose__: str = "Posture analysis using coordinates of body parts."
 __metadata__: tuple[str, ...] = None
 
-# Reading biometrics data from json file
-with open('user_data/biometrics.json', 'r', encoding='utf-8') as biometrics_file:
-    biometrics_data = json.loads(biometrics_file.read())
+# Profiles are resolved from the project root (`PROJECT_ROOT`), not the
+# working directory.
+BIOMETRICS_PATH: str = "user_data/biometrics.json"
+PROFILES_DIR: str = "user_data/profiles"
+DEFAULT_USER: str = "default"
+# User IDs name profile files, so they are limited to these characters.
+USER_ID_PATTERN: re.Pattern = re.compile(r"[A-Za-z0-9_-]{1,64}")
+# Compiled profiles kept by a `ProfileStore` before the oldest are dropped.
+MAX_PROFILES: int = 1024
+
+# Adjustable margins around the calibrated biometrics.
+HEAD_MARGIN: float = 0.10
+TILT_MARGIN: float = 2.0
+NOSE_MARGIN: float = 0.5
+# Distance margins are capped at this share of their baseline, so the
+# thresholds stay positive; the defaults on typical baselines (0.5 of 0.85,
+# 0.10 of 0.40) are well within it.
+MAX_MARGIN_SHARE: float = 0.75
+
+# Used until the calibrator has written a profile, centred on the original
+# fixed thresholds 0.35 < distance < 0.45, tilt >= 178 and shoulder to nose
+# distance > 0.35.
+UNCALIBRATED_BIOMETRICS: dict[str, float] = {
+    "head": 0.40,
+    "shoulder": 180.0,
+    "body": 0.85,
+}
+
+
+def profile_path(user_id: str | None = None) -> str:
+    """
+    Path of the biometrics profile of a user, relative to the project root.
+
+    Args:
+        user_id (str | None): User ID, None or "default" for the profile of
+            a single-user workstation.
+
+    Returns:
+        str: Relative profile path.
+
+    Raises:
+        ValueError: The user ID is not 1 to 64 letters, digits, `_` or `-`,
+            so it could name a file outside `PROFILES_DIR`.
+    """
+    if user_id in (None, DEFAULT_USER):
+        return BIOMETRICS_PATH
+    if not isinstance(user_id, str) or not USER_ID_PATTERN.fullmatch(user_id):
+        raise ValueError(f"Invalid user ID {user_id!r}")
+    return os.path.join(PROFILES_DIR, f"{user_id}.json")
+
+
+def load_biometrics(path: str = BIOMETRICS_PATH) -> dict[str, object]:
+    """
+    Read a biometrics profile written by `model.calibrator`.
+
+    Args:
+        path (str): Path of the profile, relative paths are resolved
+            against the project root.
+
+    Returns:
+        dict[str, object]: The profile, empty when the file is missing or
+        empty because the user has not been calibrated yet.
+    """
+    # Parsed again only when the file has changed
+    biometrics: dict[str, object] = config.get(path, refresh=True)
+    if not biometrics:
+        logging.warning(f"No biometrics in {path}, run the calibrator first.")
+    return biometrics
+
+
+@dataclass(frozen=True, slots=True)
+class ThresholdProfile:
+    """
+    Posture thresholds of one user, compiled from a biometrics profile.
+
+    All margins are applied and all values parsed once, so judging a frame
+    only reads float attributes.
+
+    Attributes:
+        user_id (str): User the thresholds belong to.
+        head_low (float): Shoulder distance must be above this.
+        head_high (float): Shoulder distance must be below this.
+        min_tilt (float): Shoulder tilt must be at least this (degrees).
+        min_nose_distance (float): Shoulder to nose distance must be above
+            this.
+    """
+
+    user_id: str
+    head_low: float
+    head_high: float
+    min_tilt: float
+    min_nose_distance: float
+
+    @classmethod
+    def from_biometrics(
+        cls,
+        biometrics: dict[str, object],
+        user_id: str = DEFAULT_USER,
+        head_margin: float | None = None,
+        tilt_margin: float | None = None,
+        nose_margin: float | None = None,
+    ) -> "ThresholdProfile":
+        """
+        Compile a biometrics profile into thresholds.
+
+        Margins not passed are taken from the profile's `margins`, which
+        the calibrator derives from the measured spread, else from the
+        defaults. The distance margins are capped at `MAX_MARGIN_SHARE` of
+        their baseline.
+
+        Args:
+            biometrics (dict[str, object]): Profile with `head`, `shoulder`
+                and `body` fields, and optionally `margins` by field.
+            user_id (str): User the profile belongs to.
+            head_margin (float | None): Margin around the shoulder distance,
+                `HEAD_MARGIN` when omitted.
+            tilt_margin (float | None): Margin below the shoulder tilt,
+                `TILT_MARGIN` when omitted.
+            nose_margin (float | None): Margin below the shoulder to nose
+                distance, `NOSE_MARGIN` when omitted.
+
+        Returns:
+            ThresholdProfile: The compiled thresholds.
+        """
+        head: float = float(biometrics["head"])
+        body: float = float(biometrics["body"])
+        margins: dict[str, object] = biometrics.get("margins") or {}
+        if head_margin is None:
+            head_margin = float(margins.get("head", HEAD_MARGIN))
+        if tilt_margin is None:
+            tilt_margin = float(margins.get("shoulder", TILT_MARGIN))
+        if nose_margin is None:
+            nose_margin = float(margins.get("body", NOSE_MARGIN))
+        head_margin = min(head_margin, MAX_MARGIN_SHARE * head)
+        nose_margin = min(nose_margin, MAX_MARGIN_SHARE * body)
+        return cls(
+            user_id=user_id,
+            head_low=head - head_margin,
+            head_high=head + head_margin,
+            min_tilt=float(biometrics["shoulder"]) - tilt_margin,
+            min_nose_distance=body - nose_margin,
+        )
+
+
+class ProfileStore:
+    """
+    Compiled threshold profiles by user ID, reloaded when their file changes.
+
+    The file of a profile is checked with `os.stat` at most once every
+    `check_interval` seconds and recompiled when its mtime has changed, so
+    calibrating a user takes effect without restarting the process. At most
+    `max_profiles` are kept, the least recently reloaded are dropped first.
+
+    Purpose: Share one workstation or server between several users.
+    Time Complexity: O(1) per lookup, O(file size) per reload.
+    Space Complexity: O(min(U, max_profiles)) - U users looked up.
+    """
+
+    def __init__(
+        self, check_interval: float = 1.0, max_profiles: int = MAX_PROFILES
+    ) -> None:
+        """
+        Args:
+            check_interval (float): Seconds between two mtime checks of the
+                same profile.
+            max_profiles (int): Profiles kept in memory.
+        """
+        self.check_interval: float = check_interval
+        self.max_profiles: int = max_profiles
+        # User ID -> (next check time, mtime_ns, profile)
+        self._entries: dict[str, tuple[float, int, ThresholdProfile]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, user_id: str = DEFAULT_USER) -> ThresholdProfile:
+        """
+        Return the current thresholds of a user.
+
+        Args:
+            user_id (str): User ID.
+
+        Returns:
+            ThresholdProfile: Thresholds, the uncalibrated defaults when the
+            user has no profile yet.
+
+        Raises:
+            ValueError: The user ID is invalid, see `profile_path`.
+        """
+        now: float = time.monotonic()
+        entry: tuple[float, int, ThresholdProfile] | None = self._entries.get(user_id)
+        if entry is not None and now < entry[0]:
+            return entry[2]
+        with self._lock:
+            return self._refresh(user_id, now)
+
+    def _refresh(self, user_id: str, now: float) -> ThresholdProfile:
+        """Reload the profile of `user_id` if its file has changed."""
+        path: str = profile_path(user_id)
+        try:
+            mtime: int = os.stat(os.path.join(PROJECT_ROOT, path)).st_mtime_ns
+        except FileNotFoundError:
+            mtime = -1
+        entry: tuple[float, int, ThresholdProfile] | None = self._entries.get(user_id)
+        if entry is not None and entry[1] == mtime:
+            profile: ThresholdProfile = entry[2]
+        else:
+            biometrics: dict[str, object] = (
+                load_biometrics(path) if mtime >= 0 else {}
+            ) or UNCALIBRATED_BIOMETRICS
+            profile = ThresholdProfile.from_biometrics(biometrics, user_id)
+        # Re-inserted so the dict stays ordered by the last reload
+        self._entries.pop(user_id, None)
+        self._entries[user_id] = (now + self.check_interval, mtime, profile)
+        while len(self._entries) > self.max_profiles:
+            del self._entries[next(iter(self._entries))]
+        return profile
+
+
+# Shared store of compiled profiles
+profiles: ProfileStore = ProfileStore()
 
 
 # Configure the logging module
 logging.basicConfig(level=logging.INFO)  # Set the logging level to INFO
 
+# MediaPipe pose landmark indices used by the batch judge.
+NOSE_INDEX: int = 0
+LEFT_SHOULDER_INDEX: int = 11
+RIGHT_SHOULDER_INDEX: int = 12
+LANDMARK_COUNT: int = 33
+
 
 def calculate_distance(
     point1: tuple[float, float], point2: tuple[float, float]
@@ -86,6 +315,7 @@ def isPosture_good(
     nose: tuple[float, float],
     # eyes: tuple[float, float],
     # lips: tuple[float, float],
+    profile: ThresholdProfile | None = None,
 ) -> bool:
     """
     Main function to check overall posture.
@@ -100,6 +330,8 @@ def isPosture_good(
         nose (tuple): A tuple (x, y) representing the nose.
         eyes (tuple): A tuple (x, y) representing the eyes.
         lips (tuple): A tuple (x, y) representing the lips.
+        profile (ThresholdProfile): Compiled thresholds of the user, the
+            default user's when omitted.
 
     Returns:
         bool: True if the posture is good, False if the posture is bad.
@@ -134,11 +366,17 @@ def isPosture_good(
 
     # Definng conditions:
     # condition1 = 0.45 > shoulder_distance > 0.35  # Adjustable threshold
-    condition1 = float(biometrics_data["head"]) + 0.10 > shoulder_distance > float(biometrics_data['head']) - 0.10  # Adjustable threshold
+    if profile is None:
+        profile = profiles.get()
+    condition1 = (
+        profile.head_high > shoulder_distance > profile.head_low
+    )  # Adjustable threshold
     # condition2 = shoulder_tilt >= 178  # Adjustable threshold
-    condition2 = shoulder_tilt >= float(biometrics_data['shoulder']) - 2  # Adjustable threshold
+    condition2 = shoulder_tilt >= profile.min_tilt  # Adjustable threshold
     # condition3 = shoulder_to_nose_distance > 0.35  # Adjustable threshold
-    condition3 = shoulder_to_nose_distance > float(biometrics_data['body']) - 0.5  # Adjustable threshold
+    condition3 = (
+        shoulder_to_nose_distance > profile.min_nose_distance
+    )  # Adjustable threshold
     # Taking intersection of all conditions
     is_good_posture: bool = condition1 and condition2 and condition3
 
@@ -156,6 +394,158 @@ def isPosture_good(
     )
 
 
+def isPosture_good_landmarks(
+    landmarks: np.ndarray, profile: ThresholdProfile | None = None
+) -> tuple:
+    """
+    Check the posture of one frame given as a landmark array.
+
+    Reads the joints `isPosture_good` needs from a (33, 4) array with one
+    slice, so judging costs the same however many joints are used. For a
+    single frame this is several times faster than `isPosture_good_batch`,
+    whose NumPy overhead only pays off across many frames.
+
+    Args:
+        landmarks (np.ndarray): (33, 4) landmarks, e.g. from
+            `posture_controller.landmarks_to_array`.
+        profile (ThresholdProfile): Compiled thresholds of the user, the
+            default user's when omitted.
+
+    Returns:
+        tuple: Same as `isPosture_good`.
+
+    Time Complexity:
+    O(1)
+
+    Space Complexity:
+    O(1)
+    """
+    # x and y of the nose, eyes, ears, mouth and shoulders as Python floats
+    joints: list[list[float]] = landmarks[: RIGHT_SHOULDER_INDEX + 1, :2].tolist()
+    return isPosture_good(
+        left_shoulder=joints[LEFT_SHOULDER_INDEX],
+        right_shoulder=joints[RIGHT_SHOULDER_INDEX],
+        nose=joints[NOSE_INDEX],
+        profile=profile,
+    )
+
+
+def posture_metrics_batch(landmarks: np.ndarray) -> np.ndarray:
+    """
+    Compute the posture metrics of many frames at once.
+
+    Args:
+        landmarks (np.ndarray): Array of shape (N, 33, 4) holding the
+            MediaPipe pose landmarks (x, y, z, visibility) of N frames.
+
+    Returns:
+        np.ndarray: (N, 3) array, columns are shoulder distance, shoulder
+        tilt (degrees) and shoulder to nose distance.
+
+    Mathematics:
+    Same formulas as `isPosture_good`, evaluated with NumPy ufuncs over
+    whole columns so no Python code runs per frame.
+
+    Time Complexity:
+    O(N) - One pass of a fixed number of ufuncs over the N frames.
+
+    Space Complexity:
+    O(N) - The returned metrics.
+
+    Possible Errors and How to Address Them:
+    - ValueError is raised when `landmarks` is not shaped (N, 33, 4).
+      - Stack per-frame landmark arrays with `np.stack` before calling.
+    """
+    landmarks = np.asarray(landmarks)
+    if landmarks.ndim != 3 or landmarks.shape[1:] != (LANDMARK_COUNT, 4):
+        raise ValueError(
+            f"Expected landmarks of shape (N, {LANDMARK_COUNT}, 4), "
+            f"got {landmarks.shape}"
+        )
+    # float16 recordings are promoted to float32, float64 stays float64.
+    dtype: np.dtype = np.result_type(landmarks.dtype, np.float32)
+    frame_count: int = landmarks.shape[0]
+
+    left_x: np.ndarray = landmarks[:, LEFT_SHOULDER_INDEX, 0]
+    left_y: np.ndarray = landmarks[:, LEFT_SHOULDER_INDEX, 1]
+
+    # Metrics are filled row by row and returned transposed so every ufunc
+    # writes into contiguous memory.
+    metrics: np.ndarray = np.empty((3, frame_count), dtype=dtype)
+    dx: np.ndarray = np.subtract(
+        landmarks[:, RIGHT_SHOULDER_INDEX, 0], left_x, dtype=dtype
+    )
+    dy: np.ndarray = np.subtract(
+        landmarks[:, RIGHT_SHOULDER_INDEX, 1], left_y, dtype=dtype
+    )
+
+    np.hypot(dx, dy, out=metrics[0])
+    shoulder_tilt: np.ndarray = np.arctan2(dy, dx, out=metrics[1])
+    np.degrees(shoulder_tilt, out=shoulder_tilt)
+    np.abs(shoulder_tilt, out=shoulder_tilt)
+    np.subtract(landmarks[:, NOSE_INDEX, 0], left_x, out=dx, dtype=dtype)
+    np.subtract(landmarks[:, NOSE_INDEX, 1], left_y, out=dy, dtype=dtype)
+    np.hypot(dx, dy, out=metrics[2])
+    return metrics.T
+
+
+def isPosture_good_batch(
+    landmarks: np.ndarray,
+    profile: ThresholdProfile | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized counterpart of `isPosture_good` for many frames at once.
+
+    Args:
+        landmarks (np.ndarray): Array of shape (N, 33, 4) holding the
+            MediaPipe pose landmarks (x, y, z, visibility) of N frames.
+        profile (ThresholdProfile): Compiled thresholds of the user, the
+            default user's when omitted.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]:
+            - is_good: (N,) bool, True where the posture is good.
+            - metrics: (N, 3) float, columns are shoulder distance,
+              shoulder tilt (degrees) and shoulder to nose distance.
+            - conditions: (N, 3) bool, the three conditions checked by
+              `isPosture_good`, in the same column order as `metrics`.
+
+    Mathematics:
+    Same formulas as `isPosture_good`, evaluated with NumPy ufuncs over
+    whole columns so no Python code runs per frame.
+
+    Time Complexity:
+    O(N) - One pass of a fixed number of ufuncs over the N frames.
+
+    Space Complexity:
+    O(N) - The returned metric and condition arrays.
+
+    Possible Errors and How to Address Them:
+    - ValueError is raised when `landmarks` is not shaped (N, 33, 4).
+      - Stack per-frame landmark arrays with `np.stack` before calling.
+    """
+    metrics: np.ndarray = posture_metrics_batch(landmarks).T
+    shoulder_distance: np.ndarray = metrics[0]
+    shoulder_tilt: np.ndarray = metrics[1]
+    shoulder_to_nose_distance: np.ndarray = metrics[2]
+    # Conditions are filled row by row and returned transposed so every
+    # ufunc writes into contiguous memory.
+    conditions: np.ndarray = np.empty((3, metrics.shape[1]), dtype=bool)
+
+    if profile is None:
+        profile = profiles.get()
+
+    # Same adjustable thresholds as `isPosture_good`.
+    np.less(shoulder_distance, profile.head_high, out=conditions[0])
+    conditions[0] &= shoulder_distance > profile.head_low
+    np.greater_equal(shoulder_tilt, profile.min_tilt, out=conditions[1])
+    np.greater(shoulder_to_nose_distance, profile.min_nose_distance, out=conditions[2])
+
+    is_good_posture: np.ndarray = np.logical_and(conditions[0], conditions[1])
+    is_good_posture &= conditions[2]
+    return is_good_posture, metrics.T, conditions.T
+
+
 # Example usage:
 if __name__ == "__main__":
     logging.info(__metadata__)
@@ -0,0 +1,519 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Declarative posture rules compiled into vectorized NumPy predicates.
+
+A rule set is a JSON file with named features and rules:
+
+```
+{
+    "version": 1,
+    "features": {
+        "shoulder_tilt": {"type": "tilt", "joints": ["LEFT_SHOULDER", "RIGHT_SHOULDER"]},
+        "torso_lean": {"type": "tilt", "joints": [["LEFT_HIP", "RIGHT_HIP"],
+                                                  ["LEFT_SHOULDER", "RIGHT_SHOULDER"]]}
+    },
+    "rules": [
+        {"name": "level_shoulders", "feature": "shoulder_tilt", "ge": "min_tilt"},
+        {"name": "upright_torso", "feature": "torso_lean", "ge": 75, "le": 105,
+         "required": false, "min_visibility": 0.5}
+    ]
+}
+```
+
+A joint is a `PoseLandmark` name, or a list of names for their midpoint.
+Feature types:
+- `distance`: Euclidean distance between two joints.
+- `tilt`: Absolute angle of the line between two joints, in degrees.
+- `angle`: Angle at the middle one of three joints, in degrees.
+- `dx`, `dy`: Offset from the first to the second joint.
+
+A feature may be divided by another one with `"scale": "<feature>"`. Rules
+bound a feature with `gt`, `ge`, `lt` and `le`, given as numbers or as the
+name of a `ThresholdProfile` attribute, so calibrated thresholds apply.
+Rules whose joints are less visible than `min_visibility` are not
+evaluated and pass; frames without landmarks (NaN) fail every rule. The
+verdict is good when every `required` rule passes.
+
+`compile_rules` turns the file into index and bound arrays once. Evaluating
+it reads only the landmarks the rules use and computes each feature type
+and all predicates with a fixed number of ufuncs over whole (rules, frames)
+arrays, so adding rules adds rows rather than Python work per frame.
+
+## Syntax
+```
+rules = load_rules()  # DEFAULT_RULES, recompiled when the file changes
+result = rules.evaluate(landmarks, judge.profiles.get())  # (N, 33, 4)
+result.good, result.passed, rules.diagnose(landmarks)
+```
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from model import posture_judger as judge
+from model.config_store import config
+
+__purpose__: str = "Judge posture with rules defined outside of Python."
+
+RULES_VERSION: int = 1
+DEFAULT_RULES: str = "src/model/config/posture_rules.json"
+FEATURE_TYPES: tuple[str, ...] = ("distance", "tilt", "angle", "dx", "dy")
+# Joints each feature type takes.
+FEATURE_JOINTS: dict[str, int] = {
+    "distance": 2,
+    "tilt": 2,
+    "angle": 3,
+    "dx": 2,
+    "dy": 2,
+}
+BOUNDS: tuple[str, ...] = ("gt", "ge", "lt", "le")
+# Profiles whose compiled bounds are kept per rule set.
+MAX_CACHED_BOUNDS: int = 64
+
+# `PoseLandmark` names in landmark order, without importing MediaPipe.
+LANDMARK_NAMES: tuple[str, ...] = (
+    "NOSE",
+    "LEFT_EYE_INNER",
+    "LEFT_EYE",
+    "LEFT_EYE_OUTER",
+    "RIGHT_EYE_INNER",
+    "RIGHT_EYE",
+    "RIGHT_EYE_OUTER",
+    "LEFT_EAR",
+    "RIGHT_EAR",
+    "MOUTH_LEFT",
+    "MOUTH_RIGHT",
+    "LEFT_SHOULDER",
+    "RIGHT_SHOULDER",
+    "LEFT_ELBOW",
+    "RIGHT_ELBOW",
+    "LEFT_WRIST",
+    "RIGHT_WRIST",
+    "LEFT_PINKY",
+    "RIGHT_PINKY",
+    "LEFT_INDEX",
+    "RIGHT_INDEX",
+    "LEFT_THUMB",
+    "RIGHT_THUMB",
+    "LEFT_HIP",
+    "RIGHT_HIP",
+    "LEFT_KNEE",
+    "RIGHT_KNEE",
+    "LEFT_ANKLE",
+    "RIGHT_ANKLE",
+    "LEFT_HEEL",
+    "RIGHT_HEEL",
+    "LEFT_FOOT_INDEX",
+    "RIGHT_FOOT_INDEX",
+)
+LANDMARK_INDEX: dict[str, int] = {name: i for i, name in enumerate(LANDMARK_NAMES)}
+
+
+@dataclass(frozen=True, slots=True)
+class RuleResults:
+    """
+    Outcome of evaluating a rule set on N frames.
+
+    Attributes:
+        good (np.ndarray): (N,) bool, every required rule passed.
+        passed (np.ndarray): (N, R) bool, per rule, True when not evaluated.
+        evaluated (np.ndarray): (N, R) bool, the rule's joints were visible.
+        features (np.ndarray): (N, F) float, feature values, NaN where
+            undefined.
+    """
+
+    good: np.ndarray
+    passed: np.ndarray
+    evaluated: np.ndarray
+    features: np.ndarray
+
+
+class RuleSet:
+    """
+    A compiled rule set.
+
+    Purpose: Many posture rules at the cost of a few array operations.
+    Time Complexity: O(N * (F + R)) per evaluation, a fixed number of
+        NumPy calls - N frames, F features, R rules.
+    Space Complexity: O(N * (F + R))
+    """
+
+    def __init__(self, definition: dict[str, object]) -> None:
+        """
+        Args:
+            definition (dict[str, object]): Parsed rule set file.
+
+        Raises:
+            ValueError: The rule set is malformed, with the offending
+                feature or rule named.
+        """
+        if definition.get("version", RULES_VERSION) != RULES_VERSION:
+            raise ValueError(f"Unsupported rule set version {definition['version']}")
+        features: dict[str, dict] = definition.get("features", {})
+        rules: list[dict] = definition.get("rules", [])
+        if not rules:
+            raise ValueError("Rule set has no rules")
+
+        self._definition_features: dict[str, dict] = features
+        self.feature_names: tuple[str, ...] = tuple(features)
+        feature_index: dict[str, int] = {n: i for i, n in enumerate(features)}
+        # Distinct points (joints or midpoints) by their landmark indices
+        points: dict[tuple[int, ...], int] = {}
+        feature_points: list[list[int]] = []
+        types: list[str] = []
+        for name, spec in features.items():
+            kind: str = spec.get("type", "")
+            if kind not in FEATURE_TYPES:
+                raise ValueError(f"Feature {name}: unknown type {kind!r}")
+            joints: list = spec.get("joints", [])
+            if len(joints) != FEATURE_JOINTS[kind]:
+                raise ValueError(
+                    f"Feature {name}: {kind} takes {FEATURE_JOINTS[kind]} joints"
+                )
+            slots: list[int] = []
+            for joint in joints:
+                key: tuple[int, ...] = self._joint(name, joint)
+                slots.append(points.setdefault(key, len(points)))
+            # Two-joint features are padded to three, the third is unused
+            feature_points.append(slots + slots[-1:] * (3 - len(slots)))
+            types.append(kind)
+
+        # Only the landmarks the points use are read from each frame
+        self._landmarks: np.ndarray = np.unique(np.concatenate(list(points)))
+        column: dict[int, int] = {j: i for i, j in enumerate(self._landmarks)}
+        # Points grouped by their number of joints: (point slots, columns)
+        self._point_groups: list[tuple[np.ndarray, np.ndarray]] = [
+            (
+                np.array([p for k, p in points.items() if len(k) == size], np.intp),
+                np.array(
+                    [[column[j] for j in k] for k in points if len(k) == size],
+                    np.intp,
+                ),
+            )
+            for size in sorted({len(key) for key in points})
+        ]
+        self._point_count: int = len(points)
+        self._feature_points: np.ndarray = np.array(feature_points, dtype=np.intp)
+        self._groups: dict[str, np.ndarray] = {
+            kind: np.flatnonzero(np.array(types) == kind)
+            for kind in FEATURE_TYPES
+            if kind in types
+        }
+        scaled: list[tuple[int, int]] = []
+        for name, spec in features.items():
+            if "scale" in spec:
+                if spec["scale"] not in feature_index:
+                    raise ValueError(f"Feature {name}: unknown scale {spec['scale']}")
+                if "scale" in features[spec["scale"]]:
+                    raise ValueError(f"Feature {name}: scale must not be scaled")
+                scaled.append((feature_index[name], feature_index[spec["scale"]]))
+        self._scaled: np.ndarray = np.array(scaled, dtype=np.intp).reshape(-1, 2)
+
+        self.rule_names: tuple[str, ...] = tuple(rule.get("name", "") for rule in rules)
+        if len(set(self.rule_names)) != len(rules) or "" in self.rule_names:
+            raise ValueError("Rule names must be unique and not empty")
+        self._rules: list[dict] = rules
+        self._rule_features: np.ndarray = np.empty(len(rules), dtype=np.intp)
+        self._inclusive: np.ndarray = np.zeros((2, len(rules)), dtype=bool)
+        self.required: np.ndarray = np.empty(len(rules), dtype=bool)
+        self._min_visibility: np.ndarray = np.empty(len(rules), dtype=np.float32)
+        for i, rule in enumerate(rules):
+            if rule.get("feature") not in feature_index:
+                raise ValueError(f"Rule {rule['name']}: unknown feature")
+            if not any(bound in rule for bound in BOUNDS):
+                raise ValueError(f"Rule {rule['name']}: no bound")
+            if ("gt" in rule and "ge" in rule) or ("lt" in rule and "le" in rule):
+                raise ValueError(f"Rule {rule['name']}: conflicting bounds")
+            for bound in BOUNDS:
+                value: object = rule.get(bound)
+                if isinstance(value, str):
+                    if value not in judge.ThresholdProfile.__slots__:
+                        raise ValueError(
+                            f"Rule {rule['name']}: unknown threshold {value}"
+                        )
+                elif bound in rule and (
+                    isinstance(value, bool) or not isinstance(value, (int, float))
+                ):
+                    raise ValueError(f"Rule {rule['name']}: {bound} is not a number")
+            self._rule_features[i] = feature_index[rule["feature"]]
+            self._inclusive[:, i] = ("ge" in rule, "le" in rule)
+            self.required[i] = bool(rule.get("required", True))
+            self._min_visibility[i] = float(rule.get("min_visibility", 0.0))
+        self._bounds: dict[judge.ThresholdProfile, np.ndarray] = {}
+
+    @staticmethod
+    def _joint(feature: str, joint: str | list[str]) -> tuple[int, ...]:
+        """Landmark indices of a joint or midpoint."""
+        names: list[str] = [joint] if isinstance(joint, str) else list(joint)
+        try:
+            return tuple(sorted(LANDMARK_INDEX[name] for name in names))
+        except KeyError as e:
+            raise ValueError(f"Feature {feature}: unknown joint {e.args[0]}") from None
+
+    def bounds(self, profile: judge.ThresholdProfile | None = None) -> np.ndarray:
+        """
+        (2, R) lower and upper bounds with the profile's thresholds filled in.
+
+        Compiled once per profile, -inf and inf stand for missing bounds.
+        Without a profile the default user's current one is used, so a
+        recalibration is picked up.
+        """
+        profile = profile or judge.profiles.get()
+        bounds: np.ndarray | None = self._bounds.get(profile)
+        if bounds is None:
+            bounds = np.empty((2, len(self._rules)), dtype=np.float64)
+            for i, rule in enumerate(self._rules):
+                for row, names, default in (
+                    (0, ("gt", "ge"), -np.inf),
+                    (1, ("lt", "le"), np.inf),
+                ):
+                    value: object = next((rule[n] for n in names if n in rule), default)
+                    if isinstance(value, str):
+                        value = getattr(profile, value)
+                    bounds[row, i] = float(value)
+            if len(self._bounds) >= MAX_CACHED_BOUNDS:
+                # Recalibrations leave outdated profiles behind
+                self._bounds.clear()
+            self._bounds[profile] = bounds
+        return bounds
+
+    def _rows(self, landmarks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (F, N) feature values and lowest visibilities of N frames.
+
+        Arrays are laid out one row per point or feature, so every gather
+        copies whole rows; numpy indexes short trailing axes slowly.
+        """
+        landmarks = np.asarray(landmarks, dtype=np.float32).reshape(
+            -1, judge.LANDMARK_COUNT, 4
+        )
+        # (4, L, N) views of the used landmarks
+        columns: np.ndarray = np.take(landmarks, self._landmarks, axis=1).T
+        x, y, landmark_visibility = columns[0], columns[1], columns[3]
+
+        # (P, N) positions and lowest visibility of all points
+        shape: tuple[int, int] = (self._point_count, len(landmarks))
+        point_x: np.ndarray = np.empty(shape)
+        point_y: np.ndarray = np.empty(shape)
+        point_visibility: np.ndarray = np.empty(shape, dtype=np.float32)
+        for slots, joints in self._point_groups:
+            sum_x: np.ndarray = x[joints[:, 0]].astype(np.float64)
+            sum_y: np.ndarray = y[joints[:, 0]].astype(np.float64)
+            lowest: np.ndarray = landmark_visibility[joints[:, 0]]
+            for joint in joints.T[1:]:
+                sum_x += x[joint]
+                sum_y += y[joint]
+                lowest = np.minimum(lowest, landmark_visibility[joint])
+            point_x[slots] = sum_x / joints.shape[1]
+            point_y[slots] = sum_y / joints.shape[1]
+            point_visibility[slots] = lowest
+
+        # (F, 3, N) joints of every feature
+        joint_x: np.ndarray = point_x[self._feature_points]
+        joint_y: np.ndarray = point_y[self._feature_points]
+        visibility: np.ndarray = point_visibility[self._feature_points].min(axis=1)
+        first_x: np.ndarray = joint_x[:, 1] - joint_x[:, 0]
+        first_y: np.ndarray = joint_y[:, 1] - joint_y[:, 0]
+
+        values: np.ndarray = np.empty(first_x.shape, dtype=np.float64)
+        for kind, index in self._groups.items():
+            dx: np.ndarray = first_x[index]
+            dy: np.ndarray = first_y[index]
+            if kind == "distance":
+                values[index] = np.hypot(dx, dy)
+            elif kind == "tilt":
+                values[index] = np.abs(np.degrees(np.arctan2(dy, dx)))
+            elif kind == "dx":
+                values[index] = dx
+            elif kind == "dy":
+                values[index] = dy
+            else:
+                # Angle at the middle joint between the limbs to both ends
+                ahead_x: np.ndarray = joint_x[index, 2] - joint_x[index, 1]
+                ahead_y: np.ndarray = joint_y[index, 2] - joint_y[index, 1]
+                values[index] = np.abs(
+                    np.degrees(
+                        np.arctan2(
+                            dy * ahead_x - dx * ahead_y,
+                            -(dx * ahead_x + dy * ahead_y),
+                        )
+                    )
+                )
+        if len(self._scaled):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values[self._scaled[:, 0]] /= values[self._scaled[:, 1]]
+        return values, visibility
+
+    def features(self, landmarks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Compute every feature of N frames.
+
+        Args:
+            landmarks (np.ndarray): (N, 33, 4) or (33, 4) landmarks.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (N, F) feature values and the
+            (N, F) lowest visibility among each feature's joints.
+        """
+        values, visibility = self._rows(landmarks)
+        return values.T, visibility.T
+
+    def evaluate(
+        self, landmarks: np.ndarray, profile: judge.ThresholdProfile | None = None
+    ) -> RuleResults:
+        """
+        Evaluate every rule on N frames in one vectorized pass.
+
+        Args:
+            landmarks (np.ndarray): (N, 33, 4) or (33, 4) landmarks.
+            profile (ThresholdProfile | None): Thresholds named by rules, the
+                default user's when omitted.
+
+        Returns:
+            RuleResults: Verdicts, per-rule results and feature values.
+        """
+        values, visibility = self._rows(landmarks)
+        # (R, N) from here on, one row per rule
+        rule_values: np.ndarray = values[self._rule_features]
+        bounds: np.ndarray = self.bounds(profile)[..., np.newaxis]
+        low: np.ndarray = np.where(
+            self._inclusive[0, :, np.newaxis],
+            rule_values >= bounds[0],
+            rule_values > bounds[0],
+        )
+        high: np.ndarray = np.where(
+            self._inclusive[1, :, np.newaxis],
+            rule_values <= bounds[1],
+            rule_values < bounds[1],
+        )
+        # Frames without landmarks (NaN) are evaluated, and fail
+        evaluated: np.ndarray = ~(
+            visibility[self._rule_features] < self._min_visibility[:, np.newaxis]
+        )
+        passed: np.ndarray = (low & high) | ~evaluated
+        good: np.ndarray = passed[self.required].all(axis=0)
+        return RuleResults(good, passed.T, evaluated.T, values.T)
+
+    def subset(self, names: list[str] | tuple[str, ...]) -> "RuleSet":
+        """A rule set of only the named rules and the features they use."""
+        rules: list[dict] = [rule for rule in self._rules if rule["name"] in names]
+        used: set[str] = {rule["feature"] for rule in rules}
+        features: dict[str, dict] = dict(self._definition_features)
+        used |= {features[name]["scale"] for name in used if "scale" in features[name]}
+        return RuleSet(
+            {
+                "version": RULES_VERSION,
+                "features": {n: s for n, s in features.items() if n in used},
+                "rules": rules,
+            }
+        )
+
+    def diagnose(
+        self,
+        landmarks: np.ndarray,
+        profile: judge.ThresholdProfile | None = None,
+        repeats: int = 20,
+    ) -> dict[str, object]:
+        """
+        Per-rule pass rates and evaluation costs, for tuning rule sets.
+
+        The cost of a rule is the time of evaluating it alone, so it
+        includes its feature; `total_us` is the time of the whole set,
+        which is less than the sum because the passes are shared.
+
+        Args:
+            landmarks (np.ndarray): (N, 33, 4) landmarks.
+            profile (ThresholdProfile | None): Thresholds named by rules.
+            repeats (int): Timed evaluations per measurement, the fastest
+                one is reported.
+
+        Returns:
+            dict[str, object]: `frames`, `good_ratio`, `total_us` and per
+            rule `pass_ratio`, `evaluated_ratio`, `mean` of its feature and
+            `cost_us`.
+        """
+
+        def cost(rule_set: RuleSet) -> float:
+            best: float = float("inf")
+            for _ in range(repeats):
+                start: int = time.perf_counter_ns()
+                rule_set.evaluate(landmarks, profile)
+                best = min(best, time.perf_counter_ns() - start)
+            return best / 1e3
+
+        result: RuleResults = self.evaluate(landmarks, profile)
+        rules: dict[str, dict[str, float]] = {}
+        for i, name in enumerate(self.rule_names):
+            column: np.ndarray = result.features[:, self._rule_features[i]]
+            evaluated: np.ndarray = result.evaluated[:, i]
+            rules[name] = {
+                "required": bool(self.required[i]),
+                "pass_ratio": float(result.passed[:, i].mean()),
+                "evaluated_ratio": float(evaluated.mean()),
+                "mean": (
+                    float(np.nanmean(column[evaluated])) if evaluated.any() else None
+                ),
+                "cost_us": cost(self.subset([name])),
+            }
+        return {
+            "frames": len(result.good),
+            "good_ratio": float(result.good.mean()),
+            "total_us": cost(self),
+            "rules": rules,
+        }
+
+
+def compile_rules(definition: dict[str, object]) -> RuleSet:
+    """
+    Compile a parsed rule set.
+
+    Args:
+        definition (dict[str, object]): Contents of a rule set file.
+
+    Returns:
+        RuleSet: The compiled rules.
+
+    Raises:
+        ValueError: The rule set is malformed.
+    """
+    return RuleSet(definition)
+
+
+# Compiled rule sets by path, with the parsed file they were compiled from
+_compiled: dict[str, tuple[dict[str, object], RuleSet]] = {}
+
+
+def load_rules(path: str = DEFAULT_RULES) -> RuleSet:
+    """
+    Load and compile a rule set file, compiled again only when it changes.
+
+    Args:
+        path (str): Rule set file, relative paths are resolved against the
+            project root.
+
+    Returns:
+        RuleSet: The compiled rules.
+    """
+    definition: dict[str, object] = config.get(path, refresh=True)
+    cached: tuple[dict[str, object], RuleSet] | None = _compiled.get(path)
+    if cached is None or cached[0] is not definition:
+        cached = _compiled[path] = (definition, compile_rules(definition))
+    return cached[1]
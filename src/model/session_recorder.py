@@ -0,0 +1,395 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Append-only columnar recorder for posture sessions.
+
+Every judged frame is appended as one row of fixed-width binary columns:
+timestamps, the 33x4 pose landmarks (float16), the three posture metrics
+and the verdict flags. A session directory holds numbered segments, each
+with one raw file per column, plus a small binary time index with one row
+per closed segment. Raw files can be memory-mapped, so a time-range query
+only reads the segments and pages it touches.
+
+Rows are staged in preallocated blocks on the caller's thread and written
+by a background writer, so appending never waits on the disk.
+
+## Layout
+```
+user_data/sessions/<session>/
+    schema.json            # Column dtypes and row shapes
+    index.f8               # (segment, first time, last time, rows) per segment
+    seg_000000/timestamps.f8
+    seg_000000/landmarks.f2
+    seg_000000/metrics.f4
+    seg_000000/flags.u1
+```
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from logging import error, warning
+
+import numpy as np
+
+from model.config_store import PROJECT_ROOT
+
+__purpose__: str = "Record and query per-frame posture data of sessions."
+
+SCHEMA_VERSION: int = 1
+# Resolved from the project root like the profiles, not the working directory
+SESSIONS_DIR: str = os.path.join(PROJECT_ROOT, "user_data", "sessions")
+INDEX_FILE: str = "index.f8"
+SCHEMA_FILE: str = "schema.json"
+
+# Flag columns of the flags file.
+FLAG_COLUMNS: tuple[str, ...] = (
+    "detected",
+    "good",
+    "condition1",
+    "condition2",
+    "condition3",
+)
+# Column name -> (file name, dtype, row shape)
+COLUMNS: dict[str, tuple[str, np.dtype, tuple[int, ...]]] = {
+    "timestamps": ("timestamps.f8", np.dtype("<f8"), ()),
+    "landmarks": ("landmarks.f2", np.dtype("<f2"), (33, 4)),
+    "metrics": ("metrics.f4", np.dtype("<f4"), (3,)),
+    "flags": ("flags.u1", np.dtype("u1"), (len(FLAG_COLUMNS),)),
+}
+INDEX_DTYPE: np.dtype = np.dtype("<f8")
+INDEX_WIDTH: int = 4
+
+
+def _segment_name(number: int) -> str:
+    """Directory name of segment `number`."""
+    return f"seg_{number:06d}"
+
+
+class _Block:
+    """Preallocated staging rows for every column."""
+
+    def __init__(self, rows: int) -> None:
+        self.columns: dict[str, np.ndarray] = {
+            name: np.empty((rows, *shape), dtype=dtype)
+            for name, (_, dtype, shape) in COLUMNS.items()
+        }
+        self.size: int = 0
+
+
+class SessionRecorder:
+    """
+    Record judged frames of one session to segmented column files.
+
+    Purpose: Keep landmarks, metrics and verdicts of every frame.
+    Time Complexity: O(1) per appended frame.
+    Space Complexity: O(block_rows * queue_blocks) staged rows.
+    """
+
+    def __init__(
+        self,
+        root: str = SESSIONS_DIR,
+        session_id: str | None = None,
+        segment_rows: int = 18000,
+        block_rows: int = 64,
+        queue_blocks: int = 64,
+    ) -> None:
+        """
+        Args:
+            root (str): Directory holding all sessions.
+            session_id (str | None): Session directory name, defaults to the
+                local start time to the millisecond. When the directory
+                exists, e.g. for two recorders started together, a suffix
+                `-1`, `-2`, ... is added instead of sharing it.
+            segment_rows (int): Rows per segment, 18000 is 5 min at 60 fps.
+            block_rows (int): Rows staged before a block goes to the writer.
+            queue_blocks (int): Blocks that may wait for the writer before
+                further rows are dropped instead of stalling the caller.
+        """
+        if session_id is None:
+            now: float = time.time()
+            session_id = (
+                f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}"
+                f"-{int(now % 1 * 1000):03d}"
+            )
+        os.makedirs(root, exist_ok=True)
+        suffix: int = 0
+        while True:
+            self.session_id: str = f"{session_id}-{suffix}" if suffix else session_id
+            self.path: str = os.path.join(root, self.session_id)
+            try:
+                os.mkdir(self.path)
+                break
+            except FileExistsError:
+                suffix += 1
+        with open(
+            os.path.join(self.path, SCHEMA_FILE), "w", encoding="utf-8"
+        ) as schema_file:
+            json.dump(
+                {
+                    "version": SCHEMA_VERSION,
+                    "columns": {
+                        name: {
+                            "file": file_name,
+                            "dtype": dtype.str,
+                            "shape": list(shape),
+                        }
+                        for name, (file_name, dtype, shape) in COLUMNS.items()
+                    },
+                    "flags": list(FLAG_COLUMNS),
+                },
+                schema_file,
+                indent=4,
+            )
+        self.segment_rows: int = segment_rows
+        self.block_rows: int = block_rows
+        self._free: queue.SimpleQueue = queue.SimpleQueue()
+        # One block being filled, one being written and a full queue.
+        for _ in range(queue_blocks + 2):
+            self._free.put(_Block(block_rows))
+        self._block: _Block = self._free.get()
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_blocks)
+        self._thread: threading.Thread = threading.Thread(
+            target=self._write_loop, name="sitfix-recorder", daemon=True
+        )
+        self._thread.start()
+        self.rows_appended: int = 0
+        self.rows_dropped: int = 0
+        # Writer state, only touched on the writer thread.
+        self._segment: int = -1
+        self._segment_size: int = 0
+        self._segment_times: list[float] = []
+        self._files: dict[str, object] = {}
+
+    def append(
+        self,
+        timestamp: float,
+        landmarks: np.ndarray | None,
+        metrics: tuple[float, float, float] | np.ndarray | None,
+        flags: tuple[bool, ...],
+    ) -> None:
+        """
+        Stage one judged frame.
+
+        Args:
+            timestamp (float): Epoch time of the frame in seconds.
+            landmarks (np.ndarray | None): (33, 4) landmarks, None when
+                nobody was detected.
+            metrics (tuple | np.ndarray | None): Shoulder distance, shoulder
+                tilt and shoulder to nose distance.
+            flags (tuple[bool, ...]): Values of `FLAG_COLUMNS`.
+        """
+        block: _Block = self._block
+        row: int = block.size
+        columns: dict[str, np.ndarray] = block.columns
+        columns["timestamps"][row] = timestamp
+        if landmarks is None:
+            columns["landmarks"][row] = np.nan
+        else:
+            columns["landmarks"][row] = landmarks
+        columns["metrics"][row] = np.nan if metrics is None else metrics
+        columns["flags"][row] = flags
+        block.size += 1
+        self.rows_appended += 1
+        if block.size == self.block_rows:
+            self._submit()
+
+    def _submit(self) -> None:
+        """Hand the staged block to the writer and take a free one."""
+        block: _Block = self._block
+        try:
+            self._queue.put_nowait(block)
+            self._block = self._free.get()
+        except queue.Full:
+            # The disk cannot keep up: drop rows rather than stall the loop.
+            self.rows_dropped += block.size
+        self._block.size = 0
+
+    def _write_loop(self) -> None:
+        """Writer thread, appends blocks to the column files."""
+        while True:
+            block: _Block | None = self._queue.get()
+            if block is None:
+                break
+            try:
+                self._write_block(block)
+            except Exception as e:
+                error(f"Error writing session block: {e}")
+            finally:
+                self._free.put(block)
+        self._close_segment()
+
+    def _write_block(self, block: _Block) -> None:
+        """Write a block, rolling over to new segments as they fill up."""
+        start: int = 0
+        while start < block.size:
+            if self._segment < 0 or self._segment_size == self.segment_rows:
+                self._close_segment()
+                self._open_segment()
+            rows: int = min(block.size - start, self.segment_rows - self._segment_size)
+            for name, column in block.columns.items():
+                column[start : start + rows].tofile(self._files[name])
+            timestamps: np.ndarray = block.columns["timestamps"]
+            if not self._segment_times:
+                self._segment_times.append(float(timestamps[start]))
+            self._segment_times[1:] = [float(timestamps[start + rows - 1])]
+            self._segment_size += rows
+            start += rows
+        for column_file in self._files.values():
+            column_file.flush()
+
+    def _open_segment(self) -> None:
+        """Create the next segment directory and open its column files."""
+        self._segment += 1
+        directory: str = os.path.join(self.path, _segment_name(self._segment))
+        os.makedirs(directory, exist_ok=True)
+        self._files = {
+            name: open(os.path.join(directory, file_name), "ab")
+            for name, (file_name, _, _) in COLUMNS.items()
+        }
+        self._segment_size = 0
+        self._segment_times = []
+
+    def _close_segment(self) -> None:
+        """Close the column files and append the segment to the index."""
+        if not self._files:
+            return
+        for column_file in self._files.values():
+            column_file.close()
+        self._files = {}
+        if self._segment_size:
+            first: float = self._segment_times[0]
+            last: float = self._segment_times[-1]
+            with open(os.path.join(self.path, INDEX_FILE), "ab") as index_file:
+                np.array(
+                    [self._segment, first, last, self._segment_size],
+                    dtype=INDEX_DTYPE,
+                ).tofile(index_file)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Write the staged rows, close the last segment and stop the writer."""
+        if not self._thread.is_alive():
+            return
+        if self._block.size:
+            self._queue.put(self._block)
+            self._block = _Block(0)
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self.rows_dropped:
+            warning(f"Session recorder dropped {self.rows_dropped} rows")
+
+
+class SessionReader:
+    """
+    Memory-mapped, time-indexed access to a recorded session.
+
+    Purpose: Read time ranges of a session without loading all of it.
+    Time Complexity: O(S + log N) per query, S segments, N rows.
+    Space Complexity: O(rows returned)
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): Session directory written by `SessionRecorder`.
+        """
+        self.path: str = path
+        self.index: np.ndarray = self._load_index()
+
+    def _load_index(self) -> np.ndarray:
+        """Read the time index, adding a row for an unclosed last segment."""
+        index_path: str = os.path.join(self.path, INDEX_FILE)
+        index: np.ndarray = (
+            np.fromfile(index_path, dtype=INDEX_DTYPE).reshape(-1, INDEX_WIDTH)
+            if os.path.exists(index_path)
+            else np.empty((0, INDEX_WIDTH), dtype=INDEX_DTYPE)
+        )
+        indexed: set[int] = {int(segment) for segment in index[:, 0]}
+        rows: list[np.ndarray] = [index]
+        for name in sorted(os.listdir(self.path)):
+            if not name.startswith("seg_") or int(name[4:]) in indexed:
+                continue
+            timestamps: np.ndarray = self._column(int(name[4:]), "timestamps")
+            if len(timestamps):
+                rows.append(
+                    np.array(
+                        [
+                            [
+                                int(name[4:]),
+                                timestamps[0],
+                                timestamps[-1],
+                                len(timestamps),
+                            ]
+                        ],
+                        dtype=INDEX_DTYPE,
+                    )
+                )
+        return np.concatenate(rows)
+
+    def _column(self, segment: int, name: str) -> np.ndarray:
+        """Memory-map one column of one segment."""
+        file_name, dtype, shape = COLUMNS[name]
+        column_path: str = os.path.join(self.path, _segment_name(segment), file_name)
+        row_bytes: int = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        rows: int = os.path.getsize(column_path) // row_bytes
+        if rows == 0:
+            return np.empty((0, *shape), dtype=dtype)
+        return np.memmap(column_path, dtype=dtype, mode="r", shape=(rows, *shape))
+
+    @property
+    def frame_count(self) -> int:
+        """Number of recorded rows."""
+        return int(self.index[:, 3].sum())
+
+    def query(
+        self, start: float = -np.inf, end: float = np.inf
+    ) -> dict[str, np.ndarray]:
+        """
+        Read all rows with `start <= timestamp < end`.
+
+        Args:
+            start (float): First epoch time included.
+            end (float): First epoch time excluded.
+
+        Returns:
+            dict[str, np.ndarray]: One array per column of `COLUMNS`.
+        """
+        parts: dict[str, list[np.ndarray]] = {name: [] for name in COLUMNS}
+        for segment, first, last, _ in self.index:
+            if last < start or first >= end:
+                continue
+            timestamps: np.ndarray = self._column(int(segment), "timestamps")
+            low: int = int(np.searchsorted(timestamps, start, side="left"))
+            high: int = int(np.searchsorted(timestamps, end, side="left"))
+            for name in COLUMNS:
+                column: np.ndarray = (
+                    timestamps
+                    if name == "timestamps"
+                    else self._column(int(segment), name)
+                )
+                parts[name].append(np.asarray(column[low:high]))
+        return {
+            name: (
+                np.concatenate(arrays)
+                if arrays
+                else np.empty((0, *COLUMNS[name][2]), dtype=COLUMNS[name][1])
+            )
+            for name, arrays in parts.items()
+        }
@@ -0,0 +1,205 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+This module contains the decoded image cache and theme switching of the `view` module.
+
+Background images are decoded and resized to the window size once per
+theme, on a background thread, and their `PhotoImage`s are created once and
+shared by every window that shows them. The current theme is preloaded
+first and the other themes right after it, so switching themes only swaps
+cached images and colors on the widgets registered with `assets`, without
+restarting the application.
+
+### Note:
+ Do not run this module as a script.
+
+## Metadata
+- `Purpose:` Decode images once and switch themes live in the Graphical User Interface (GUI).
+"""
+
+# Imports
+import queue
+import threading
+from lazy_import import lazy_module
+
+# Lazy Imports
+logging = lazy_module("logging")
+
+# Globals
+WINDOW_SIZE: tuple[int, int] = (715, 535)
+POLL_MS: int = 15
+
+# Background image of every window, per theme.
+THEME_IMAGES: dict[str, dict[str, str]] = {
+    "light": {"home": "imgs/1.png", "updates": "imgs/3.png", "stats": "imgs/11.png"},
+    "dark": {"home": "imgs/2.png", "updates": "imgs/4.png", "stats": "imgs/13.png"},
+}
+
+# Widget color roles, per theme.
+THEME_COLORS: dict[str, dict[str, str]] = {
+    "light": {"bg": "white", "fg": "black", "panel": "white", "accent": "black"},
+    "dark": {"bg": "gray14", "fg": "white", "panel": "gray21", "accent": "yellow"},
+}
+
+
+class AssetCache:
+    """
+    Decoded, pre-sized theme images and the widgets that show them.
+
+    ### Parameters
+    - `theme` (str): Initial theme, "light" or "dark".
+    - `size` (tuple[int, int]): (width, height) every background is resized to.
+
+    ### Example
+    ```python
+    assets.preload()
+    assets.background(root, label, "home")
+    assets.themed(link_label, bg="bg", fg="fg")
+    assets.set_theme("dark")
+    ```
+    """
+
+    def __init__(
+        self, theme: str = "light", size: tuple[int, int] = WINDOW_SIZE
+    ) -> None:
+        self.theme: str = theme
+        self.size: tuple[int, int] = size
+        self._decoded: dict[tuple[str, str], object] = {}  # PIL images
+        self._photos: dict[tuple[str, str], object] = {}  # Tk images
+        self._lock: threading.Lock = threading.Lock()
+        self._pending: queue.Queue[str] = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self._backgrounds: list[tuple[object, str]] = []
+        self._colored: list[tuple[object, dict[str, str]]] = []
+
+    def preload(self, theme: str | None = None) -> None:
+        """
+        Decodes the images of `theme`, then of every other theme, in the background.
+
+        ### Parameters
+        - `theme` (str | None): Theme decoded first, None for the current one.
+        """
+        first: str = theme or self.theme
+        for name in (first, *(t for t in THEME_IMAGES if t != first)):
+            self._pending.put(name)
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._decode_pending, name="sitfix-assets", daemon=True
+                )
+                self._worker.start()
+
+    def _decode_pending(self) -> None:
+        """Background thread, decodes and resizes the queued themes."""
+        from PIL import Image
+
+        while True:
+            theme: str = self._pending.get()
+            for name, path in THEME_IMAGES[theme].items():
+                if (theme, name) in self._decoded:
+                    continue
+                try:
+                    with Image.open(path) as image:
+                        decoded = image.convert("RGB").resize(
+                            self.size, Image.Resampling.LANCZOS
+                        )
+                    self._decoded[theme, name] = decoded
+                except Exception as e:
+                    logging.error(f"Error loading image {path}: {e}")
+                    self._decoded[theme, name] = None
+
+    def photo(self, theme: str, name: str):
+        """
+        Returns the shared `PhotoImage`, or None until it is decoded.
+
+        Must be called on the Tk thread.
+        """
+        photo = self._photos.get((theme, name))
+        if photo is None and self._decoded.get((theme, name)) is not None:
+            from PIL import ImageTk
+
+            photo = self._photos[theme, name] = ImageTk.PhotoImage(
+                self._decoded[theme, name]
+            )
+        return photo
+
+    def background(self, root, label, name: str) -> None:
+        """
+        Shows the current theme's `name` image in `label` and keeps it themed.
+
+        The image appears as soon as it is decoded, without blocking the window.
+
+        ### Parameters
+        - `root`: Tk widget whose event loop polls for the image.
+        - `label` (tk.Label): Label showing the background.
+        - `name` (str): Image name in `THEME_IMAGES`, e.g. "home".
+        """
+        self._backgrounds.append((label, name))
+        if (self.theme, name) not in self._decoded:
+            self.preload()
+        self._show(root, label, name)
+
+    def _show(self, root, label, name: str) -> None:
+        """Sets the label's image once decoded, polling with `after()`."""
+        if not label.winfo_exists():
+            return
+        key: tuple[str, str] = (self.theme, name)
+        if key not in self._decoded:
+            root.after(POLL_MS, self._show, root, label, name)
+            return
+        photo = self.photo(*key)
+        if photo is not None:
+            label.configure(image=photo)
+
+    def themed(self, widget, **roles: str) -> None:
+        """
+        Colors `widget` from the current theme and recolors it on every switch.
+
+        ### Parameters
+        - `widget`: Tk widget.
+        - `roles`: Widget option to color role, e.g. `bg="bg", fg="fg"`.
+        """
+        self._colored.append((widget, roles))
+        widget.configure(**self.colors(roles))
+
+    def colors(self, roles: dict[str, str], theme: str | None = None) -> dict[str, str]:
+        """Resolves widget options to colors of `theme`, the current one by default."""
+        palette: dict[str, str] = THEME_COLORS[theme or self.theme]
+        return {option: palette[role] for option, role in roles.items()}
+
+    def set_theme(self, theme: str) -> None:
+        """
+        Switches every registered widget to `theme`. Must be called on the Tk thread.
+
+        ### Parameters
+        - `theme` (str): "light" or "dark".
+        """
+        if theme not in THEME_IMAGES:
+            raise ValueError(f"Unknown theme {theme}")
+        self.theme = theme
+        # Forget destroyed widgets while swapping images and colors
+        self._backgrounds = [(l, n) for l, n in self._backgrounds if l.winfo_exists()]
+        self._colored = [(w, r) for w, r in self._colored if w.winfo_exists()]
+        for label, name in self._backgrounds:
+            self._show(label, label, name)
+        for widget, roles in self._colored:
+            widget.configure(**self.colors(roles))
+
+
+# Shared by every window of the application.
+assets: AssetCache = AssetCache()
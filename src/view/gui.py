@@ -20,7 +20,7 @@
 
 This module serves as the `view` component in the MVC (Model-View-Controller) design pattern implemented in the project.
 
-### Note: 
+### Note:
 Do not execute this module as a script.
 
 ## Syntax
@@ -44,10 +44,8 @@ root.mainloop()
 - `Purpose:` View module responsible for the presentation layer of the project.
 """
 
-
 # imports
 import tkinter as tk
-from PIL import Image, ImageTk
 from functools import partial
 from lazy_import import lazy_module, lazy_function
 from .gui_util import (
@@ -58,7 +56,8 @@ from .gui_util import (
     load_urls_from_config,
     change_theme,
 )
-import json
+from .assets import THEME_IMAGES, assets
+from model.config_store import DISPLAY_SETTINGS, URLS, DisplaySettings, config
 
 # lazy Imports
 logging = lazy_module("logging")
@@ -70,11 +69,9 @@ logging = lazy_module("logging")
 
 # Globals
 window = tk.Tk  # Type alias.
-with open(
-    "src/view/config/display_settings.json", "r", encoding="utf-8"
-) as display_config_file:
-    display_config = json.loads(display_config_file.read())
-theme: str = display_config["theme"]
+# Parsed once and shared through the config store.
+theme: str = config.typed(DISPLAY_SETTINGS, DisplaySettings).theme
+assets.theme = theme
 
 # Theme modes drop down.
 themes = [
@@ -91,10 +88,13 @@ def on_hover_color(event, button, bg_color, fg_color) -> None:
 
 
 # Start root window.
-def get_root() -> tk.Tk:
+def get_root(warmup=None) -> tk.Tk:
     """
     This function prepares and returns the fully configured root window for the application.
 
+    ### Parameters
+    - `warmup` (PipelineWarmup | None): Started camera and pose model warm-up, handed to monitoring.
+
     ### Example
     To start the event loop, use the following syntax:
 
@@ -104,14 +104,17 @@ def get_root() -> tk.Tk:
     root.mainloop()
 
     """
+    # Decode the backgrounds while Tk starts up
+    assets.preload()
+
     # Load URLs from the configuration file
-    urls = load_urls_from_config(r"./src/view/data/urls.json")
+    urls = load_urls_from_config(URLS)
 
     # Access URLs
-    readme_url: str = urls.get("readme")
-    python_docs_url: str = urls.get("python_docs")
-    opencv_docs_url: str = urls.get("opencv_docs")
-    mediapipe_readme_url: str = urls.get("mediapipe_readme")
+    readme_url: str = urls.readme
+    python_docs_url: str = urls.python_docs
+    opencv_docs_url: str = urls.opencv_docs
+    mediapipe_readme_url: str = urls.mediapipe_readme
 
     # Setting up the main window.
     root: tk.Tk = tk.Tk()
@@ -120,17 +123,13 @@ def get_root() -> tk.Tk:
     root.resizable(False, False)
     root.iconbitmap("imgs/sitfixlogo.ico")
 
-    # Setting up background window.
-    if theme == "light":
-        background_image: Image = Image.open("imgs/1.png")
-    elif theme == "dark":
-        background_image: Image = Image.open("imgs/2.png")
-    else:
+    # Setting up background window, decoded while the window is showing.
+    if theme not in THEME_IMAGES:
         raise Exception("JSON config file corrupted. Theme")
-    background_photo: ImageTk.PhotoImage = ImageTk.PhotoImage(background_image)
-    background_label: tk.Label = tk.Label(root, image=background_photo)
-    background_label.image: ImageTk.PhotoImage = background_photo
+    background_label: tk.Label = tk.Label(root)
+    assets.themed(background_label, bg="bg")
     background_label.place(relwidth=1, relheight=1)
+    assets.background(root, background_label, "home")
 
     # Button wedges
     update_button: tk.Button = tk.Button(
@@ -140,7 +139,7 @@ def get_root() -> tk.Tk:
         width=15,
         bg="yellow",
         fg="black",
-        command=partial(search_for_updates, root=root, theme=theme),
+        command=partial(search_for_updates, root=root),
     )
     update_button.place(x=460, y=130)
     update_button.bind(
@@ -159,7 +158,7 @@ def get_root() -> tk.Tk:
     launch_button_visual: tk.Button = tk.Button(
         root,
         text="Calibrate",
-        command=launch_visual,
+        command=partial(launch_visual, root, warmup=warmup),
         width=12,
         bg="black",
         fg="white",
@@ -187,7 +186,7 @@ def get_root() -> tk.Tk:
     launch_button_stat: tk.Button = tk.Button(
         root,
         text="Launch",
-        command=partial(launch, root, theme),
+        command=partial(launch, root),
         width=12,
         bg="Black",
         fg="yellow",
@@ -212,34 +211,24 @@ def get_root() -> tk.Tk:
         ),
     )
 
-    # Links
-    bg_color = "white"
-    fg_color = "black"
-    if theme == "dark":
-        bg_color = "gray14"
-        fg_color = "white"
-
-    link_readme: tk.Label = tk.Label(
-        root, text="learn more.", fg=fg_color, cursor="hand2", bg=bg_color
-    )
+    # Links, recolored on theme switches
+    link_readme: tk.Label = tk.Label(root, text="learn more.", cursor="hand2")
+    assets.themed(link_readme, bg="bg", fg="fg")
     link_readme.place(x=540, y=401)
     link_readme.bind("<Button-1>", partial(open_url, url=readme_url))
 
-    link_python: tk.Label = tk.Label(
-        root, text="Python", fg=fg_color, cursor="hand2", bg=bg_color
-    )
+    link_python: tk.Label = tk.Label(root, text="Python", cursor="hand2")
+    assets.themed(link_python, bg="bg", fg="fg")
     link_python.place(x=240, y=130)
     link_python.bind("<Button-1>", partial(open_url, url=python_docs_url))
 
-    link_opencv: tk.Label = tk.Label(
-        root, text="OpenCV", fg=fg_color, cursor="hand2", bg=bg_color
-    )
+    link_opencv: tk.Label = tk.Label(root, text="OpenCV", cursor="hand2")
+    assets.themed(link_opencv, bg="bg", fg="fg")
     link_opencv.place(x=125, y=160)
     link_opencv.bind("<Button-1>", partial(open_url, url=opencv_docs_url))
 
-    link_mediapipe: tk.Label = tk.Label(
-        root, text="Mediapipe", fg=fg_color, cursor="hand2", bg=bg_color
-    )
+    link_mediapipe: tk.Label = tk.Label(root, text="Mediapipe", cursor="hand2")
+    assets.themed(link_mediapipe, bg="bg", fg="fg")
     link_mediapipe.place(x=50, y=160)
     link_mediapipe.bind("<Button-1>", partial(open_url, url=mediapipe_readme_url))
 
@@ -254,10 +243,11 @@ def get_root() -> tk.Tk:
         root,
         clicked,
         *themes,
-        command=partial(change_theme, display_config=display_config),
+        command=change_theme,
     )
 
-    drop.config(bg=bg_color, fg=fg_color, width=20, activebackground="yellow", padx=0)
+    drop.config(width=20, activebackground="yellow", padx=0)
+    assets.themed(drop, bg="bg", fg="fg")
     drop.place(x=520, y=450)
     return root
 
@@ -32,31 +32,27 @@ import tkinter as tk
 from lazy_import import lazy_function, lazy_module
 from tkinter import messagebox
 from webbrowser import open_new_tab
-from PIL import Image, ImageTk
 import tkinter.font as font
+from .assets import assets
+from model.config_store import DISPLAY_SETTINGS, Urls, config
 
 # Lazy Imports
 # open_new_tab = lazy_function("webbrowser", "open_new_tab")
 logging = lazy_module("logging")
-json = lazy_module("json")
 
 
 # Utility functions for GUI.
 
 
-def change_theme(value, display_config):
-    display_config["theme"] = value
-    json_object = json.dumps(display_config, indent=4)
-    with open(
-        "src/view/config/display_settings.json", "w", encoding="utf-8"
-    ) as display_config_file:
-        display_config_file.write(json_object)
-    messagebox.showinfo(
-        "Sitfix-ai Alert!", message="Restart the program to see changes made."
-    )
+def change_theme(value) -> None:
+    """Switches every open window to the `value` theme and saves it."""
+    # Cached images make the switch instant, no restart needed
+    assets.set_theme(value)
+    # Written by the config store's background thread, never on this one
+    config.update(DISPLAY_SETTINGS, theme=value)
 
 
-def search_for_updates(root, theme) -> None:
+def search_for_updates(root) -> None:
     """
     Handles the event when the "Search for Updates" button is clicked. It displays an informational message box indicating that the application is checking for updates.
 
@@ -78,16 +74,11 @@ def search_for_updates(root, theme) -> None:
     updates_window.resizable(False, False)
     updates_window.iconbitmap("imgs/sitfixlogo.ico")
 
-    # Setting up background window.
-    if theme == "light":
-        background_image: Image = Image.open("imgs/3.png")
-    elif theme == "dark":
-        background_image: Image = Image.open("imgs/4.png")
-
-    background_photo: ImageTk.PhotoImage = ImageTk.PhotoImage(background_image)
-    background_label: tk.Label = tk.Label(updates_window, image=background_photo)
-    background_label.image: ImageTk.PhotoImage = background_photo
+    # Setting up background window, in the current theme.
+    background_label: tk.Label = tk.Label(updates_window)
+    assets.themed(background_label, bg="bg")
     background_label.place(relwidth=1, relheight=1)
+    assets.background(updates_window, background_label, "updates")
 
     for i in range(5):
         tk.Label(updates_window, text=f"Version Details {i}").place(
@@ -122,48 +113,87 @@ def open_url(event, url: str) -> None:
     open_new_tab(url)
 
 
-def launch_visual() -> None:
-    """Handles the launch button click event."""
+# The open monitoring window, reused by later clicks.
+monitor_window = None
+
+
+def launch_visual(root, warmup=None) -> None:
+    """
+    Handles the launch button click event.
+
+    Monitoring runs on a worker thread and is shown in a `MonitorWindow`; a
+    window that is already open is brought to the front and restarted.
+
+    ### Parameters
+    - `root`: Parent Tk window.
+    - `warmup` (PipelineWarmup | None): Warm-up whose camera and pose model monitoring takes over.
+    """
+    global monitor_window
     result = messagebox.askyesno("Launch App", "Do you want to start monitoring...")
     if result:
-        pass
+        from .monitor_window import MonitorWindow
+
+        if monitor_window is None or not monitor_window.is_open:
+            monitor_window = MonitorWindow(root, warmup=warmup)
+        monitor_window.window.lift()
+        monitor_window.start()
 
 
-def launch(root, theme) -> None:
+def launch(root) -> None:
     """Handles the launch stat event."""
     launch_window = tk.Toplevel(root)
-    launch_window.title("Sitfix-ai Updates")
+    launch_window.title("Sitfix-ai Statistics")
     launch_window.geometry("715x535")
     launch_window.resizable(False, False)
     launch_window.iconbitmap("imgs/sitfixlogo.ico")
-    fg_color = "black"
-    bg_color = "white"
-    # Setting up background window.
-    if theme == "light":
-        background_image: Image = Image.open("imgs/11.png")
-    elif theme == "dark":
-        background_image: Image = Image.open("imgs/13.png")
-        fg_color = "yellow"
-        bg_color = "gray21"
-    background_photo: ImageTk.PhotoImage = ImageTk.PhotoImage(background_image)
-    background_label: tk.Label = tk.Label(launch_window, image=background_photo)
-    background_label.image: ImageTk.PhotoImage = background_photo
+    # Setting up background window, in the current theme.
+    background_label: tk.Label = tk.Label(launch_window)
+    assets.themed(background_label, bg="panel")
     background_label.place(relwidth=1, relheight=1)
+    assets.background(launch_window, background_label, "stats")
+    # Pre-aggregated hourly rows, a few hundred at most, so this is instant
+    from model.analytics import RollupReader
+
+    try:
+        summary: dict[str, float | None] = RollupReader().summary()
+    except Exception as e:
+        logging.error(f"Error reading posture statistics: {e}")
+        summary = {"day": None, "week": None, "month": None}
+
+    def percent(value: float | None) -> str:
+        return "--" if value is None else f"{value:.0f}%"
+
     precent_font = font.Font(family="Helvetica", size=60, weight="bold")
-    tk.Label(
-        launch_window, text="100%", font=precent_font, bg=bg_color, fg=fg_color
-    ).place(x=50, y=250)
+    percent_label: tk.Label = tk.Label(
+        launch_window, text=percent(summary["day"]), font=precent_font
+    )
+    assets.themed(percent_label, bg="panel", fg="accent")
+    percent_label.place(x=50, y=250)
+    today_label: tk.Label = tk.Label(launch_window, text="Today")
+    assets.themed(today_label, bg="panel", fg="accent")
+    today_label.place(x=50, y=220)
+    period_font = font.Font(family="Helvetica", size=20)
+    for row, (name, title) in enumerate(
+        (("week", "Last 7 days"), ("month", "Last 30 days"))
+    ):
+        period_label: tk.Label = tk.Label(
+            launch_window,
+            text=f"{title}: {percent(summary[name])}",
+            font=period_font,
+        )
+        assets.themed(period_label, bg="panel", fg="accent")
+        period_label.place(x=300, y=320 + 50 * row)
 
 
-def load_urls_from_config(file_path: str) -> dict[str:str]:
+def load_urls_from_config(file_path: str) -> Urls:
     """
-    This function loads URLs from a JSON configuration file and returns them as a dictionary.
+    This function loads URLs from a JSON configuration file, parsed once by the config store.
 
     ### Parameters
     - `file_path: str`:- The file path to the configuration file containing URLs.
 
     ### Returns
-    - `urls: dict`:- A dictionary containing key-value pairs of URL names and their corresponding addresses.
+    - `urls: Urls`:- The URL names and their corresponding addresses.
 
     ### Raises
     - `FileNotFoundError`: If the specified configuration file is not found.
@@ -176,9 +206,7 @@ def load_urls_from_config(file_path: str) -> dict[str:str]:
     print(urls)
 
     """
-    with open(file_path, "r") as config_file:
-        urls = json.load(config_file)
-        return urls
+    return config.typed(file_path, Urls)
 
 
 if __name__ == "__main__":
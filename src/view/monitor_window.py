@@ -0,0 +1,164 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+This module contains the live monitoring window of the `view` module.
+
+The posture pipeline runs in a `controller.monitor.Monitor` worker thread.
+The window polls its bounded frame queue with `after()` and paints the
+newest frame into a single reused `PhotoImage`, so Tk never waits on the
+camera or the pose model, and monitoring can be started and stopped while
+the application keeps running.
+
+### Note:
+ Do not run this module as a script.
+
+## Metadata
+- `Purpose:` Show the live posture video inside the Graphical User Interface (GUI).
+"""
+
+# Imports
+import tkinter as tk
+from lazy_import import lazy_module
+from .assets import assets
+
+# Lazy Imports
+logging = lazy_module("logging")
+
+# Globals
+POLL_MS: int = 15  # Twice per frame at 30 fps, so no frame waits long.
+
+
+class MonitorWindow:
+    """
+    Toplevel window showing the live, annotated camera feed.
+
+    ### Parameters
+    - `root`: Parent Tk window.
+    - `warmup` (PipelineWarmup | None): Warm-up whose camera and pose model the first run takes over.
+    - `source` (int | str): Camera index or video file path.
+
+    ### Example
+    ```python
+    MonitorWindow(root).start()
+    ```
+    """
+
+    def __init__(self, root, warmup=None, source: int | str = 0) -> None:
+        # Heavy imports stay off the startup path until monitoring is asked for.
+        from controller.monitor import Monitor
+
+        self.root = root
+        self.monitor = Monitor(source=source, warmup=warmup)
+        self.photo = None  # Reused for every frame of the same size.
+        self._poll_id: str | None = None
+
+        self.window: tk.Toplevel = tk.Toplevel(root)
+        self.window.title("Sitfix-ai Monitoring")
+        assets.themed(self.window, bg="panel")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.video_label: tk.Label = tk.Label(
+            self.window,
+            text="Starting camera...",
+            width=80,
+            height=30,
+            bg="black",
+            fg="white",
+        )
+        self.video_label.pack(padx=10, pady=10)
+        self.status_label: tk.Label = tk.Label(self.window, text="")
+        assets.themed(self.status_label, bg="panel", fg="accent")
+        self.status_label.pack(side=tk.LEFT, padx=10, pady=(0, 10))
+        self.toggle_button: tk.Button = tk.Button(
+            self.window,
+            text="Start",
+            command=self.toggle,
+            width=12,
+            bg="black",
+            fg="yellow",
+        )
+        self.toggle_button.pack(side=tk.RIGHT, padx=10, pady=(0, 10))
+
+    @property
+    def is_open(self) -> bool:
+        """True until the window was closed."""
+        return bool(self.window.winfo_exists())
+
+    def start(self) -> "MonitorWindow":
+        """Starts the monitoring worker and polling its frames."""
+        self.monitor.start()
+        self.toggle_button.configure(text="Stop")
+        if self._poll_id is None:
+            self._poll_id = self.window.after(POLL_MS, self._poll)
+        return self
+
+    def stop(self) -> None:
+        """Stops the monitoring worker, the window stays open."""
+        self.monitor.stop()
+        self.toggle_button.configure(text="Start")
+        self.status_label.configure(text="Monitoring stopped")
+
+    def toggle(self) -> None:
+        """Handles the Start/Stop button click event."""
+        if self.monitor.running:
+            self.stop()
+        else:
+            self.start()
+
+    def close(self) -> None:
+        """Stops monitoring and destroys the window."""
+        self.monitor.stop()
+        if self._poll_id is not None:
+            self.window.after_cancel(self._poll_id)
+            self._poll_id = None
+        self.window.destroy()
+
+    def _poll(self) -> None:
+        """Paints the newest frame, if any, and schedules the next poll."""
+        self._poll_id = None
+        try:
+            frame = self.monitor.latest()
+            if frame is not None:
+                self._paint(frame)
+            elif not self.monitor.running:
+                # The worker stopped on its own (end of file, camera lost)
+                self.toggle_button.configure(text="Start")
+                self.status_label.configure(text="Monitoring stopped")
+                return
+        except Exception as e:
+            logging.error(f"Error drawing monitoring frame: {e}")
+        self._poll_id = self.window.after(POLL_MS, self._poll)
+
+    def _paint(self, frame) -> None:
+        """Pastes an RGB frame into the reused `PhotoImage`."""
+        from PIL import Image, ImageTk
+
+        image = Image.fromarray(frame.image)
+        if (
+            self.photo is None
+            or (self.photo.width(), self.photo.height()) != image.size
+        ):
+            self.photo = ImageTk.PhotoImage(image=image)
+            self.video_label.configure(image=self.photo, width=0, height=0)
+        else:
+            self.photo.paste(image)
+        if frame.status is None:
+            self.status_label.configure(text="No posture detected")
+        else:
+            self.status_label.configure(
+                text="Good posture" if frame.status[0] else "Poor posture"
+            )
@@ -0,0 +1,543 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+# Benchmarks
+
+Per-stage throughput and latency percentiles of the posture pipeline on
+deterministic inputs, so releases can be compared on any Linux box without
+a person in front of a webcam.
+
+Inputs are generated from a fixed seed:
+- synthetic landmark trajectories of a seated person who sways, tilts and
+  slouches,
+- stick-figure frames rendered from those trajectories,
+- a short clip encoded from the rendered frames.
+
+The pose model rarely detects the stick figure, so `process_frame` and
+`pipeline` measure the detector running on every frame, the slowest path.
+Clips are encoded into a temporary directory on every run instead of being
+checked in, they are fully determined by the seed.
+
+## Syntax
+```
+python tests/benchmark.py --output benchmark.json
+python tests/benchmark.py --baseline benchmark.json --tolerance 0.2
+```
+The exit code is 1 when a stage regressed against the baseline.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Iterable
+
+import cv2
+import numpy as np
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+import mediapipe as mp  # noqa: E402
+from mediapipe.framework.formats import landmark_pb2  # noqa: E402
+
+from controller import posture_controller  # noqa: E402
+from controller.overlay import OverlayRenderer  # noqa: E402
+from model import posture_judger as judge  # noqa: E402
+
+__purpose__: str = "Reproducible performance benchmarks of the posture pipeline."
+
+RESULTS_VERSION: int = 1
+SEED: int = 2023
+FPS: int = 30
+FRAME_SIZE: tuple[int, int] = (1280, 720)
+PERCENTILES: tuple[int, ...] = (50, 95, 99)
+
+# Seated upper body facing the camera, normalized (x, y) of the 33
+# MediaPipe pose landmarks. The image is mirrored like a webcam preview, so
+# the left side of the body is on the right of the image.
+# fmt: off
+TEMPLATE: np.ndarray = np.array(
+    [
+        (0.50, 0.18),  # nose
+        (0.52, 0.16), (0.53, 0.16), (0.54, 0.16),  # left eye inner, eye, outer
+        (0.48, 0.16), (0.47, 0.16), (0.46, 0.16),  # right eye inner, eye, outer
+        (0.56, 0.17), (0.44, 0.17),  # ears
+        (0.52, 0.21), (0.48, 0.21),  # mouth
+        (0.70, 0.52), (0.30, 0.52),  # shoulders
+        (0.74, 0.68), (0.26, 0.68),  # elbows
+        (0.62, 0.78), (0.38, 0.78),  # wrists
+        (0.60, 0.80), (0.40, 0.80),  # pinkies
+        (0.60, 0.79), (0.40, 0.79),  # index fingers
+        (0.61, 0.77), (0.39, 0.77),  # thumbs
+        (0.60, 0.88), (0.40, 0.88),  # hips
+        (0.62, 1.02), (0.38, 1.02),  # knees
+        (0.62, 1.20), (0.38, 1.20),  # ankles
+        (0.63, 1.23), (0.37, 1.23),  # heels
+        (0.60, 1.25), (0.40, 1.25),  # foot indices
+    ],
+    dtype=np.float32,
+)
+# fmt: on
+HEAD_INDICES: np.ndarray = np.arange(11)
+
+
+def synthetic_landmarks(frames: int, seed: int = SEED, fps: int = FPS) -> np.ndarray:
+    """
+    Landmark trajectory of a seated person.
+
+    The person sways sideways, tilts the shoulders and slowly slouches
+    (the head sinks towards the shoulders), so the judged posture changes
+    between good and poor. About 2% of the frames have low visibility.
+
+    Args:
+        frames (int): Number of frames.
+        seed (int): Seed of the noise.
+        fps (int): Frame rate the motion is timed at.
+
+    Returns:
+        np.ndarray: Landmarks of shape (frames, 33, 4), float32.
+
+    Purpose: Deterministic landmark input for the judging stages.
+    Time Complexity: O(frames)
+    Space Complexity: O(frames)
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    t: np.ndarray = np.arange(frames, dtype=np.float32)[:, None] / fps
+    landmarks: np.ndarray = np.empty((frames, judge.LANDMARK_COUNT, 4), np.float32)
+    xy: np.ndarray = landmarks[..., :2]
+    xy[:] = TEMPLATE
+    xy[..., 0] += 0.03 * np.sin(2 * np.pi * 0.2 * t)
+    slouch: np.ndarray = 0.04 * (1 - np.cos(2 * np.pi * t / 20))
+    xy[:, HEAD_INDICES, 1] += slouch
+    tilt: np.ndarray = 0.008 * np.sin(2 * np.pi * t / 7)
+    xy[:, judge.LEFT_SHOULDER_INDEX, 1] += tilt[:, 0]
+    xy[:, judge.RIGHT_SHOULDER_INDEX, 1] -= tilt[:, 0]
+    xy += rng.normal(0.0, 0.002, xy.shape).astype(np.float32)
+    landmarks[..., 2] = rng.normal(0.0, 0.05, landmarks.shape[:2])
+    landmarks[..., 3] = 0.95
+    landmarks[rng.random(frames) < 0.02, :, 3] = 0.2
+    return landmarks
+
+
+def to_landmark_list(landmarks: np.ndarray) -> landmark_pb2.NormalizedLandmarkList:
+    """
+    Wrap one frame of landmarks like `results.pose_landmarks` of MediaPipe.
+
+    Args:
+        landmarks (np.ndarray): Landmarks of shape (33, 4).
+
+    Returns:
+        landmark_pb2.NormalizedLandmarkList: The landmarks as protobuf.
+    """
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in landmarks.tolist():
+        landmark_list.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return landmark_list
+
+
+def render_stick_figure(
+    landmarks: np.ndarray, size: tuple[int, int] = FRAME_SIZE
+) -> np.ndarray:
+    """
+    Render one frame of landmarks as a filled stick figure.
+
+    Args:
+        landmarks (np.ndarray): Landmarks of shape (33, 4).
+        size (tuple[int, int]): Frame size (width, height).
+
+    Returns:
+        np.ndarray: BGR frame of shape (height, width, 3).
+
+    Purpose: Deterministic camera-like frames for the image stages.
+    Time Complexity: O(W * H)
+    Space Complexity: O(W * H)
+    """
+    width, height = size
+    frame: np.ndarray = np.empty((height, width, 3), np.uint8)
+    # Vertical gradient, like a lit wall behind the desk
+    frame[:] = np.linspace(150, 90, height, dtype=np.uint8)[:, None, None]
+    points: np.ndarray = np.rint(landmarks[:, :2] * (width, height)).astype(np.int32)
+    torso: np.ndarray = points[[11, 12, 24, 23]]
+    cv2.fillConvexPoly(frame, torso, (60, 90, 160), cv2.LINE_AA)
+    thickness: int = max(2, width // 60)
+    for start, end in mp.solutions.pose.POSE_CONNECTIONS:
+        cv2.line(
+            frame,
+            tuple(points[start]),
+            tuple(points[end]),
+            (120, 160, 210),
+            thickness,
+            cv2.LINE_AA,
+        )
+    head_radius: int = int(np.linalg.norm(points[7] - points[8]) * 0.7)
+    cv2.circle(frame, tuple(points[0]), head_radius, (140, 180, 225), -1, cv2.LINE_AA)
+    return frame
+
+
+def write_clip(
+    path: str, landmarks: np.ndarray, size: tuple[int, int] = FRAME_SIZE
+) -> str:
+    """
+    Encode rendered stick-figure frames into a short MJPG clip.
+
+    Args:
+        path (str): Target path, should end in `.avi`.
+        landmarks (np.ndarray): Landmarks of shape (N, 33, 4), one per frame.
+        size (tuple[int, int]): Frame size (width, height).
+
+    Returns:
+        str: The path of the clip.
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), FPS, size)
+    try:
+        for frame_landmarks in landmarks:
+            writer.write(render_stick_figure(frame_landmarks, size))
+    finally:
+        writer.release()
+    return path
+
+
+def measure(
+    function: Callable[[object], object], inputs: Iterable[object], warmup: int = 5
+) -> dict[str, float]:
+    """
+    Time one call of `function` per input.
+
+    Garbage collection is paused while measuring, so its pauses do not land
+    in random stages.
+
+    Args:
+        function (Callable[[object], object]): Stage under test.
+        inputs (Iterable[object]): One argument per call.
+        warmup (int): Untimed calls on the first input.
+
+    Returns:
+        dict[str, float]: Call count, throughput in calls per second and
+        mean and percentile latencies in milliseconds.
+
+    Purpose: Same statistics for every stage.
+    Time Complexity: O(C) - C is the number of calls.
+    Space Complexity: O(C)
+    """
+    inputs = list(inputs)
+    for _ in range(warmup):
+        function(inputs[0])
+    latencies: np.ndarray = np.empty(len(inputs), np.int64)
+    clock: Callable[[], int] = time.perf_counter_ns
+    gc_enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        started: int = clock()
+        for index, argument in enumerate(inputs):
+            call_started: int = clock()
+            function(argument)
+            latencies[index] = clock() - call_started
+        elapsed: int = clock() - started
+    finally:
+        if gc_enabled:
+            gc.enable()
+    milliseconds: np.ndarray = latencies / 1e6
+    stats: dict[str, float] = {
+        "calls": len(inputs),
+        "throughput": len(inputs) / max(elapsed / 1e9, 1e-12),
+        "mean_ms": float(milliseconds.mean()),
+    }
+    for percentile, value in zip(PERCENTILES, np.percentile(milliseconds, PERCENTILES)):
+        stats[f"p{percentile}_ms"] = float(value)
+    return stats
+
+
+def extract_keypoints(pose_landmarks: object) -> tuple[tuple[float, float], ...]:
+    """Per-joint protobuf extraction, the baseline of `landmarks_to_array`."""
+    left_shoulder: object = pose_landmarks.landmark[
+        mp.solutions.pose.PoseLandmark.LEFT_SHOULDER
+    ]
+    right_shoulder: object = pose_landmarks.landmark[
+        mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER
+    ]
+    nose: object = pose_landmarks.landmark[mp.solutions.pose.PoseLandmark.NOSE]
+    return (
+        (left_shoulder.x, left_shoulder.y),
+        (right_shoulder.x, right_shoulder.y),
+        (nose.x, nose.y),
+    )
+
+
+def run_benchmarks(
+    frames: int = 300,
+    image_frames: int = 60,
+    use_model: bool = True,
+    stages: set[str] | None = None,
+) -> dict[str, dict[str, float]]:
+    """
+    Run every benchmark stage.
+
+    Args:
+        frames (int): Landmark frames of the cheap, per-landmark stages.
+        image_frames (int): Rendered frames of the image and model stages.
+        use_model (bool): Include the stages that run the pose model.
+        stages (set[str] | None): Run only these stages, None runs all.
+
+    Returns:
+        dict[str, dict[str, float]]: Statistics of `measure` by stage name.
+
+    Purpose: One entry point for the command line and other scripts.
+    Time Complexity: O(frames + image_frames * W * H)
+    Space Complexity: O(frames + image_frames * W * H)
+    """
+    results: dict[str, dict[str, float]] = {}
+
+    def wanted(name: str) -> bool:
+        return stages is None or name in stages
+
+    landmarks: np.ndarray = synthetic_landmarks(frames)
+    keypoints: list[tuple[tuple[float, float], ...]] = [
+        (tuple(frame[11][:2]), tuple(frame[12][:2]), tuple(frame[0][:2]))
+        for frame in landmarks.tolist()
+    ]
+    profile: judge.ThresholdProfile = judge.profiles.get()
+
+    if wanted("calculate_distance"):
+        results["calculate_distance"] = measure(
+            lambda points: judge.calculate_distance(points[0], points[1]), keypoints
+        )
+    if wanted("isPosture_good"):
+        results["isPosture_good"] = measure(
+            lambda points: judge.isPosture_good(*points, profile=profile), keypoints
+        )
+    if wanted("isPosture_good_landmarks"):
+        results["isPosture_good_landmarks"] = measure(
+            lambda frame: judge.isPosture_good_landmarks(frame, profile), landmarks
+        )
+    if wanted("isPosture_good_batch"):
+        # One call judges the whole trajectory
+        results["isPosture_good_batch"] = measure(
+            lambda batch: judge.isPosture_good_batch(batch, profile), [landmarks] * 20
+        )
+        results["isPosture_good_batch"]["frames_per_call"] = frames
+
+    landmark_lists: list[landmark_pb2.NormalizedLandmarkList] = [
+        to_landmark_list(frame) for frame in landmarks
+    ]
+    if wanted("landmark_extraction"):
+        results["landmark_extraction"] = measure(extract_keypoints, landmark_lists)
+    if wanted("landmarks_to_array"):
+        results["landmarks_to_array"] = measure(
+            posture_controller.landmarks_to_array, landmark_lists
+        )
+
+    images: list[np.ndarray] = [
+        render_stick_figure(frame) for frame in landmarks[:image_frames]
+    ]
+    display_size: tuple[int, int] = posture_controller.DISPLAY_SIZE
+    displays: list[np.ndarray] = [cv2.resize(image, display_size) for image in images]
+    status: tuple = (False, [40.0, True], [3.0, False], [60.0, True])
+    if wanted("draw_overlay"):
+        results["draw_overlay"] = measure(
+            lambda pair: posture_controller.draw_overlay(*pair, status),
+            zip(displays, landmarks),
+        )
+    if wanted("draw_overlay_cached"):
+        renderer = OverlayRenderer()
+        results["draw_overlay_cached"] = measure(
+            lambda pair: posture_controller.draw_overlay(*pair, status, renderer),
+            zip(displays, landmarks),
+        )
+    if wanted("display_posture_status"):
+        results["display_posture_status"] = measure(
+            lambda image: posture_controller.display_posture_status(
+                image, False, [40.0, True], [3.0, False], [60.0, True]
+            ),
+            displays,
+        )
+    if wanted("resize_for_display"):
+        buffers = posture_controller.FrameBufferPool()
+        results["resize_for_display"] = measure(
+            lambda image: posture_controller.resize_for_display(image, buffers=buffers),
+            images,
+        )
+
+    with tempfile.TemporaryDirectory() as directory:
+        clip: str = write_clip(
+            os.path.join(directory, "stick_figure.avi"), landmarks[:image_frames]
+        )
+        if wanted("clip_decode"):
+            capture = cv2.VideoCapture(clip)
+            results["clip_decode"] = measure(
+                lambda _: capture.read(), range(image_frames - 5)
+            )
+            capture.release()
+
+        if use_model and (wanted("process_frame") or wanted("pipeline")):
+            pose = posture_controller.initialize_pose_model()
+            buffers = posture_controller.FrameBufferPool()
+            if wanted("process_frame"):
+                results["process_frame"] = measure(
+                    lambda image: posture_controller.process_frame(
+                        image, pose, buffers=buffers
+                    ),
+                    images,
+                )
+            if wanted("pipeline"):
+                capture = cv2.VideoCapture(clip)
+
+                def pipeline(_: object) -> None:
+                    # Decode, infer, judge and draw one frame of the clip
+                    ok, frame = capture.read()
+                    if not ok:
+                        capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        ok, frame = capture.read()
+                    image, result = posture_controller.process_frame(
+                        frame, pose, buffers=buffers
+                    )
+                    frame_landmarks: np.ndarray | None = None
+                    if result.pose_landmarks:
+                        frame_landmarks = posture_controller.landmarks_to_array(
+                            result.pose_landmarks
+                        )
+                        judge.isPosture_good_landmarks(frame_landmarks, profile)
+                    posture_controller.draw_overlay(image, frame_landmarks)
+
+                results["pipeline"] = measure(pipeline, range(image_frames))
+                capture.release()
+            pose.close()
+    return results
+
+
+def environment() -> dict[str, object]:
+    """Versions and hardware the results were measured on."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "mediapipe": getattr(mp, "__version__", "unknown"),
+    }
+
+
+def compare(
+    current: dict[str, object], baseline: dict[str, object], tolerance: float = 0.15
+) -> list[str]:
+    """
+    Find stages that got slower than in a baseline result file.
+
+    A stage regressed when its median or 95th percentile latency grew by
+    more than `tolerance`, relative to the baseline.
+
+    Args:
+        current (dict[str, object]): Results of this run.
+        baseline (dict[str, object]): Results of an earlier run.
+        tolerance (float): Allowed relative slowdown, 0.15 = 15%.
+
+    Returns:
+        list[str]: One description per regression, empty when none.
+
+    Purpose: Catch performance regressions between releases.
+    Time Complexity: O(S) - S is the number of stages.
+    Space Complexity: O(S)
+    """
+    regressions: list[str] = []
+    for name, stats in current["stages"].items():
+        before: dict[str, float] | None = baseline["stages"].get(name)
+        if before is None:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if before[key] > 0 and stats[key] > before[key] * (1 + tolerance):
+                regressions.append(
+                    f"{name} {key}: {before[key]:.4f} -> {stats[key]:.4f} "
+                    f"(+{stats[key] / before[key] - 1:.0%})"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point of the benchmarks.
+
+    Args:
+        argv (list[str] | None): Arguments, defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: 1 when a stage regressed against the baseline, else 0.
+    """
+    parser = argparse.ArgumentParser(
+        prog="benchmark", description="Benchmark the posture pipeline."
+    )
+    parser.add_argument("--output", help="write the JSON results here")
+    parser.add_argument("--baseline", help="JSON results of an earlier run")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.15, help="allowed relative slowdown"
+    )
+    parser.add_argument("--frames", type=int, default=300, help="landmark frames")
+    parser.add_argument("--image-frames", type=int, default=60, help="rendered frames")
+    parser.add_argument(
+        "--no-model", action="store_true", help="skip the pose model stages"
+    )
+    parser.add_argument("--stage", action="append", help="run only this stage")
+    parser.add_argument(
+        "--threads", type=int, help="OpenCV threads, fixes results across machines"
+    )
+    args = parser.parse_args(argv)
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+
+    results: dict[str, object] = {
+        "version": RESULTS_VERSION,
+        "created": time.time(),
+        "seed": SEED,
+        "environment": environment(),
+        "stages": run_benchmarks(
+            max(args.frames, 10),
+            max(args.image_frames, 10),
+            not args.no_model,
+            set(args.stage) if args.stage else None,
+        ),
+    }
+
+    print(f"{'stage':<24}{'calls/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in results["stages"].items():
+        print(
+            f"{name:<24}{stats['throughput']:>12.1f}{stats['p50_ms']:>10.4f}"
+            f"{stats['p95_ms']:>10.4f}{stats['p99_ms']:>10.4f}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            regressions: list[str] = compare(
+                results, json.load(baseline_file), args.tolerance
+            )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
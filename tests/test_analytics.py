@@ -0,0 +1,72 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Unit tests of `model.analytics`: totals of flushed and pending buckets,
+and the retry of buckets whose flush failed.
+"""
+
+import os
+import shutil
+import sqlite3
+import time
+
+import pytest
+
+from model import analytics
+
+# Recent, older minutes are dropped on flush
+NOW: float = time.time()
+
+
+@pytest.fixture
+def rollups(tmp_path):
+    rollups = analytics.PostureRollups(
+        str(tmp_path / "analytics.sqlite3"), flush_interval=3600.0
+    )
+    yield rollups
+    rollups._closed.set()
+    rollups._thread.join()
+
+
+def test_totals_include_pending_and_flushed(rollups):
+    rollups.add(NOW, True, (1.0, 2.0, 3.0))
+    rollups.flush()
+    rollups.add(NOW + 1, False, (1.0, 2.0, 3.0))
+    totals = rollups.totals(NOW - 3600, NOW + 3600)
+    assert totals["good"] == 1 and totals["bad"] == 1 and totals["frames"] == 2
+    assert totals["shoulder_tilt"] == pytest.approx(4.0)
+
+
+def test_failed_flush_keeps_buckets(rollups):
+    path: str = rollups.path
+    os.replace(path, path + ".bak")
+    os.mkdir(path)  # A directory cannot be opened as a database
+    rollups.add(NOW, True)
+    rollups.flush()
+    rollups.add(NOW, False)
+    assert rollups._pending[int(NOW // 60) * 60][:2] == [1, 1]
+
+    shutil.rmtree(path)
+    os.replace(path + ".bak", path)
+    rollups.flush()
+    assert not rollups._pending
+    with sqlite3.connect(path) as connection:
+        for table in ("minutes", "hours"):
+            assert connection.execute(
+                f"SELECT TOTAL(good), TOTAL(bad) FROM {table}"
+            ).fetchone() == (1.0, 1.0)
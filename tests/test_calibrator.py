@@ -0,0 +1,72 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Unit tests of `model.calibrator`: profiles computed from calibration
+landmarks still tell good from slouched frames.
+"""
+
+import numpy as np
+
+from model import calibrator
+from model import posture_judger as judge
+
+# Normalized (x, y) of an upright seated pose, and the same pose slouched
+# with the nose sunk towards the shoulders.
+UPRIGHT: dict[int, tuple[float, float]] = {
+    judge.LEFT_SHOULDER_INDEX: (0.60, 0.60),
+    judge.RIGHT_SHOULDER_INDEX: (0.40, 0.60),
+    judge.NOSE_INDEX: (0.50, 0.45),
+}
+SLOUCHED: dict[int, tuple[float, float]] = {
+    **UPRIGHT,
+    judge.NOSE_INDEX: (0.50, 0.56),
+}
+
+
+def pose_frames(points: dict[int, tuple[float, float]], frames: int, seed: int = 0):
+    """Visible landmarks at `points`, jittered by 2 thousandths."""
+    rng: np.random.Generator = np.random.default_rng(seed)
+    landmarks: np.ndarray = np.zeros((frames, judge.LANDMARK_COUNT, 4), np.float32)
+    landmarks[..., 3] = 1.0
+    for index, point in points.items():
+        landmarks[:, index, :2] = rng.normal(point, 0.002, (frames, 2))
+    return landmarks
+
+
+def test_calibrated_profile_rejects_slouching():
+    profile: dict[str, object] = calibrator.compute_profile(pose_frames(UPRIGHT, 60))
+    assert set(profile["margins"]) == {"head", "shoulder", "body"}
+    thresholds = judge.ThresholdProfile.from_biometrics(profile)
+    assert thresholds.min_nose_distance > 0
+
+    upright, _, _ = judge.isPosture_good_batch(pose_frames(UPRIGHT, 50, 1), thresholds)
+    slouched, _, conditions = judge.isPosture_good_batch(
+        pose_frames(SLOUCHED, 50, 2), thresholds
+    )
+    # Margins of three spreads pass nearly every upright frame
+    assert upright.mean() >= 0.95
+    assert not slouched.any() and not conditions[:, 2].any()
+
+
+def test_margins_follow_the_spread():
+    still: dict[str, object] = calibrator.compute_profile(pose_frames(UPRIGHT, 60))
+    landmarks: np.ndarray = pose_frames(UPRIGHT, 60)
+    landmarks[:, judge.NOSE_INDEX, 1] += np.linspace(-0.03, 0.03, 60)
+    restless: dict[str, object] = calibrator.compute_profile(landmarks)
+    assert still["margins"]["body"] == calibrator.MIN_MARGINS["body"]
+    assert restless["margins"]["body"] > still["margins"]["body"]
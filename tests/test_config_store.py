@@ -0,0 +1,99 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Unit tests of `model.config_store`: atomic JSON writes and the debounced
+write-back of `ConfigStore`.
+"""
+
+import json
+import os
+
+import pytest
+
+from model.config_store import ConfigStore, write_json_atomic
+
+
+def read(path) -> dict[str, object]:
+    with open(path, "r", encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+def test_write_json_atomic_replaces(tmp_path):
+    path: str = str(tmp_path / "nested" / "settings.json")
+    write_json_atomic({"a": 1}, path)
+    write_json_atomic({"b": [1, 2]}, path)
+    assert read(path) == {"b": [1, 2]}
+    assert os.listdir(tmp_path / "nested") == ["settings.json"]
+
+
+def test_write_json_atomic_failure_keeps_file(tmp_path):
+    path: str = str(tmp_path / "settings.json")
+    write_json_atomic({"a": 1}, path)
+    with pytest.raises(TypeError):
+        write_json_atomic({"a": object()}, path)
+    assert read(path) == {"a": 1}
+    assert os.listdir(tmp_path) == ["settings.json"]
+
+
+def test_set_is_visible_before_flush(tmp_path):
+    store: ConfigStore = ConfigStore(str(tmp_path), delay=3600.0)
+    seen: list[dict[str, object]] = []
+    store.subscribe("settings.json", seen.append)
+    store.set("settings.json", {"a": 1})
+    store.update("settings.json", b=2)
+    assert store.get("settings.json") == {"a": 1, "b": 2}
+    assert not os.path.exists(tmp_path / "settings.json")
+    store.flush()
+    assert read(tmp_path / "settings.json") == {"a": 1, "b": 2}
+    assert seen == [{"a": 1}, {"a": 1, "b": 2}]
+
+
+def test_refresh_reads_external_changes(tmp_path):
+    store: ConfigStore = ConfigStore(str(tmp_path), delay=3600.0)
+    store.save("settings.json", {"a": 1})
+    assert store.get("settings.json", refresh=True) == {"a": 1}
+    write_json_atomic({"a": 2}, str(tmp_path / "settings.json"))
+    os.utime(tmp_path / "settings.json", ns=(1, 1))  # A different mtime
+    assert store.get("settings.json") == {"a": 1}
+    assert store.get("settings.json", refresh=True) == {"a": 2}
+
+
+def test_missing_file_is_empty(tmp_path):
+    store: ConfigStore = ConfigStore(str(tmp_path))
+    assert store.get("missing.json") == {}
+
+
+@pytest.mark.parametrize("newer", ["save", "set"])
+def test_older_batch_never_lands_last(tmp_path, newer):
+    store: ConfigStore = ConfigStore(str(tmp_path), delay=3600.0)
+    seen: list[dict[str, object]] = []
+    store.subscribe("settings.json", seen.append)
+    full: str = str(tmp_path / "settings.json")
+    store.set("settings.json", {"a": 1})
+    # The writer thread or flush() took the batch, but has not written it yet
+    with store._lock:
+        older: dict[str, object] = store._pending.pop(full)[1]
+    if newer == "save":
+        store.save("settings.json", {"a": 2})
+    else:
+        store.set("settings.json", {"a": 2})
+        store.flush()
+    store._write(full, older)
+    assert read(full) == {"a": 2}
+    assert store.get("settings.json", refresh=True) == {"a": 2}
+    assert seen == [{"a": 1}, {"a": 2}]
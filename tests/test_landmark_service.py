@@ -0,0 +1,121 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Unit tests of `controller.landmark_service`: packet round trips and the
+rejection of malformed HELLO packets.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from controller import landmark_service as service
+from model import posture_judger as judge
+
+
+async def exchange(packets: bytes) -> tuple[bytes, bool]:
+    """
+    Send raw packets to a fresh service and read until it closes or idles.
+
+    Returns the bytes received and whether the service closed the
+    connection.
+    """
+    landmark_service = service.LandmarkService(max_delay=0.0)
+    port: int = await landmark_service.start(port=0)
+    try:
+        reader, writer = await asyncio.open_connection(service.DEFAULT_HOST, port)
+        writer.write(packets)
+        await writer.drain()
+        received: bytes = b""
+        closed: bool = False
+        try:
+            while not closed:
+                chunk: bytes = await asyncio.wait_for(reader.read(4096), 0.5)
+                closed = not chunk
+                received += chunk
+        except asyncio.TimeoutError:
+            pass
+        writer.close()
+        return received, closed
+    finally:
+        await landmark_service.stop()
+
+
+def test_verdicts_echo_sequences() -> None:
+    landmarks: np.ndarray = np.zeros((judge.LANDMARK_COUNT, 4), np.float32)
+    received, closed = asyncio.run(
+        exchange(
+            service.encode_landmarks(7, landmarks) + service.encode_landmarks(8, None)
+        )
+    )
+    verdicts: list[dict[str, object]] = [
+        service.decode_verdict(received[i : i + service.VERDICT_PACKET.size])
+        for i in range(0, len(received), service.VERDICT_PACKET.size)
+    ]
+    assert not closed
+    assert sorted(verdict["sequence"] for verdict in verdicts) == [7, 8]
+    assert [v["detected"] for v in verdicts if v["sequence"] == 8] == [False]
+
+
+@pytest.mark.parametrize(
+    "user_id",
+    [b"x" * (service.MAX_HELLO_BYTES + 1), b"../../etc/passwd", b"\xff\xfe", b""],
+)
+def test_invalid_hello_closes_connection(user_id: bytes) -> None:
+    # A frame sent after the HELLO is never answered
+    packets: bytes = service.HEADER.pack(service.HELLO, len(user_id)) + user_id
+    if len(user_id) <= service.MAX_HELLO_BYTES:
+        packets += service.encode_landmarks(1, None)
+    assert asyncio.run(exchange(packets)) == (b"", True)
+
+
+def test_hello_length_is_checked_before_reading() -> None:
+    # Announcing 4 GiB must not make the service wait for them
+    packets: bytes = service.HEADER.pack(service.HELLO, 2**32 - 1)
+    assert asyncio.run(exchange(packets)) == (b"", True)
+
+
+def test_client_rejects_invalid_user_id() -> None:
+    with pytest.raises(ValueError):
+        service.LandmarkClient("../alice")
+
+
+def test_failed_user_does_not_drop_other_batches() -> None:
+    async def flush_once() -> list[str]:
+        landmark_service = service.LandmarkService(max_delay=0.0)
+        judged: list[str] = []
+
+        def judge_batch(user_id: str, *batch: list) -> None:
+            if user_id == "broken":
+                raise ValueError("malformed profile")
+            judged.append(user_id)
+
+        landmark_service._wakeup = asyncio.Event()
+        landmark_service._judge = judge_batch
+        landmark_service._pending = {
+            user_id: ([], [], []) for user_id in ("broken", "alice", "bob")
+        }
+        landmark_service._queued = 3
+        task: asyncio.Task = asyncio.create_task(landmark_service._flush_loop())
+        landmark_service._wakeup.set()
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return judged
+
+    assert asyncio.run(flush_once()) == ["alice", "bob"]
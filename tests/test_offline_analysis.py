@@ -0,0 +1,68 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Unit tests of `controller.offline_analysis`: jobs give the same result
+however the model was used before.
+"""
+
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from controller import offline_analysis
+from test_posture_controller import landmark_list, random_values
+
+
+class TrackingPose:
+    """Pose model stand-in whose landmarks depend on the frames seen."""
+
+    def __init__(self) -> None:
+        self.seen: int = 0
+
+    def process(self, image: np.ndarray) -> SimpleNamespace:
+        self.seen += 1
+        return SimpleNamespace(pose_landmarks=landmark_list(random_values(self.seen)))
+
+    def reset(self) -> None:
+        self.seen = 0
+
+
+def write_clip(path: str, frames: int = 12) -> None:
+    writer: cv2.VideoWriter = cv2.VideoWriter(
+        path, cv2.VideoWriter_fourcc(*"MJPG"), 30.0, (64, 48)
+    )
+    for frame in range(frames):
+        writer.write(np.full((48, 64, 3), frame * 10, np.uint8))
+    writer.release()
+
+
+def test_same_job_same_result(tmp_path):
+    path: str = str(tmp_path / "clip.avi")
+    write_clip(path)
+    pose: TrackingPose = TrackingPose()
+    job: offline_analysis.AnalysisJob = offline_analysis.AnalysisJob(
+        path, 4, 12, stride=2
+    )
+    first: dict[str, object] = offline_analysis.analyse_job(job, pose)
+    # Another job ran on the same model in between
+    offline_analysis.analyse_job(offline_analysis.AnalysisJob(path), pose)
+    second: dict[str, object] = offline_analysis.analyse_job(job, pose)
+    assert first["frames"].tolist() == [4, 6, 8, 10]
+    for key in ("frames", "detected", "is_good", "metrics"):
+        np.testing.assert_array_equal(first[key], second[key])
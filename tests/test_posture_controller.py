@@ -0,0 +1,118 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Unit tests of the landmark array helpers and the overlay drawing of
+`controller.posture_controller`.
+"""
+
+import mediapipe as mp
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from controller import posture_controller
+from controller.overlay import OverlayRenderer
+from model import posture_judger as judge
+
+
+def landmark_list(values: np.ndarray) -> landmark_pb2.NormalizedLandmarkList:
+    """A pose result's landmark list holding the rows of `values`."""
+    landmarks = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in values.tolist():
+        landmarks.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return landmarks
+
+
+def random_values(seed: int) -> np.ndarray:
+    rng: np.random.Generator = np.random.default_rng(seed)
+    values: np.ndarray = rng.uniform(-0.1, 1.1, (judge.LANDMARK_COUNT, 4))
+    values[:, 3] = rng.uniform(0.0, 1.0, judge.LANDMARK_COUNT)
+    return values.astype(np.float32)
+
+
+def test_landmarks_to_array_reads_every_landmark() -> None:
+    values: np.ndarray = random_values(0)
+    pose_landmarks = landmark_list(values)
+
+    landmarks: np.ndarray = posture_controller.landmarks_to_array(pose_landmarks)
+    assert landmarks.dtype == np.float32 and landmarks.shape == values.shape
+    assert np.array_equal(landmarks, values)
+
+    out: np.ndarray = np.empty_like(values)
+    assert posture_controller.landmarks_to_array(pose_landmarks, out) is out
+    assert np.array_equal(out, values)
+
+
+def test_landmarks_to_array_defaults_unset_fields() -> None:
+    pose_landmarks = landmark_pb2.NormalizedLandmarkList()
+    for i in range(judge.LANDMARK_COUNT):
+        pose_landmarks.landmark.add(x=i / 100)
+    landmarks: np.ndarray = posture_controller.landmarks_to_array(pose_landmarks)
+    assert np.array_equal(landmarks[:, 0], np.float32(np.arange(33) / 100))
+    assert not landmarks[:, 1:].any()
+
+
+def test_draw_skeleton_matches_mediapipe() -> None:
+    for seed in range(20):
+        values: np.ndarray = random_values(seed)
+        expected: np.ndarray = np.zeros((240, 320, 3), np.uint8)
+        mp.solutions.drawing_utils.draw_landmarks(
+            expected, landmark_list(values), mp.solutions.pose.POSE_CONNECTIONS
+        )
+        image: np.ndarray = np.zeros_like(expected)
+        posture_controller.draw_skeleton(image, values)
+        assert np.array_equal(image, expected), seed
+
+
+def test_draw_overlay_renderer_matches_puttext() -> None:
+    renderer: OverlayRenderer = OverlayRenderer()
+    statuses: list[tuple | None] = [
+        None,
+        (True, (0.42, True), (178.6, True), (0.37, True)),
+        (False, (96.0, False), (12.9, True), (3.0, False)),
+    ]
+    for seed, (width, height) in enumerate([(1280, 960), (640, 480)]):
+        values: np.ndarray = random_values(seed)
+        # Across the banner and the labels at the top of the frame
+        values[:, 1] = np.abs(values[:, 1]) * 0.3
+        values[:, 3] = 1.0
+        for status in statuses:
+            expected: np.ndarray = np.full((height, width, 3), 40, np.uint8)
+            image: np.ndarray = expected.copy()
+            posture_controller.draw_overlay(expected, values, status)
+            posture_controller.draw_overlay(image, values, status, renderer)
+            assert np.array_equal(image, expected), (width, status)
+
+
+def test_person_roi_follows_visible_upper_body() -> None:
+    roi: posture_controller.PersonROI = posture_controller.PersonROI()
+    landmarks: np.ndarray = np.zeros((judge.LANDMARK_COUNT, 4), np.float32)
+    landmarks[:13] = (0.5, 0.3, 0.0, 1.0)
+    landmarks[:3, :2] = [(0.4, 0.2), (0.6, 0.25), (0.5, 0.4)]
+    landmarks[3, :] = (0.0, 0.0, 0.0, 0.1)  # Invisible, ignored
+    roi.update(landmarks, (480, 640, 3))
+    assert roi.box is not None
+    x0, y0, x1, y1 = roi.box
+    assert x0 <= 0.4 * 640 and x1 >= 0.6 * 640 and y0 <= 0.2 * 480 and y1 >= 0.4 * 480
+    assert x0 > 0 and y0 > 0
+
+    landmarks[3:13, 3] = 0.0
+    landmarks[2, 3] = 0.0
+    roi.update(landmarks, (480, 640, 3))
+    assert roi.box is None
+    roi.update(None, (480, 640, 3))
+    assert roi.box is None
@@ -0,0 +1,215 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Unit tests of `model.posture_judger`: the batch and landmark array judges
+against the scalar `isPosture_good`, and the compiled threshold profiles.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+import pytest
+
+from model import posture_judger as judge
+
+PROFILE: judge.ThresholdProfile = judge.ThresholdProfile.from_biometrics(
+    judge.UNCALIBRATED_BIOMETRICS
+)
+
+
+def random_landmarks(frames: int, seed: int = 0) -> np.ndarray:
+    """Seated poses jittered so that every condition both passes and fails."""
+    rng: np.random.Generator = np.random.default_rng(seed)
+    landmarks: np.ndarray = rng.uniform(0.0, 1.0, (frames, judge.LANDMARK_COUNT, 4))
+    landmarks[:, judge.LEFT_SHOULDER_INDEX, :2] = rng.normal(
+        (0.70, 0.60), (0.03, 0.01), (frames, 2)
+    )
+    landmarks[:, judge.RIGHT_SHOULDER_INDEX, :2] = rng.normal(
+        (0.30, 0.60), (0.03, 0.01), (frames, 2)
+    )
+    landmarks[:, judge.NOSE_INDEX, :2] = rng.normal(
+        (0.50, 0.35), (0.05, 0.08), (frames, 2)
+    )
+    return landmarks
+
+
+def scalar_verdict(frame: np.ndarray) -> tuple:
+    """`isPosture_good` of one (33, 4) frame."""
+    return judge.isPosture_good(
+        tuple(frame[judge.LEFT_SHOULDER_INDEX, :2]),
+        tuple(frame[judge.RIGHT_SHOULDER_INDEX, :2]),
+        tuple(frame[judge.NOSE_INDEX, :2]),
+        profile=PROFILE,
+    )
+
+
+def test_batch_matches_scalar() -> None:
+    landmarks: np.ndarray = random_landmarks(2000)
+    is_good, metrics, conditions = judge.isPosture_good_batch(landmarks, PROFILE)
+
+    assert is_good.shape == (2000,)
+    assert metrics.shape == conditions.shape == (2000, 3)
+    # The random poses cover good and bad posture and every condition
+    assert 0 < is_good.sum() < len(is_good)
+    assert (conditions.any(axis=0) & ~conditions.all(axis=0)).all()
+    for frame, good, row, condition in zip(landmarks, is_good, metrics, conditions):
+        expected_good, *cases = scalar_verdict(frame)
+        assert good == expected_good
+        assert row == pytest.approx([case[0] for case in cases], rel=1e-12)
+        assert condition.tolist() == [case[1] for case in cases]
+
+
+def test_batch_float16_matches_scalar_on_same_values() -> None:
+    # Recorded sessions store float16, computed in float32
+    landmarks: np.ndarray = random_landmarks(500, seed=1).astype(np.float16)
+    _, metrics, _ = judge.isPosture_good_batch(landmarks, PROFILE)
+
+    assert metrics.dtype == np.float32
+    for frame, row in zip(landmarks.astype(np.float64), metrics):
+        expected: list[float] = [case[0] for case in scalar_verdict(frame)[1:]]
+        assert row == pytest.approx(expected, rel=1e-5)
+
+
+def test_landmarks_judge_matches_scalar() -> None:
+    for frame in random_landmarks(500, seed=2):
+        assert judge.isPosture_good_landmarks(frame, PROFILE) == scalar_verdict(frame)
+
+
+def test_missing_landmarks_are_bad() -> None:
+    landmarks: np.ndarray = random_landmarks(10, seed=3)
+    expected: tuple = judge.isPosture_good_batch(landmarks, PROFILE)
+    landmarks[4] = np.nan
+    is_good, metrics, conditions = judge.isPosture_good_batch(landmarks, PROFILE)
+
+    assert not is_good[4] and not conditions[4].any()
+    assert np.isnan(metrics[4]).all()
+    # Other frames are not affected
+    others: np.ndarray = np.arange(10) != 4
+    assert (is_good[others] == expected[0][others]).all()
+    assert np.array_equal(metrics[others], expected[1][others])
+
+    good, *cases = judge.isPosture_good_landmarks(landmarks[4], PROFILE)
+    assert not good and not any(case[1] for case in cases)
+    assert all(math.isnan(case[0]) for case in cases)
+
+
+def test_batch_without_frames() -> None:
+    is_good, metrics, conditions = judge.isPosture_good_batch(
+        np.empty((0, judge.LANDMARK_COUNT, 4), np.float32), PROFILE
+    )
+    assert is_good.shape == (0,)
+    assert metrics.shape == conditions.shape == (0, 3)
+
+
+@pytest.mark.parametrize("shape", [(judge.LANDMARK_COUNT, 4), (5, 17, 4), (5, 33, 3)])
+def test_batch_rejects_wrong_shapes(shape: tuple[int, ...]) -> None:
+    with pytest.raises(ValueError):
+        judge.isPosture_good_batch(np.zeros(shape), PROFILE)
+
+
+def test_profile_from_biometrics_applies_margins() -> None:
+    biometrics: dict[str, float] = {"head": 0.4, "shoulder": 179.0, "body": 0.8}
+    profile = judge.ThresholdProfile.from_biometrics(biometrics, "alice")
+    assert profile == judge.ThresholdProfile(
+        "alice",
+        0.4 - judge.HEAD_MARGIN,
+        0.4 + judge.HEAD_MARGIN,
+        179.0 - judge.TILT_MARGIN,
+        0.8 - judge.NOSE_MARGIN,
+    )
+    tuned = judge.ThresholdProfile.from_biometrics(
+        biometrics, head_margin=0.05, tilt_margin=1.0, nose_margin=0.25
+    )
+    assert (tuned.head_low, tuned.head_high) == pytest.approx((0.35, 0.45))
+    assert (tuned.min_tilt, tuned.min_nose_distance) == pytest.approx((178.0, 0.55))
+
+
+def test_profile_margins_from_biometrics_and_capped() -> None:
+    biometrics: dict[str, object] = {
+        "head": 0.2,
+        "shoulder": 170.0,
+        "body": 0.17,
+        "margins": {"head": 0.03, "shoulder": 9.0},
+    }
+    profile = judge.ThresholdProfile.from_biometrics(biometrics)
+    assert (profile.head_low, profile.head_high) == pytest.approx((0.17, 0.23))
+    assert profile.min_tilt == pytest.approx(161.0)
+    # The default nose margin would make the threshold negative
+    assert profile.min_nose_distance == pytest.approx(
+        0.17 * (1 - judge.MAX_MARGIN_SHARE)
+    )
+
+
+@pytest.mark.parametrize(
+    "user_id", ["../../etc/passwd", "a/b", "a\\b", "..", "", "x" * 65, "é"]
+)
+def test_profile_path_rejects_unsafe_user_ids(user_id: str) -> None:
+    with pytest.raises(ValueError):
+        judge.profile_path(user_id)
+
+
+def test_profile_path() -> None:
+    assert judge.profile_path(None) == judge.BIOMETRICS_PATH
+    assert judge.profile_path(judge.DEFAULT_USER) == judge.BIOMETRICS_PATH
+    assert judge.profile_path("alice_2-b") == os.path.join(
+        judge.PROFILES_DIR, "alice_2-b.json"
+    )
+
+
+@pytest.fixture
+def project_root(tmp_path, monkeypatch) -> str:
+    """Resolve profiles against an empty temporary project root."""
+    monkeypatch.setattr(judge, "PROJECT_ROOT", str(tmp_path))
+    monkeypatch.setattr(judge.config, "root", str(tmp_path))
+    os.makedirs(tmp_path / judge.PROFILES_DIR)
+    return str(tmp_path)
+
+
+def write_biometrics(root: str, user_id: str, head: float, mtime_ns: int) -> None:
+    path: str = os.path.join(root, judge.profile_path(user_id))
+    with open(path, "w", encoding="utf-8") as profile_file:
+        json.dump({"head": head, "shoulder": 180.0, "body": 0.85}, profile_file)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_profile_store_reloads_changed_profiles(project_root: str) -> None:
+    store = judge.ProfileStore(check_interval=0.0)
+    uncalibrated = judge.ThresholdProfile.from_biometrics(
+        judge.UNCALIBRATED_BIOMETRICS, "alice"
+    )
+    assert store.get("alice") == uncalibrated
+
+    write_biometrics(project_root, "alice", 0.50, 10**18)
+    assert store.get("alice").head_low == pytest.approx(0.50 - judge.HEAD_MARGIN)
+    # Unchanged files are not compiled again
+    assert store.get("alice") is store.get("alice")
+
+    write_biometrics(project_root, "alice", 0.30, 10**18 + 10**9)
+    assert store.get("alice").head_low == pytest.approx(0.30 - judge.HEAD_MARGIN)
+
+    with pytest.raises(ValueError):
+        store.get("../alice")
+
+
+def test_profile_store_keeps_at_most_max_profiles(project_root: str) -> None:
+    store = judge.ProfileStore(check_interval=60.0, max_profiles=3)
+    for user in ("a", "b", "c", "d"):
+        store.get(user)
+    assert list(store._entries) == ["b", "c", "d"]
@@ -0,0 +1,198 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Unit tests of `model.posture_rules`: the default rule set against
+`isPosture_good_batch`, and the errors of malformed rule sets.
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from model import posture_judger as judge
+from model import posture_rules
+from test_posture_judger import PROFILE, random_landmarks
+
+CORE_RULES: tuple[str, ...] = (
+    "head_height",
+    "level_shoulders",
+    "head_above_shoulders",
+)
+SHOULDERS: dict[str, object] = {
+    "type": "distance",
+    "joints": ["LEFT_SHOULDER", "RIGHT_SHOULDER"],
+}
+
+
+def definition(*rules: dict, **features: dict) -> dict[str, object]:
+    """A rule set of the given rules over `SHOULDERS` and `features`."""
+    return {
+        "version": 1,
+        "features": {"shoulders": SHOULDERS, **features},
+        "rules": rules,
+    }
+
+
+def test_default_rules_match_batch_judge() -> None:
+    rules: posture_rules.RuleSet = posture_rules.load_rules()
+    landmarks: np.ndarray = random_landmarks(20000, seed=5).astype(np.float32)
+    result: posture_rules.RuleResults = rules.evaluate(landmarks, PROFILE)
+    is_good, metrics, conditions = judge.isPosture_good_batch(landmarks, PROFILE)
+
+    core: list[int] = [rules.rule_names.index(name) for name in CORE_RULES]
+    assert np.array_equal(result.good, is_good)
+    assert np.array_equal(result.passed[:, core], conditions)
+    assert np.allclose(result.features[:, :3], metrics, rtol=1e-6)
+    assert not rules.required[len(CORE_RULES) :].any()
+
+
+def test_single_frame_matches_batch() -> None:
+    rules: posture_rules.RuleSet = posture_rules.load_rules()
+    landmarks: np.ndarray = random_landmarks(20, seed=6)
+    batch: posture_rules.RuleResults = rules.evaluate(landmarks, PROFILE)
+    for i, frame in enumerate(landmarks):
+        single: posture_rules.RuleResults = rules.evaluate(frame, PROFILE)
+        assert single.good.tolist() == [batch.good[i]]
+        assert np.array_equal(single.passed[0], batch.passed[i])
+
+
+def test_missing_landmarks_fail() -> None:
+    rules: posture_rules.RuleSet = posture_rules.load_rules()
+    landmarks: np.ndarray = random_landmarks(3, seed=7)
+    landmarks[1] = np.nan
+    result: posture_rules.RuleResults = rules.evaluate(landmarks, PROFILE)
+    assert not result.good[1]
+    assert not result.passed[1].any() and result.evaluated[1].all()
+
+
+def test_bounds_follow_the_default_profile(monkeypatch) -> None:
+    current: dict[str, judge.ThresholdProfile] = {"profile": PROFILE}
+    monkeypatch.setattr(judge.profiles, "get", lambda *_: current["profile"])
+    rules: posture_rules.RuleSet = posture_rules.compile_rules(
+        definition({"name": "head", "feature": "shoulders", "gt": "head_low"})
+    )
+    assert rules.bounds()[0, 0] == PROFILE.head_low
+    # A recalibration replaces the default user's profile
+    current["profile"] = judge.ThresholdProfile.from_biometrics(
+        {"head": 0.5, "shoulder": 180.0, "body": 0.85}
+    )
+    assert rules.bounds()[0, 0] == pytest.approx(0.5 - judge.HEAD_MARGIN)
+
+
+def test_angles_and_midpoints() -> None:
+    rules: posture_rules.RuleSet = posture_rules.compile_rules(
+        definition(
+            {"name": "elbow", "feature": "elbow", "ge": 0},
+            {"name": "lean", "feature": "lean", "ge": 0},
+            elbow={"type": "angle", "joints": ["NOSE", "LEFT_EYE", "RIGHT_EYE"]},
+            lean={
+                "type": "dx",
+                "joints": [["LEFT_HIP", "RIGHT_HIP"], "NOSE"],
+                "scale": "shoulders",
+            },
+        )
+    )
+    landmarks: np.ndarray = np.zeros((1, judge.LANDMARK_COUNT, 4))
+    index: dict[str, int] = posture_rules.LANDMARK_INDEX
+    landmarks[0, index["NOSE"], :2] = (1.0, 0.0)
+    landmarks[0, index["LEFT_EYE"], :2] = (0.0, 0.0)
+    landmarks[0, index["RIGHT_EYE"], :2] = (0.0, 1.0)
+    landmarks[0, index["LEFT_HIP"], :2] = (0.2, 0.5)
+    landmarks[0, index["RIGHT_HIP"], :2] = (0.4, 0.5)
+    landmarks[0, index["LEFT_SHOULDER"], :2] = (0.0, 0.0)
+    landmarks[0, index["RIGHT_SHOULDER"], :2] = (0.5, 0.0)
+    values, _ = rules.features(landmarks)
+    # Right angle at the left eye, nose 0.7 right of the hip midpoint
+    assert values[0].tolist() == pytest.approx([0.5, 90.0, 0.7 / 0.5])
+
+
+def test_load_rules_recompiles_changed_files(tmp_path) -> None:
+    path: str = str(tmp_path / "rules.json")
+    rule: dict[str, object] = {"name": "wide", "feature": "shoulders", "gt": 0.1}
+    with open(path, "w", encoding="utf-8") as rules_file:
+        json.dump(definition(rule), rules_file)
+    first: posture_rules.RuleSet = posture_rules.load_rules(path)
+    assert posture_rules.load_rules(path) is first
+
+    with open(path, "w", encoding="utf-8") as rules_file:
+        json.dump(definition(rule, {**rule, "name": "narrow", "lt": 0.9}), rules_file)
+    os.utime(path, ns=(10**18, 10**18))
+    assert posture_rules.load_rules(path).rule_names == ("wide", "narrow")
+
+
+@pytest.mark.parametrize(
+    "rule_set, message",
+    [
+        ({"version": 2, "rules": [{}]}, "version"),
+        (definition(), "no rules"),
+        (
+            definition(
+                {"name": "r", "feature": "f", "gt": 0}, f={"type": "area", "joints": []}
+            ),
+            "unknown type",
+        ),
+        (
+            definition(
+                {"name": "r", "feature": "f", "gt": 0},
+                f={"type": "tilt", "joints": ["NOSE"]},
+            ),
+            "takes 2 joints",
+        ),
+        (
+            definition(
+                {"name": "r", "feature": "f", "gt": 0},
+                f={"type": "tilt", "joints": ["NOSE", "TAIL"]},
+            ),
+            "unknown joint TAIL",
+        ),
+        (
+            definition(
+                {"name": "r", "feature": "f", "gt": 0},
+                f={**SHOULDERS, "scale": "width"},
+            ),
+            "unknown scale",
+        ),
+        (definition({"name": "r", "feature": "missing", "gt": 0}), "unknown feature"),
+        (definition({"name": "r", "feature": "shoulders"}), "no bound"),
+        (
+            definition({"name": "r", "feature": "shoulders", "gt": 0, "ge": 0}),
+            "conflicting bounds",
+        ),
+        (
+            definition({"name": "r", "feature": "shoulders", "gt": "head_size"}),
+            "unknown threshold",
+        ),
+        (
+            definition({"name": "r", "feature": "shoulders", "gt": [1]}),
+            "not a number",
+        ),
+        (
+            definition(
+                {"name": "r", "feature": "shoulders", "gt": 0},
+                {"name": "r", "feature": "shoulders", "lt": 1},
+            ),
+            "unique",
+        ),
+        (definition({"feature": "shoulders", "gt": 0}), "unique and not empty"),
+    ],
+)
+def test_malformed_rule_sets(rule_set: dict[str, object], message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        posture_rules.compile_rules(rule_set)
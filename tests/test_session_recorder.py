@@ -0,0 +1,104 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Unit tests of `model.session_recorder`: sessions written by
+`SessionRecorder` read back by `SessionReader`.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from model import session_recorder
+from model.session_recorder import SessionReader, SessionRecorder
+from test_posture_judger import random_landmarks
+
+START: float = 1_700_000_000.0
+
+
+def record(root, frames: int, segment_rows: int, close: bool = True):
+    """Record `frames` rows at 30 fps, every 7th without a detection."""
+    landmarks: np.ndarray = random_landmarks(frames, seed=3)
+    recorder: SessionRecorder = SessionRecorder(
+        str(root), "session", segment_rows=segment_rows, block_rows=16
+    )
+    for frame in range(frames):
+        detected: bool = frame % 7 != 0
+        recorder.append(
+            START + frame / 30,
+            landmarks[frame] if detected else None,
+            (frame, frame + 0.5, -frame) if detected else None,
+            (detected, frame % 2 == 0, True, False, detected),
+        )
+    if close:
+        recorder.close()
+    else:
+        # Write the staged rows but leave the last segment unindexed
+        recorder._submit()
+        recorder._queue.put(None)
+        recorder._thread.join()
+    return recorder, landmarks
+
+
+@pytest.mark.parametrize("close", [True, False])
+def test_round_trip(tmp_path, close):
+    recorder, landmarks = record(tmp_path, 1000, segment_rows=300, close=close)
+    reader: SessionReader = SessionReader(recorder.path)
+    assert reader.frame_count == 1000
+    assert len(reader.index) == 4
+
+    rows: dict[str, np.ndarray] = reader.query()
+    frames: np.ndarray = np.arange(1000)
+    detected: np.ndarray = frames % 7 != 0
+    np.testing.assert_array_equal(rows["timestamps"], START + frames / 30)
+    np.testing.assert_array_equal(
+        rows["landmarks"][detected], landmarks[detected].astype(np.float16)
+    )
+    assert np.isnan(rows["landmarks"][~detected]).all()
+    np.testing.assert_array_equal(rows["metrics"][detected, 0], frames[detected])
+    assert np.isnan(rows["metrics"][~detected]).all()
+    np.testing.assert_array_equal(rows["flags"][:, 0], detected)
+    np.testing.assert_array_equal(rows["flags"][:, 1], frames % 2 == 0)
+
+
+def test_query_time_range(tmp_path):
+    recorder, _ = record(tmp_path, 1000, segment_rows=300)
+    reader: SessionReader = SessionReader(recorder.path)
+    # Rows 290 to 609, across three segments
+    rows: dict[str, np.ndarray] = reader.query(START + 290 / 30, START + 609.5 / 30)
+    np.testing.assert_array_equal(rows["timestamps"], START + np.arange(290, 610) / 30)
+    assert all(len(column) == 320 for column in rows.values())
+    empty: dict[str, np.ndarray] = reader.query(START - 10, START)
+    assert all(len(column) == 0 for column in empty.values())
+    assert empty["landmarks"].shape == (0, 33, 4)
+
+
+def test_recorders_never_share_a_directory(tmp_path):
+    recorders: list[SessionRecorder] = [
+        SessionRecorder(str(tmp_path), "session") for _ in range(3)
+    ] + [SessionRecorder(str(tmp_path)) for _ in range(3)]
+    for recorder in recorders:
+        recorder.close()
+    paths: set[str] = {recorder.path for recorder in recorders}
+    assert len(paths) == len(recorders) == len(os.listdir(tmp_path))
+    assert recorders[1].session_id == "session-1"
+
+
+def test_default_root_is_project_root():
+    assert session_recorder.SESSIONS_DIR.startswith(session_recorder.PROJECT_ROOT)
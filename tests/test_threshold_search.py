@@ -0,0 +1,93 @@
+# MIT License
+# Copyright (c) 2023 The_BDMI_Students_Exhibition_Team_2023
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Unit tests of `controller.threshold_search`: configuration counts on
+synthetic deviations against a per-frame reference, and the scores.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from controller import threshold_search
+
+GOOD_FRAMES: int = 300
+
+
+def reference_counts(deviations: np.ndarray, configs: np.ndarray) -> np.ndarray:
+    """Counts of `score_configs`, judged one frame at a time."""
+    counts: np.ndarray = np.zeros((len(configs), 2), dtype=np.int64)
+    for i, (head_margin, tilt_margin, nose_margin) in enumerate(configs):
+        for frame, (head, tilt, nose) in enumerate(deviations.T):
+            if head < head_margin and tilt >= -tilt_margin and nose > -nose_margin:
+                counts[i, 0 if frame < GOOD_FRAMES else 1] += 1
+    return counts
+
+
+@pytest.fixture
+def deviations(tmp_path):
+    # Multiples of 1/8 land exactly on the margins below
+    deviations: np.ndarray = (
+        np.random.default_rng(5).integers(-8, 9, size=(3, 500)) / 8
+    ).astype(np.float32)
+    deviations[0] = np.abs(deviations[0])
+    np.save(os.path.join(tmp_path, threshold_search.DEVIATIONS_FILE), deviations)
+    yield str(tmp_path), deviations
+    threshold_search._worker_deviations.clear()
+
+
+@pytest.mark.parametrize("block_frames", [1 << 16, 64, 7])
+def test_score_configs_matches_reference(deviations, monkeypatch, block_frames):
+    directory, values = deviations
+    monkeypatch.setattr(threshold_search, "BLOCK_FRAMES", block_frames)
+    configs: np.ndarray = np.concatenate(
+        [
+            threshold_search.grid_configs(3, {k: (0.0, 1.0) for k in "abc"}),
+            threshold_search.random_configs(20, seed=1),
+        ]
+    )
+    counts: np.ndarray = threshold_search.score_configs(
+        (directory, GOOD_FRAMES, configs)
+    )
+    np.testing.assert_array_equal(counts, reference_counts(values, configs))
+
+
+def test_score_configs_extremes(deviations):
+    directory, _ = deviations
+    configs: np.ndarray = np.array([[np.inf, np.inf, np.inf], [0.0, 0.0, 0.0]])
+    counts: np.ndarray = threshold_search.score_configs(
+        (directory, GOOD_FRAMES, configs)
+    )
+    assert counts[0].tolist() == [GOOD_FRAMES, 200]
+    # No deviation is below a head margin of 0
+    assert counts[1].tolist() == [0, 0]
+
+
+def test_scores():
+    result = threshold_search.scores(np.array([[8, 1], [10, 5]]), 10, 5)
+    assert result["accuracy"] == pytest.approx([0.8, 10 / 15])
+    assert result["balanced_accuracy"] == pytest.approx([0.8, 0.5])
+    assert result["bad_precision"] == pytest.approx([4 / 6, 0.0])
+    assert result["bad_recall"] == pytest.approx([0.8, 0.0])
+    assert result["bad_f1"] == pytest.approx([16 / 22, 0.0])
+
+
+def test_scores_without_frames():
+    result = threshold_search.scores(np.zeros((1, 2), np.int64), 0, 0)
+    assert all(np.isfinite(values).all() for values in result.values())